@@ -12,15 +12,340 @@ sort files by various attributes, and open files directly in Visual Studio Code.
 
 import os
 import subprocess
-from tkinter import messagebox, filedialog, ttk, scrolledtext
+from tkinter import messagebox, filedialog, simpledialog, ttk, scrolledtext
 import tkinter as tk
 from datetime import datetime
 import threading
+import queue
+import time
+
+from pawncompiler import (BuildEngine, BuildScheduler, DirectoryWatcher, RemoteBuildPool, SearchIndex,
+                          classify_output_line, format_summary, format_timing, iter_sources, load_listing,
+                          parse_diagnostic, save_listing, scan_directory)
+from pawncompiler.remote import parse_address
+from pawncompiler.scheduler import BACKGROUND, BATCH, INTERACTIVE
+
+class FileListView:
+    """Virtualized multi-column list of file names backed by an in-memory list.
+
+    Only as many Treeview items as fit on screen exist; scrolling refills them
+    with the rows now in view, so showing, sorting or filtering tens of
+    thousands of files costs about as much as a screenful. The selection is
+    kept by name, row_values(name) returns the (text, values) of a row,
+    on_activate is called on double-click or Return and on_sort(column) when
+    a heading is clicked.
+    """
+
+    # Pixel height below which no row is expected, to size the item pool
+    MIN_ROW_HEIGHT = 12
+
+    # Rows scrolled per mouse wheel notch
+    WHEEL_ROWS = 3
+
+    def __init__(self, master, columns, row_values, on_activate=None, on_sort=None):
+        """Create the view; columns are (id, heading, width, anchor) tuples, the first one is the name."""
+        self.row_values = row_values
+        self.on_activate = on_activate
+        self.headings = {column: heading for column, heading, _, _ in columns}
+        self.rows = []
+        self.selected = set()
+        self.anchor = None
+        self.cursor = None
+        self.top = 0
+        self.visible = 1
+        self.items = []
+        self.empty_text = None
+        
+        self.frame = ttk.Frame(master)
+        self.frame.columnconfigure(0, weight=1)
+        self.frame.rowconfigure(0, weight=1)
+        
+        self.tree = ttk.Treeview(self.frame, columns=[column for column, _, _, _ in columns[1:]],
+                                 selectmode='none', yscrollcommand=self._tree_scrolled)
+        for index, (column, heading, width, anchor) in enumerate(columns):
+            column_id = "#0" if index == 0 else column
+            command = (lambda column=column: on_sort(column)) if on_sort else ""
+            self.tree.heading(column_id, text=heading, anchor=anchor, command=command)
+            self.tree.column(column_id, width=width, anchor=anchor, stretch=index == 0)
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        
+        self.tree.bind('<Configure>', self._resize)
+        self.tree.bind('<Button-1>', lambda e: self._click(e, "choose"))
+        self.tree.bind('<Control-Button-1>', lambda e: self._click(e, "toggle"))
+        self.tree.bind('<Shift-Button-1>', lambda e: self._click(e, "extend"))
+        self.tree.bind('<Double-Button-1>', self._double_click)
+        self.tree.bind('<MouseWheel>', lambda e: self._scroll(-1 if e.delta > 0 else 1))
+        self.tree.bind('<Button-4>', lambda e: self._scroll(-1))
+        self.tree.bind('<Button-5>', lambda e: self._scroll(1))
+        for key, step in (('Up', -1), ('Down', 1), ('Prior', "-page"), ('Next', "page"),
+                          ('Home', "home"), ('End', "end")):
+            self.tree.bind(f'<{key}>', lambda e, step=step: self._move(step, False))
+            self.tree.bind(f'<Shift-{key}>', lambda e, step=step: self._move(step, True))
+        self.tree.bind('<Control-a>', self._select_all)
+        self.tree.bind('<Return>', self._activate)
+
+    def grid(self, **options):
+        """Grid the view's frame."""
+        self.frame.grid(**options)
+
+    def set_rows(self, rows, empty_text=None):
+        """Show a new list of names, keeping the selection of the names still listed."""
+        self.rows = list(rows)
+        self.empty_text = empty_text
+        if self.selected:
+            self.selected &= set(self.rows)
+        self._render()
+
+    def insert(self, position, name):
+        """Insert one name at a position without moving the rows in view."""
+        self.rows.insert(position, name)
+        if position < self.top:
+            self.top += 1
+        self._render()
+
+    def remove(self, name):
+        """Remove one name if it is listed."""
+        try:
+            position = self.rows.index(name)
+        except ValueError:
+            return
+        del self.rows[position]
+        self.selected.discard(name)
+        if position < self.top:
+            self.top -= 1
+        self._render()
+
+    def refresh(self):
+        """Redraw the rows in view, e.g. after their values changed."""
+        self._render()
+
+    def selection(self):
+        """Return the selected names in display order."""
+        if not self.selected:
+            return []
+        return [name for name in self.rows if name in self.selected]
+
+    def select(self, names):
+        """Select the listed names among the given ones and scroll the first into view."""
+        self.selected = set(names) & set(self.rows)
+        first = next((name for name in self.rows if name in self.selected), None)
+        self.anchor = self.cursor = first
+        if first is not None:
+            self.see(first)
+        self._render()
+
+    def see(self, name):
+        """Scroll so a name is in view, centered if it was not."""
+        position = self.rows.index(name)
+        if not self.top <= position < self.top + self.visible:
+            self.top = position - self.visible // 2
+        self._render()
+
+    def set_sort_indicator(self, column, reverse):
+        """Mark the heading of the sort column with the sort direction."""
+        for index, (other, heading) in enumerate(self.headings.items()):
+            if other == column:
+                heading = f"{heading} {'▼' if reverse else '▲'}"
+            self.tree.heading("#0" if index == 0 else other, text=heading)
+
+    def yview(self, *args):
+        """Scrollbar command: scroll to a fraction or by units or pages."""
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * len(self.rows) + 0.5)
+        elif args[0] == 'scroll':
+            count = int(args[1])
+            self.top += count * (max(1, self.visible - 1) if args[2] == 'pages' else 1)
+        self._render()
+
+    def _scroll(self, units):
+        """Scroll by mouse wheel notches."""
+        self.top += units * self.WHEEL_ROWS
+        self._render()
+        return "break"
+
+    def _resize(self, event):
+        """Grow the item pool to cover the new height."""
+        count = max(1, event.height // self.MIN_ROW_HEIGHT + 1)
+        while len(self.items) < count:
+            self.items.append(self.tree.insert('', 'end', text=""))
+        if len(self.items) > count:
+            self.tree.delete(*self.items[count:])
+            del self.items[count:]
+        self._render()
+
+    def _tree_scrolled(self, first, last):
+        """Learn how many pool items fit from the Treeview's own scroll range."""
+        if self.items:
+            visible = max(1, round(float(last) * len(self.items)))
+            if float(first) > 0:
+                # The pool never scrolls itself; only the rows in it change
+                self.tree.after_idle(self.tree.yview_moveto, 0)
+            if visible != self.visible:
+                self.visible = visible
+                self._render()
+
+    def _render(self):
+        """Fill the item pool with the rows in view and update the scrollbar."""
+        self.top = max(0, min(self.top, len(self.rows) - self.visible))
+        selection = []
+        for index, item in enumerate(self.items):
+            position = self.top + index
+            if position < len(self.rows):
+                name = self.rows[position]
+                text, values = self.row_values(name)
+                self.tree.item(item, text=text, values=values)
+                if name in self.selected:
+                    selection.append(item)
+            elif position == 0 and self.empty_text:
+                self.tree.item(item, text=self.empty_text, values=())
+            else:
+                self.tree.item(item, text="", values=())
+        self.tree.selection_set(selection)
+        
+        if self.rows:
+            self.scrollbar.set(self.top / len(self.rows), min(1.0, (self.top + self.visible) / len(self.rows)))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _row_at(self, y):
+        """Return the name of the row at a y coordinate, or None."""
+        item = self.tree.identify_row(y)
+        if item not in self.items:
+            return None
+        position = self.top + self.items.index(item)
+        return self.rows[position] if position < len(self.rows) else None
+
+    def _click(self, event, mode):
+        """Select rows on click; clicks on headings and separators go to the Treeview."""
+        if self.tree.identify_region(event.x, event.y) not in ('tree', 'cell'):
+            return None
+        self.tree.focus_set()
+        name = self._row_at(event.y)
+        if name is None:
+            if mode == "choose":
+                self.selected = set()
+                self._render()
+            return "break"
+        
+        if mode == "toggle":
+            self.selected ^= {name}
+            self.anchor = name
+        elif mode == "extend" and self.anchor in self.selected:
+            self._select_range(self.anchor, name)
+        else:
+            self.selected = {name}
+            self.anchor = name
+        self.cursor = name
+        self._render()
+        return "break"
+
+    def _select_range(self, start, end):
+        """Select the rows from start to end, inclusive, in display order."""
+        first, last = sorted((self.rows.index(start), self.rows.index(end)))
+        self.selected = set(self.rows[first:last + 1])
+
+    def _move(self, step, extend):
+        """Move the cursor by rows, a page or to either end, selecting its row or extending the selection."""
+        if not self.rows:
+            return "break"
+        try:
+            position = self.rows.index(self.cursor)
+        except ValueError:
+            position = self.top - 1
+        if step == "home":
+            position = 0
+        elif step == "end":
+            position = len(self.rows) - 1
+        elif step in ("page", "-page"):
+            page = max(1, self.visible - 1)
+            position += page if step == "page" else -page
+        else:
+            position += step
+        position = max(0, min(position, len(self.rows) - 1))
+        self.cursor = self.rows[position]
+        if extend and self.anchor in self.selected:
+            self._select_range(self.anchor, self.cursor)
+        else:
+            self.selected = {self.cursor}
+            self.anchor = self.cursor
+        self.see(self.cursor)
+        return "break"
+
+    def _select_all(self, event=None):
+        """Select every row."""
+        self.selected = set(self.rows)
+        self._render()
+        return "break"
+
+    def _double_click(self, event):
+        """Activate the double-clicked row."""
+        if self.tree.identify_region(event.x, event.y) not in ('tree', 'cell'):
+            return None
+        if self._row_at(event.y) is not None and self.on_activate:
+            self.on_activate()
+        return "break"
+
+    def _activate(self, event=None):
+        """Activate the selected rows."""
+        if self.selected and self.on_activate:
+            self.on_activate()
+        return "break"
+
 
 class PawnCompilerApp:
-    def __init__(self, root):
+    # Console logging: how often the log queue is drained, the most entries
+    # written per drain and the number of lines the console keeps
+    LOG_FLUSH_MS = 50
+    LOG_BATCH_SIZE = 2000
+    MAX_CONSOLE_LINES = 5000
+
+    # Delay after the last keystroke before the file list is filtered
+    SEARCH_DEBOUNCE_MS = 150
+
+    # Plugins passed to one compiler invocation in batch compiles; spcomp
+    # builds several sources as one program, so raise this only for a
+    # compiler that writes one output per source
+    SOURCES_PER_INVOCATION = 1
+
+    # Compile jobs kept in flight when building on remote workers; each
+    # worker runs as many as it has slots and the rest wait for one
+    REMOTE_JOBS = 16
+
+    # How often the build queue status and the jobs window are refreshed
+    QUEUE_POLL_MS = 250
+
+    # Most builds listed in the history window
+    HISTORY_LIMIT = 500
+
+    # File list columns and the sort mode of each; modes sort descending by
+    # default except for names and build states
+    FILE_COLUMNS = [("name", "Name", 360, tk.W), ("size", "Size", 90, tk.E), ("date", "Modified", 140, tk.W),
+                    ("status", "Last Build", 110, tk.W), ("duration", "Build Time", 90, tk.E)]
+    SORT_REVERSE = {"name": False, "date": True, "size": True, "status": False, "duration": True}
+    BUILD_STATES = {"ok": "✓ ok", "failed": "✗ failed", "skipped": "✓ up to date", "cancelled": "⛔ cancelled"}
+
+    # Project tree: how often scan results are drained into the tree, the most
+    # files sent per batch and the suffix of the placeholder in unopened folders
+    PROJECT_FLUSH_MS = 50
+    PROJECT_BATCH_SIZE = 500
+    PROJECT_PLACEHOLDER = "::placeholder"
+
+    def __init__(self, root, max_console_lines=MAX_CONSOLE_LINES):
         """Initialize the main application."""
         self.root = root
+        
+        # Launch time, for the time-to-first-paint reported once the window shows
+        self.launch_time = time.perf_counter()
+        self.first_paint = None
+        
+        # Thread-safe log queue drained into the console by the main loop
+        self.log_queue = queue.SimpleQueue()
+        self.max_console_lines = max_console_lines
         self.root.title("Pawn Compiler v2.0 @ PyTkWin")
         self.root.geometry("1000x700")
         self.root.minsize(800, 600)
@@ -43,6 +368,12 @@ class PawnCompilerApp:
         self.style.configure('Title.TLabel', background=bg_color, foreground=fg_color, font=('Segoe UI', 16, 'bold'))
         self.style.configure('TButton', font=('Segoe UI', 10), padding=8)
         self.style.configure('Accent.TButton', font=('Segoe UI', 10, 'bold'), padding=10)
+        self.style.configure('TCheckbutton', background=bg_color, foreground=fg_color, font=('Segoe UI', 10))
+        self.style.map('TCheckbutton', background=[('active', secondary_bg)])
+        self.style.configure('Treeview', background="#252526", fieldbackground="#252526",
+                             foreground=fg_color, font=('Consolas', 10))
+        self.style.configure('Treeview.Heading', background=secondary_bg, foreground=fg_color, font=('Segoe UI', 9, 'bold'))
+        self.style.map('Treeview', background=[('selected', accent_color)])
         self.style.map('TButton',
                       background=[('active', accent_color)],
                       foreground=[('active', fg_color)])
@@ -50,19 +381,80 @@ class PawnCompilerApp:
         # Configuration file to save the directory path
         self.config_file = 'config.txt'
         
+        # Build worker addresses, one per line; without any, compiles run locally
+        self.workers_file = 'workers.txt'
+        
+        # Parallel compile jobs used by batch compiles
+        self.max_workers = os.cpu_count() or 1
+        
+        # Directory listing metadata, so sorting never touches the disk
+        self.files = []
+        self.file_meta = {}
+        self.sort_mode = "date"
+        self.sort_reverse = True
+        self.scan_token = 0
+        
+        # Newest build of every plugin as (time, state, elapsed), from the
+        # build log and then from every finished compile
+        self.build_status = {}
+        self.build_status_changed = False
+        
+        # Fuzzy search index over file names and content keywords
+        self.search_index = SearchIndex()
+        self.search_job = None
+        
+        # Filesystem watcher and the build queue fed by it and the compile buttons
+        self.watcher = None
+        self.scheduler = None
+        self.jobs_window = None
+        
+        # Build engine of the directory, loaded on a background thread; the
+        # actions asked for meanwhile run once it is ready
+        self.engine = None
+        self.engine_token = 0
+        self.engine_waiters = []
+        
+        # Diagnostics panel, created on first use
+        self.diagnostics_window = None
+        self.diagnostics_sort = ("plugin", False)
+        
+        # Set by compile and lint threads; the table is rebuilt at the next
+        # queue poll instead of once per finished plugin
+        self.diagnostics_changed = False
+        
+        # Project tree over every scripting root, scanned on first view: the
+        # children of every folder found so far, the root and relative path of
+        # every file and the folders whose children are shown in the tree
+        self.extra_roots = []
+        self.project_queue = queue.SimpleQueue()
+        self.project_scan_token = 0
+        self.project_scanned = False
+        self.project_children = {}
+        self.project_files = {}
+        self.project_loaded = set()
+        
         # Load the directory from the config file or use the script's directory by default
         self.directory = self.load_directory() or os.path.dirname(os.path.abspath(__file__))
         self.compiled_directory = os.path.join(self.directory, "compiled")
-
+        self.worker_addresses = self.load_workers()
+        
         # Prompt for directory if not already set
         if not self.directory or not os.path.exists(self.directory):
             self.prompt_for_directory()
-
+        
         # Create UI
         self.create_ui()
         
-        # Update the file list
-        self.update_files()
+        # Load the build engine owning the include index and build cache of
+        # the directory without holding up the window
+        self.open_engine()
+        
+        # Show the previous session's listing now; the directory is scanned
+        # and watched once the window is on screen
+        self.show_cached_listing()
+        self.root.bind('<Map>', self._on_map, add='+')
+        if self.root.winfo_ismapped():
+            self.root.after_idle(self._on_map)
 
     def create_ui(self):
         """Create the modern UI layout."""
@@ -97,37 +489,57 @@ class PawnCompilerApp:
         search_label.grid(row=0, column=0, padx=(0, 10))
         
         self.search_var = tk.StringVar()
-        self.search_var.trace_add("write", self.update_list)
+        self.search_var.trace_add("write", self._schedule_search)
         
         search_entry = ttk.Entry(search_frame, textvariable=self.search_var, font=('Segoe UI', 11))
         search_entry.grid(row=0, column=1, sticky=(tk.W, tk.E))
         
+        self.search_contents_var = tk.BooleanVar(value=False)
+        search_contents_check = ttk.Checkbutton(search_frame, text="📄 Search contents",
+                                                variable=self.search_contents_var, command=self._toggle_content_search)
+        search_contents_check.grid(row=0, column=2, padx=(10, 0))
+        
+        # File list and project tree tabs
+        self.notebook = ttk.Notebook(main_frame)
+        self.notebook.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
+        
         # File list section
-        list_frame = ttk.Frame(main_frame)
-        list_frame.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
+        list_frame = ttk.Frame(self.notebook)
         list_frame.columnconfigure(0, weight=1)
         list_frame.rowconfigure(0, weight=1)
         
-        # Create listbox with scrollbar
-        list_scroll = tk.Scrollbar(list_frame)
-        list_scroll.grid(row=0, column=1, sticky=(tk.N, tk.S))
-        
-        self.file_listbox = tk.Listbox(
-            list_frame, 
-            font=("Consolas", 11),
-            bg="#252526",
-            fg="#ffffff",
-            selectbackground="#007acc",
-            selectforeground="#ffffff",
-            yscrollcommand=list_scroll.set,
-            highlightthickness=0,
-            borderwidth=0
-        )
-        self.file_listbox.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        list_scroll.config(command=self.file_listbox.yview)
+        # Virtualized file list; double-click compiles, headings sort
+        self.file_view = FileListView(list_frame, self.FILE_COLUMNS, self._file_row,
+                                      on_activate=self.compile_file, on_sort=self._sort_column)
+        self.file_view.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        # Project tree section
+        tree_frame = ttk.Frame(self.notebook)
+        tree_frame.columnconfigure(0, weight=1)
+        tree_frame.rowconfigure(0, weight=1)
+        
+        self.project_tree = ttk.Treeview(tree_frame, columns=("size", "modified"), selectmode='extended')
+        self.project_tree.heading("#0", text="Name", anchor=tk.W)
+        self.project_tree.heading("size", text="Size", anchor=tk.E)
+        self.project_tree.heading("modified", text="Modified", anchor=tk.W)
+        self.project_tree.column("#0", width=520)
+        self.project_tree.column("size", width=90, anchor=tk.E, stretch=False)
+        self.project_tree.column("modified", width=140, stretch=False)
+        self.project_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        tree_scroll = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.project_tree.yview)
+        tree_scroll.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.project_tree.configure(yscrollcommand=tree_scroll.set)
         
-        # Bind double-click to compile
-        self.file_listbox.bind('<Double-Button-1>', lambda e: self.compile_file())
+        # Folders are filled in when opened; double-click compiles a file
+        self.project_tree.bind('<<TreeviewOpen>>', self._expand_project_node)
+        self.project_tree.bind('<Double-Button-1>', self._compile_tree_file)
+        
+        self.files_tab = list_frame
+        self.project_tab = tree_frame
+        self.notebook.add(list_frame, text="📄 Files")
+        self.notebook.add(tree_frame, text="🌳 Project")
+        self.notebook.bind('<<NotebookTabChanged>>', self._project_tab_shown)
         
         # Control buttons
         button_frame = ttk.Frame(main_frame)
@@ -154,6 +566,40 @@ class PawnCompilerApp:
         self.change_path_button = ttk.Button(button_frame, text="📂 Change Path", command=self.change_path)
         self.change_path_button.grid(row=0, column=6, padx=5)
         
+        # Batch compilation buttons
+        self.compile_selected_button = ttk.Button(button_frame, text="📦 Compile Selected", command=self.compile_selected)
+        self.compile_selected_button.grid(row=1, column=0, padx=5, pady=(5, 0))
+        
+        self.compile_all_button = ttk.Button(button_frame, text="🏗️ Compile All", command=self.compile_all)
+        self.compile_all_button.grid(row=1, column=1, padx=5, pady=(5, 0))
+        
+        self.cancel_button = ttk.Button(button_frame, text="⛔ Cancel", command=self.cancel_compilation, state='disabled')
+        self.cancel_button.grid(row=1, column=2, padx=5, pady=(5, 0))
+        
+        self.incremental_var = tk.BooleanVar(value=True)
+        self.incremental_check = ttk.Checkbutton(button_frame, text="⚡ Skip up-to-date", variable=self.incremental_var)
+        self.incremental_check.grid(row=1, column=5, columnspan=2, padx=5, pady=(5, 0), sticky=tk.W)
+        
+        self.dependents_button = ttk.Button(button_frame, text="🔗 Affected by .inc", command=self.select_dependents)
+        self.dependents_button.grid(row=1, column=3, columnspan=2, padx=5, pady=(5, 0), sticky=(tk.W, tk.E))
+        
+        self.auto_compile_var = tk.BooleanVar(value=False)
+        self.auto_compile_check = ttk.Checkbutton(button_frame, text="👁 Auto-compile changes", variable=self.auto_compile_var)
+        self.auto_compile_check.grid(row=2, column=5, columnspan=2, padx=5, pady=(5, 0), sticky=tk.W)
+        
+        # Project root buttons
+        self.add_root_button = ttk.Button(button_frame, text="➕ Add Root", command=self.add_root)
+        self.add_root_button.grid(row=2, column=0, padx=5, pady=(5, 0))
+        
+        self.remove_root_button = ttk.Button(button_frame, text="➖ Remove Root", command=self.remove_root)
+        self.remove_root_button.grid(row=2, column=1, padx=5, pady=(5, 0))
+        
+        self.lint_button = ttk.Button(button_frame, text="🧹 Lint All", command=self.lint_files)
+        self.lint_button.grid(row=2, column=2, padx=5, pady=(5, 0))
+        
+        self.workers_button = ttk.Button(button_frame, text="🌐 Workers", command=self.configure_workers)
+        self.workers_button.grid(row=2, column=3, padx=5, pady=(5, 0))
+        
         # Console section
         console_label = ttk.Label(main_frame, text="📟 Compilation Output:", style='TLabel')
         console_label.grid(row=4, column=0, sticky=tk.W, pady=(10, 5))
@@ -187,22 +633,63 @@ class PawnCompilerApp:
         self.clear_console_button = ttk.Button(console_button_frame, text="🗑️ Clear Console", command=self.clear_console)
         self.clear_console_button.grid(row=0, column=0, padx=5)
         
+        self.diagnostics_button = ttk.Button(console_button_frame, text="🩺 Diagnostics", command=self.open_diagnostics)
+        self.diagnostics_button.grid(row=0, column=1, padx=5)
+        
+        self.builds_button = ttk.Button(console_button_frame, text="⏪ Builds", command=self.open_builds)
+        self.builds_button.grid(row=0, column=2, padx=5)
+        
+        self.jobs_button = ttk.Button(console_button_frame, text="📋 Jobs", command=self.open_jobs)
+        self.jobs_button.grid(row=0, column=3, padx=5)
+        
+        self.history_button = ttk.Button(console_button_frame, text="📜 History", command=self.open_history)
+        self.history_button.grid(row=0, column=4, padx=5)
+        
+        self.queue_label = ttk.Label(console_button_frame, text="⏸ Idle")
+        self.queue_label.grid(row=0, column=5, padx=10)
+        
         # Initial console message
         self.log_info("PyTkWin Pawn Compiler v2.0 - Ready")
         self.log_info(f"Working directory: {self.directory}\n")
+        
+        # Start draining the log queue into the console and polling the build queue
+        self.root.after(self.LOG_FLUSH_MS, self._flush_log_queue)
+        self.root.after(self.QUEUE_POLL_MS, self._poll_build_queue)
 
     def log_message(self, message, tag=None):
-        """Log a message to the console."""
-        self.console.config(state=tk.NORMAL)
+        """Queue a message for the console; safe to call from any thread."""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        if tag:
-            self.console.insert(tk.END, f"[{timestamp}] ", "info")
-            self.console.insert(tk.END, f"{message}\n", tag)
-        else:
-            self.console.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.console.see(tk.END)
-        self.console.config(state=tk.DISABLED)
-        self.root.update_idletasks()
+        self.log_queue.put((timestamp, message, tag))
+
+    def _flush_log_queue(self):
+        """Write queued log messages to the console in a single batch."""
+        try:
+            chunks = []
+            for _ in range(self.LOG_BATCH_SIZE):
+                try:
+                    timestamp, message, tag = self.log_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if tag:
+                    chunks += [f"[{timestamp}] ", "info", f"{message}\n", tag]
+                else:
+                    chunks += [f"[{timestamp}] {message}\n", ()]
+            
+            if chunks:
+                self.console.config(state=tk.NORMAL)
+                self.console.insert(tk.END, *chunks)
+                
+                # Keep only the newest lines so memory and redraw cost stay bounded
+                line_count = int(self.console.index('end-1c').split('.')[0]) - 1
+                if line_count > self.max_console_lines:
+                    self.console.delete('1.0', f"{line_count - self.max_console_lines + 1}.0")
+                
+                self.console.see(tk.END)
+                self.console.config(state=tk.DISABLED)
+        finally:
+            # Come back immediately while a backlog remains
+            delay = 1 if not self.log_queue.empty() else self.LOG_FLUSH_MS
+            self.root.after(delay, self._flush_log_queue)
 
     def log_info(self, message):
         """Log an info message."""
@@ -251,208 +738,1166 @@ class PawnCompilerApp:
                 os.makedirs(self.compiled_directory)
             
             self.save_directory()
+            self.file_meta = {}
+            self.open_engine()
             self.path_label.config(text=f"📂 Directory: {self.directory}")
-            self.update_files()
+            self.show_cached_listing()
+            self.update_files(watch=True)
+            if self.project_scanned:
+                self.scan_project()
             self.log_info(f"Changed directory to: {self.directory}")
 
+    def open_engine(self):
+        """Load the build engine of the current directory on a background thread.
+        
+        Loading reads the include index, build cache, artifact manifest, lint
+        cache and build log, which grow with the history of the project, so
+        the UI thread never waits for it. The engine it replaces is stopped
+        now and saved by the loading thread. Actions that need the engine
+        wait in engine_waiters until _engine_loaded installs it.
+        """
+        previous = self.engine
+        if self.scheduler:
+            self.scheduler.stop()
+        self.engine = None
+        self.scheduler = None
+        self.engine_waiters = []
+        self.engine_token += 1
+        remote = RemoteBuildPool(self.worker_addresses) if self.worker_addresses else None
+        thread = threading.Thread(target=self._engine_thread,
+                                  args=(self.engine_token, previous, self.directory, self.compiled_directory, remote))
+        thread.daemon = True
+        thread.start()
+
+    def _engine_thread(self, token, previous, directory, compiled_directory, remote):
+        """Thread function to save the previous engine and load the engine of a directory."""
+        if previous:
+            try:
+                previous.save()
+            except Exception as e:
+                self.log_warning(f"Failed to save build cache: {e}")
+            if previous.remote:
+                previous.remote.close()
+        
+        start_time = time.perf_counter()
+        try:
+            engine = BuildEngine(directory, compiled_directory=compiled_directory,
+                                 sources_per_invocation=self.SOURCES_PER_INVOCATION, remote=remote)
+            build_status = engine.build_log.latest()
+        except Exception as e:
+            self.log_error(f"Failed to load the build engine: {e}")
+            return
+        self.root.after(0, self._engine_loaded, token, engine, build_status, time.perf_counter() - start_time)
+
+    def _engine_loaded(self, token, engine, build_status, elapsed):
+        """Install a loaded engine, start its build queue and run the actions that waited for it."""
+        if token != self.engine_token:
+            if engine.remote:
+                engine.remote.close()
+            return
+        self.engine = engine
+        self.build_status = build_status
+        self.build_status_changed = True
+        self.scheduler = BuildScheduler(
+            engine, workers=max(self.max_workers, self.REMOTE_JOBS) if engine.remote else self.max_workers,
+            log=self.log_message, on_result=self._build_finished, group_size=self.SOURCES_PER_INVOCATION
+        )
+        self.scheduler.start()
+        self.log_info(f"Build engine loaded in {elapsed * 1000:.0f} ms, "
+                      f"ready {(time.perf_counter() - self.launch_time) * 1000:.0f} ms after launch")
+        
+        waiters, self.engine_waiters = self.engine_waiters, []
+        for action in waiters:
+            action()
+
+    def _engine_pending(self, action):
+        """Queue action until the build engine has loaded and return True, or return False if it is loaded."""
+        if self.engine is not None:
+            return False
+        self.engine_waiters.append(action)
+        return True
+
+    def load_workers(self):
+        """Load the build worker addresses from the workers file."""
+        if os.path.exists(self.workers_file):
+            try:
+                with open(self.workers_file, 'r') as file:
+                    addresses = [line.strip() for line in file if line.strip()]
+                for address in addresses:
+                    parse_address(address)
+                return addresses
+            except Exception as e:
+                self.log_error(f"Failed to load build workers: {e}")
+        return []
+
+    def save_workers(self):
+        """Save the build worker addresses to the workers file."""
+        try:
+            with open(self.workers_file, 'w') as file:
+                file.write("\n".join(self.worker_addresses))
+        except Exception as e:
+            self.log_error(f"Failed to save build workers: {e}")
+
+    def configure_workers(self):
+        """Ask for the build worker addresses and reopen the engine to compile on them."""
+        answer = simpledialog.askstring(
+            "Build Workers",
+            "Build worker addresses (host:port or unix:PATH), separated by commas.\n"
+            "Start one with: python -m pawncompiler worker --compiler PATH\n\n"
+            "Leave empty to compile on this machine.",
+            initialvalue=", ".join(self.worker_addresses), parent=self.root
+        )
+        if answer is None:
+            return
+        addresses = [address.strip() for address in answer.split(",") if address.strip()]
+        try:
+            for address in addresses:
+                parse_address(address)
+        except ValueError as e:
+            messagebox.showerror("Build Workers", str(e))
+            return
+        
+        queued, running = self.scheduler.depth() if self.scheduler else (0, 0)
+        if (queued or running) and not messagebox.askyesno(
+                "Build Workers", "Changing the build workers cancels the queued and running compiles.\n\nContinue?"):
+            return
+        self.worker_addresses = addresses
+        self.save_workers()
+        self.open_engine()
+        if addresses:
+            self.log_info(f"Compiling on {len(addresses)} build worker(s): {', '.join(addresses)}")
+        else:
+            self.log_info("Compiling on this machine")
+
+    def _build_finished(self, result):
+        """Record a finished compile for the file list; runs on a worker thread."""
+        self.build_status[result.plugin] = (time.time(), result.state, result.elapsed)
+        self.build_status_changed = True
+        self.diagnostics_changed = True
+
     def save_directory(self):
-        """Save the current directory to a config file."""
+        """Save the current directory and the extra project roots to a config file.
+        
+        The first line holds the scripting directory, every further line an
+        extra root shown in the project tree.
+        """
         try:
             with open(self.config_file, 'w') as file:
-                file.write(self.directory)
+                file.write("\n".join([self.directory, *self.extra_roots]))
         except Exception as e:
             self.log_error(f"Failed to save directory config: {e}")
 
     def load_directory(self):
-        """Load the directory path from the config file."""
+        """Load the directory path and the extra project roots from the config file."""
         if os.path.exists(self.config_file):
             try:
                 with open(self.config_file, 'r') as file:
-                    return file.read().strip()
+                    lines = [line.strip() for line in file if line.strip()]
+                self.extra_roots = [root for root in lines[1:] if os.path.isdir(root)]
+                return lines[0] if lines else None
             except Exception as e:
                 self.log_error(f"Failed to load directory config: {e}")
         return None
 
-    def update_files(self):
-        """Update the list of SourcePawn files in the selected directory."""
+    def project_roots(self):
+        """Return the scripting directory followed by the extra project roots."""
+        roots = [self.directory]
+        for root in self.extra_roots:
+            if os.path.normcase(os.path.abspath(root)) != os.path.normcase(os.path.abspath(self.directory)):
+                roots.append(root)
+        return roots
+
+    def add_root(self):
+        """Add another scripting root to the project tree."""
+        root = filedialog.askdirectory(title="Add SourcePawn Scripting Root")
+        if not root:
+            return
+        if root in self.project_roots():
+            self.log_warning(f"Root already in the project: {root}")
+            return
+        self.extra_roots.append(root)
+        self.save_directory()
+        self.log_info(f"Added project root: {root}")
+        self.scan_project()
+        self.notebook.select(self.project_tab)
+
+    def remove_root(self):
+        """Remove the extra root of the selected project tree item."""
+        selection = self.project_tree.selection()
+        roots = set()
+        for iid in selection:
+            while self.project_tree.parent(iid):
+                iid = self.project_tree.parent(iid)
+            roots.add(iid)
+        roots = [root for root in self.extra_roots if root in roots]
+        if not roots:
+            self.log_warning("Please select an item of an added root in the project tree")
+            messagebox.showwarning("Warning", "Please select an item of an added root in the project tree.\n\n"
+                                              "The scripting directory itself can only be changed with Change Path.")
+            return
+        for root in roots:
+            self.extra_roots.remove(root)
+            self.log_info(f"Removed project root: {root}")
+        self.save_directory()
+        self.scan_project()
+
+    def scan_project(self):
+        """Rescan every project root in the background, streaming results into the tree."""
+        self.project_scanned = True
+        self.project_scan_token += 1
+        token = self.project_scan_token
+        roots = self.project_roots()
+        
+        self.project_tree.delete(*self.project_tree.get_children())
+        self.project_children = {}
+        self.project_files = {}
+        self.project_loaded = set()
+        for root in roots:
+            self.project_children[root] = {}
+            self.project_loaded.add(root)
+            self.project_tree.insert('', 'end', iid=root, text=f"🗂️ {root}", values=("", ""), open=True)
+        
+        thread = threading.Thread(target=self._project_scan_thread, args=(token, roots))
+        thread.daemon = True
+        thread.start()
+        self.root.after(self.PROJECT_FLUSH_MS, self._flush_project_queue, token, time.monotonic())
+
+    def _project_scan_thread(self, token, roots):
+        """Thread function to walk the project roots and queue the files in batches."""
+        batch = []
+        last_flush = time.monotonic()
+        try:
+            for item in iter_sources(roots):
+                # A newer scan replaced this one
+                if token != self.project_scan_token:
+                    return
+                batch.append(item)
+                now = time.monotonic()
+                if len(batch) >= self.PROJECT_BATCH_SIZE or now - last_flush >= self.PROJECT_FLUSH_MS / 1000:
+                    self.project_queue.put((token, batch))
+                    batch = []
+                    last_flush = now
+        except Exception as e:
+            self.log_warning(f"Failed to scan project roots: {e}")
+        finally:
+            if batch:
+                self.project_queue.put((token, batch))
+            self.project_queue.put((token, None))
+
+    def _flush_project_queue(self, token, start_time):
+        """Add the queued scan results to the project tree and reschedule until the scan ends."""
+        while True:
+            try:
+                batch_token, batch = self.project_queue.get_nowait()
+            except queue.Empty:
+                break
+            if batch_token != self.project_scan_token:
+                continue
+            if batch is None:
+                self._sort_project_tree()
+                self.log_info(f"Project scan finished: {len(self.project_files)} .sp file(s) in "
+                              f"{len(self.project_roots())} root(s) ({time.monotonic() - start_time:.1f}s)")
+                return
+            for root, relative_path, entry in batch:
+                self._add_project_file(root, relative_path, entry)
+        
+        if token == self.project_scan_token:
+            self.root.after(self.PROJECT_FLUSH_MS, self._flush_project_queue, token, start_time)
+
+    def _add_project_file(self, root, relative_path, entry):
+        """Record a scanned file and its folders, showing them if their parent is open."""
+        parent = root
+        for part in relative_path.split(os.sep)[:-1]:
+            folder = os.path.join(parent, part)
+            if folder not in self.project_children:
+                self.project_children[folder] = {}
+                self.project_children[parent][folder] = None
+                self._show_project_node(parent, folder, None)
+            parent = folder
+        
+        file_path = os.path.join(root, relative_path)
+        self.project_children[parent][file_path] = entry
+        self.project_files[file_path] = (root, relative_path)
+        self._show_project_node(parent, file_path, entry)
+
+    def _show_project_node(self, parent, iid, entry):
+        """Insert a folder (entry None) or file node, or mark its unopened parent as expandable."""
+        tree = self.project_tree
+        if parent not in self.project_loaded:
+            if tree.exists(parent) and not tree.get_children(parent):
+                tree.insert(parent, 'end', iid=parent + self.PROJECT_PLACEHOLDER, text="…")
+            return
+        if tree.exists(iid):
+            return
+        
+        name = os.path.basename(iid)
+        if entry is None:
+            tree.insert(parent, 'end', iid=iid, text=f"📁 {name}", values=("", ""))
+            tree.insert(iid, 'end', iid=iid + self.PROJECT_PLACEHOLDER, text="…")
+        else:
+            modified = datetime.fromtimestamp(entry.mtime / 1e9).strftime("%Y-%m-%d %H:%M")
+            tree.insert(parent, 'end', iid=iid, text=name, values=(f"{entry.size / 1024:.1f} KB", modified))
+
+    def _project_order(self, iid):
+        """Sort key of project tree nodes: folders first, then by name."""
+        return (iid in self.project_files, os.path.basename(iid).lower())
+
+    def _expand_project_node(self, event=None):
+        """Fill in the children of a folder the first time it is opened."""
+        iid = self.project_tree.focus()
+        if iid in self.project_loaded or iid not in self.project_children:
+            return
+        self.project_loaded.add(iid)
+        self.project_tree.delete(*self.project_tree.get_children(iid))
+        for child in sorted(self.project_children[iid], key=self._project_order):
+            self._show_project_node(iid, child, self.project_children[iid][child])
+
+    def _sort_project_tree(self):
+        """Order the shown children of every open folder once the scan has finished."""
+        for folder in self.project_loaded:
+            if self.project_tree.exists(folder):
+                self.project_tree.set_children(
+                    folder, *sorted(self.project_tree.get_children(folder), key=self._project_order))
+
+    def _project_tab_shown(self, event=None):
+        """Start the first project scan when the project tab is shown."""
+        if self.notebook.select() == str(self.project_tab) and not self.project_scanned:
+            self.scan_project()
+
+    def _compile_tree_file(self, event):
+        """Compile the project tree file that was double-clicked."""
+        iid = self.project_tree.identify_row(event.y)
+        if iid in self.project_files:
+            self.compile_plugin(self._plugin_id(iid))
+            return "break"
+
+    def _plugin_id(self, file_path):
+        """Return the engine plugin name of a project file.
+        
+        Files of the scripting directory keep their relative path, files of
+        other roots are passed to the engine by absolute path.
+        """
+        root, relative_path = self.project_files[file_path]
+        return relative_path if root == self.directory else os.path.abspath(file_path)
+
+    def _project_files_under(self, iid):
+        """Return every project file at or below a tree node, in tree order."""
+        if iid in self.project_files:
+            return [iid]
+        files = []
+        for child in sorted(self.project_children.get(iid, ()), key=self._project_order):
+            files.extend(self._project_files_under(child))
+        return files
+
+    def _selected_plugins(self):
+        """Return the plugins selected in the active tab, in order and without duplicates."""
+        if self.notebook.select() == str(self.project_tab):
+            plugins = []
+            for iid in self.project_tree.selection():
+                plugins.extend(self._plugin_id(file_path) for file_path in self._project_files_under(iid))
+        else:
+            plugins = self.file_view.selection()
+        return list(dict.fromkeys(plugins))
+
+    def show_cached_listing(self):
+        """List the files saved by the previous session without touching the directory."""
+        self.file_meta = load_listing(self.compiled_directory)
+        self.files = list(self.file_meta)
+        self.search_index.set_names(self.files)
+        self.sort_files(self.sort_mode)
+
+    def _on_map(self, event=None):
+        """Report the time to first paint and start the initial scan when the window first shows."""
+        if self.first_paint is not None or (event is not None and event.widget is not self.root):
+            return
+        # Draw the pending widgets so the time covers the first full paint
+        self.root.update_idletasks()
+        self.first_paint = time.perf_counter() - self.launch_time
+        self.log_info(f"Window shown in {self.first_paint * 1000:.0f} ms "
+                      f"with {len(self.files)} file(s) from the last session")
+        self.update_files(watch=True)
+
+    def update_files(self, watch=False):
+        """Rescan the SourcePawn files of the selected directory in the background.
+        
+        The current listing stays usable meanwhile; with watch the directory
+        watcher is (re)started from the fresh listing.
+        """
+        self.scan_token += 1
+        thread = threading.Thread(target=self._scan_thread,
+                                  args=(self.scan_token, self.directory, self.compiled_directory,
+                                        dict(self.file_meta), watch))
+        thread.daemon = True
+        thread.start()
+
+    def _scan_thread(self, token, directory, compiled_directory, previous, watch):
+        """Thread function to list the directory and save the listing for the next session."""
+        start_time = time.perf_counter()
         try:
-            self.files = [file for file in os.listdir(self.directory) if file.endswith('.sp')]
-            self.sort_by_date()
-            self.log_info(f"Found {len(self.files)} .sp file(s)")
+            entries = scan_directory(directory, previous)
         except Exception as e:
             self.log_error(f"Failed to update file list: {e}")
-            self.files = []
+            self.root.after(0, self._apply_scan, token, {}, 0.0, watch)
+            return
+        elapsed = time.perf_counter() - start_time
+        self.root.after(0, self._apply_scan, token, entries, elapsed, watch)
+        if entries != previous:
+            try:
+                save_listing(compiled_directory, entries)
+            except OSError as e:
+                self.log_warning(f"Failed to save file listing: {e}")
 
-    def update_list(self, *args):
-        """Update the listbox with files matching the search term."""
-        search_term = self.search_var.get().lower()
-        self.file_listbox.delete(0, tk.END)
+    def _apply_scan(self, token, entries, elapsed, watch):
+        """Replace the file list with a finished scan unless a newer one was started."""
+        if token != self.scan_token:
+            return
+        self.file_meta = entries
+        self.files = list(self.file_meta)
+        self.search_index.set_names(self.files)
+        self.sort_files(self.sort_mode)
+        self.log_info(f"Found {len(self.files)} .sp file(s) in {elapsed * 1000:.0f} ms")
+        if watch:
+            self.start_watcher()
+        
+        self._refresh_include_index()
+        if self.search_contents_var.get():
+            self._index_contents()
+
+    def _refresh_include_index(self):
+        """Refresh the include graph of the listed files in the background."""
+        if self._engine_pending(self._refresh_include_index):
+            return
+        thread = threading.Thread(target=self._index_thread, args=(self.engine.include_index, list(self.files)))
+        thread.daemon = True
+        thread.start()
+
+    def _index_thread(self, include_index, files):
+        """Thread function to bring the include index up to date."""
+        try:
+            changed = include_index.update(files)
+            if changed:
+                include_index.save()
+                self.log_info(f"Indexed includes: {len(changed)} file(s) re-scanned")
+        except Exception as e:
+            self.log_warning(f"Failed to update include index: {e}")
+
+    def start_watcher(self):
+        """Watch the current directory and apply file changes as they happen."""
+        if self.watcher:
+            self.watcher.stop()
+        self.watcher = DirectoryWatcher(
+            self.directory,
+            lambda added, removed, modified: self.root.after(
+                0, self._apply_file_changes, added, removed, modified),
+            initial=self.file_meta
+        )
+        self.watcher.start()
+
+    def _apply_file_changes(self, added, removed, modified):
+        """Apply watcher deltas to the file list without a full rescan."""
+        changed_includes = [path for path in [*added, *removed, *modified] if path.endswith('.inc')]
+        
+        for path in removed:
+            if path in self.file_meta:
+                self._remove_file(path)
+                self.log_info(f"File removed: {path}")
+        for path, record in [*added.items(), *modified.items()]:
+            if not path.endswith('.sp') or os.path.dirname(path):
+                continue
+            is_new = path not in self.file_meta
+            if not is_new:
+                self._remove_file(path)
+            self.file_meta[path] = record
+            self._insert_file(path)
+            self.log_info(f"File {'added' if is_new else 'modified'}: {path}")
+        
+        if self.search_contents_var.get():
+            changed_files = [path for path in [*added, *modified] if path in self.file_meta]
+            if changed_files:
+                self._index_contents(changed_files)
+        
+        if changed_includes:
+            self.log_info(f"Include(s) changed: {', '.join(changed_includes)}")
+        self._rebuild_changes(added, removed, modified, changed_includes)
+
+    def _rebuild_changes(self, added, removed, modified, changed_includes):
+        """Re-index changed includes, drop the jobs of removed files and auto-compile the changed plugins."""
+        if self._engine_pending(lambda: self._rebuild_changes(added, removed, modified, changed_includes)):
+            return
+        if changed_includes:
+            self._refresh_include_index()
+        
+        if removed:
+            self.scheduler.cancel(removed)
+        if self.auto_compile_var.get():
+            files = {path for path in [*added, *modified] if path in self.file_meta}
+            files.update(path for path in self.engine.include_index.affected_by(changed_includes)
+                         if path in self.file_meta)
+            if files:
+                self.log_info(f"Auto-compiling {len(files)} changed plugin(s)")
+                self.start_batch(files, quiet=True, priority=BACKGROUND, order=self._newest_first(files))
+
+    def _newest_first(self, files):
+        """Return a queue order key that runs the most recently edited of files first."""
+        mtimes = {path: self.file_meta[path].mtime if path in self.file_meta else 0 for path in files}
+        return lambda path: -mtimes.get(path, 0)
+
+    def _sort_key(self):
+        """Return the (key, reverse) pair of the current sort mode."""
+        if self.sort_mode == "name":
+            return (lambda x: x.lower()), self.sort_reverse
+        if self.sort_mode == "size":
+            return (lambda x: self.file_meta[x].size), self.sort_reverse
+        if self.sort_mode == "status":
+            return (lambda x: self.build_status.get(x, (0, "", None))[1]), self.sort_reverse
+        if self.sort_mode == "duration":
+            return (lambda x: self.build_status.get(x, (0, "", None))[2] or 0.0), self.sort_reverse
+        return (lambda x: self.file_meta[x].mtime), self.sort_reverse
+
+    def _file_row(self, file):
+        """Return the (text, values) of a file list row."""
+        entry = self.file_meta.get(file)
+        if entry is None:
+            return file, ("", "", "", "")
+        modified = datetime.fromtimestamp(entry.mtime / 1e9).strftime("%Y-%m-%d %H:%M")
+        _, state, elapsed = self.build_status.get(file, (0, "", None))
+        return file, (f"{entry.size / 1024:.1f} KB", modified, self.BUILD_STATES.get(state, state),
+                      "" if elapsed is None else f"{elapsed:.2f}s")
+
+    def _insert_file(self, file):
+        """Insert a file into the sorted file list and the listbox."""
+        key, reverse = self._sort_key()
+        value = key(file)
+        position = len(self.files)
+        for index, other in enumerate(self.files):
+            if (key(other) < value) if reverse else (key(other) > value):
+                position = index
+                break
+        self.files.insert(position, file)
+        self.search_index.add(file)
         
-        displayed_count = 0
-        for file in self.files:
-            if search_term in file.lower():
-                self.file_listbox.insert(tk.END, file)
-                displayed_count += 1
+        # Search results are ranked, so re-run the search instead
+        if self.search_var.get().strip():
+            self._schedule_search()
+        else:
+            self.file_view.insert(position, file)
+
+    def _remove_file(self, file):
+        """Remove a file from the file list and the listbox."""
+        self.file_meta.pop(file, None)
+        if file not in self.files:
+            return
+        self.files.remove(file)
+        self.search_index.remove(file)
+        if self.search_var.get().strip():
+            self._schedule_search()
+        else:
+            self.file_view.remove(file)
+
+    def select_dependents(self):
+        """Select every plugin that uses an include and offer to recompile them."""
+        if self._engine_pending(self.select_dependents):
+            return
+        include_file = filedialog.askopenfilename(
+            title="Select Changed Include",
+            initialdir=self.engine.include_index.include_directory,
+            filetypes=[("SourcePawn includes", "*.inc"), ("All files", "*.*")]
+        )
+        if not include_file:
+            return
         
-        if displayed_count == 0 and search_term:
-            self.file_listbox.insert(tk.END, "No files found...")
+        include = os.path.relpath(os.path.normpath(include_file), self.directory)
+        affected = self.engine.include_index.affected_by([include])
+        if not affected:
+            self.log_info(f"No plugins use {include}")
+            return
+        
+        self.file_view.select(affected)
+        
+        self.log_info(f"{len(affected)} plugin(s) use {include}:")
+        for file in sorted(affected, key=str.lower):
+            self.log_message(f"  {file}")
+        
+        if messagebox.askyesno("Affected Plugins", f"{len(affected)} plugin(s) use {include}.\n\nCompile them now?"):
+            self.start_batch(sorted(affected, key=str.lower), order=self._newest_first(affected))
+
+    def update_list(self, *args):
+        """Show the files matching the search term, best match first, or every file in sort order."""
+        search_term = self.search_var.get().strip()
+        if search_term:
+            matches = self.search_index.search(search_term, self.search_contents_var.get())
+        else:
+            matches = self.files
+        self.file_view.set_rows(matches, "No files found..." if search_term else None)
+
+    def _schedule_search(self, *args):
+        """Filter the file list once typing pauses."""
+        if self.search_job:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(self.SEARCH_DEBOUNCE_MS, self._run_search)
+
+    def _run_search(self):
+        """Run the debounced search."""
+        self.search_job = None
+        self.update_list()
+
+    def _toggle_content_search(self):
+        """Index file contents when content search is switched on."""
+        if self.search_contents_var.get():
+            self._index_contents()
+        self._schedule_search()
+
+    def _index_contents(self, names=None):
+        """Index the content keywords of the given files (default: all) in the background."""
+        thread = threading.Thread(target=self._content_index_thread,
+                                  args=(self.search_index, self.directory, names))
+        thread.daemon = True
+        thread.start()
+
+    def _content_index_thread(self, search_index, directory, names):
+        """Thread function to index file contents for the search."""
+        try:
+            read = search_index.index_contents(directory, names)
+            if read and names is None:
+                self.log_info(f"Indexed contents of {read} file(s) for search")
+            if read and self.search_var.get().strip():
+                self.root.after(0, self._schedule_search)
+        except Exception as e:
+            self.log_warning(f"Failed to index file contents: {e}")
 
     def compile_file(self, event=None):
         """Compile the selected SourcePawn file."""
-        selection = self.file_listbox.curselection()
-        if not selection:
+        plugins = self._selected_plugins()
+        if not plugins:
             self.log_warning("Please select a file to compile")
             messagebox.showwarning("Warning", "Please select a file to compile.")
             return
-        
-        selected_file = self.file_listbox.get(selection[0])
-        if selected_file == "No files found...":
+        self.compile_plugin(plugins[0])
+
+    def compile_plugin(self, selected_file):
+        """Queue one SourcePawn file ahead of every batch and background rebuild."""
+        if self._engine_pending(lambda: self.compile_plugin(selected_file)):
+            self.log_info(f"Compilation of {selected_file} will start once the build engine has loaded")
+            return
+        if not self._find_compiler():
             return
         
-        # Check if already compiling
-        if self.compile_button['state'] == 'disabled':
-            self.log_warning("Compilation already in progress, please wait...")
+        queued, running = self.scheduler.depth()
+        if queued or running:
+            self.log_info(f"Queued compilation of: {selected_file} ahead of {queued} waiting job(s)")
+        else:
+            self.log_info(f"Starting compilation of: {selected_file}")
+            self.log_info("-" * 60)
+        self.scheduler.submit([selected_file], INTERACTIVE, self.incremental_var.get(),
+                              on_done=lambda batch: self.root.after(0, self._plugin_done, batch.results[0]))
+
+    def compile_selected(self):
+        """Compile every selected SourcePawn file in parallel."""
+        files = self._selected_plugins()
+        if not files:
+            self.log_warning("Please select one or more files to compile")
+            messagebox.showwarning("Warning", "Please select one or more files to compile.")
             return
-            
-        self.log_info(f"Starting compilation of: {selected_file}")
-        self.log_info("-" * 60)
+        self.start_batch(files)
+
+    def compile_all(self):
+        """Compile every SourcePawn file in the directory in parallel."""
+        if not self.files:
+            self.log_warning("No .sp files to compile")
+            return
+        self.start_batch(list(self.files))
+
+    def start_batch(self, files, quiet=False, priority=BATCH, order=None):
+        """Queue a batch compilation of the given files.
         
-        # Disable compile button during compilation
-        self.compile_button.config(state='disabled')
-        self.root.update_idletasks()
+        Quiet batches only report their summary in the console. order ranks
+        the files within the queue, lower first.
+        """
+        if self._engine_pending(lambda: self.start_batch(files, quiet, priority, order)):
+            return
+        if not self._find_compiler():
+            return
         
-        # Run compilation in a separate thread
-        thread = threading.Thread(target=self._compile_thread, args=(selected_file,))
+        if not quiet:
+            workers = f"{len(self.worker_addresses)} build worker(s)" if self.engine.remote else f"{self.max_workers} worker(s)"
+            self.log_info(f"Queued batch compilation of {len(files)} file(s) using {workers}")
+            self.log_info("=" * 60)
+        self.scheduler.submit(files, priority, self.incremental_var.get(), order,
+                              on_done=lambda batch: self.root.after(0, self._batch_done, batch, quiet))
+
+    def cancel_compilation(self):
+        """Cancel every queued and running compilation."""
+        if self.scheduler:
+            self.scheduler.cancel()
+        self.cancel_button.config(state='disabled')
+        self.log_warning("Cancelling compilation...")
+
+    def lint_files(self):
+        """Lint every SourcePawn file in the directory on a background thread."""
+        if not self.files:
+            self.log_warning("No .sp files to lint")
+            return
+        if self.lint_button['state'] == 'disabled' or self._engine_pending(self.lint_files):
+            return
+        self.lint_button.config(state='disabled')
+        self.log_info(f"Linting {len(self.files)} file(s)...")
+        thread = threading.Thread(target=self._lint_thread, args=(self.engine, list(self.files)))
         thread.daemon = True
         thread.start()
 
-    def _compile_thread(self, selected_file):
-        """Thread function to handle compilation."""
+    def _lint_thread(self, engine, files):
+        """Thread function to lint files, streaming the findings into the console."""
+        def report(result):
+            for diagnostic in result.findings:
+                self.log_message(f"{diagnostic.file}({diagnostic.line}) : {diagnostic.code}: {diagnostic.message}",
+                                 "warning")
+            if result.findings:
+                self.diagnostics_changed = True
+        
+        start_time = time.monotonic()
         try:
-            compiled_file = os.path.join(self.compiled_directory, selected_file.replace('.sp', '.smx'))
-            
-            # Check if compiled file already exists
-            if os.path.exists(compiled_file):
-                self.log_warning(f"Compiled file already exists: {os.path.basename(compiled_file)}")
-                
-                # Create backup with timestamp
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                backup_file = compiled_file.replace('.smx', f'_backup_{timestamp}.smx')
-                try:
-                    os.rename(compiled_file, backup_file)
-                    self.log_info(f"Created backup: {os.path.basename(backup_file)}")
-                except Exception as e:
-                    self.log_error(f"Failed to create backup: {e}")
-            
-            # Prepare compilation command
-            compiler_path = os.path.join(self.directory, "compiler.exe")
-            if not os.path.exists(compiler_path):
-                self.log_error(f"Compiler not found at: {compiler_path}")
-                self.root.after(0, lambda: messagebox.showerror("Error", f"Compiler not found at:\n{compiler_path}"))
-                self.root.after(0, lambda: self.compile_button.config(state=tk.NORMAL))
-                return
-            
-            file_path = os.path.join(self.directory, selected_file)
-            
-            self.log_info("Running compiler...")
-            
-            # Run the compiler and capture output with proper Windows settings
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = subprocess.SW_HIDE
-            
-            process = subprocess.Popen(
-                [compiler_path, file_path],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,  # Redirect stderr to stdout
-                stdin=subprocess.PIPE,
-                text=True,
-                cwd=self.directory,
-                startupinfo=startupinfo,
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-            
-            # Close stdin immediately so compiler doesn't wait for Enter key
-            process.stdin.close()
-            
-            # Read output line by line in real-time
-            output_lines = []
-            while True:
-                line = process.stdout.readline()
-                if not line and process.poll() is not None:
-                    break
-                if line:
-                    line = line.rstrip()
-                    output_lines.append(line)
-                    if 'error' in line.lower() and 'error' not in line.lower().split(':')[0]:
-                        self.log_error(line)
-                    elif 'warning' in line.lower():
-                        self.log_warning(line)
-                    else:
-                        self.log_message(line)
-            
-            # Get the return code
-            result_returncode = process.poll()
-            
-            # If no output was captured, log that
-            if not output_lines:
-                self.log_warning("No output received from compiler")
-            
-            # Check compilation result
-            if result_returncode == 0 and os.path.exists(compiled_file):
-                self.log_info("-" * 60)
-                self.log_success(f"✓ Successfully compiled: {selected_file}")
-                self.log_success(f"✓ Output: {compiled_file}")
-                self.log_info("-" * 60 + "\n")
-                
-                # Show success message and open compiled folder
-                self.root.after(0, lambda: messagebox.showinfo("Success", f"Compiled {selected_file} successfully!"))
-                try:
-                    os.startfile(self.compiled_directory)
-                except Exception as e:
-                    self.log_warning(f"Could not open compiled directory: {e}")
+            results = engine.linter.run(files, jobs=self.max_workers, on_result=report)
+            engine.linter.save()
+            findings = sum(len(result.findings) for result in results)
+            cached = sum(1 for result in results if result.cached)
+            summary = (f"Lint finished in {time.monotonic() - start_time:.1f}s: {findings} finding(s) in "
+                       f"{len(results)} file(s), {cached} unchanged")
+            if findings:
+                self.log_warning(summary)
             else:
-                self.log_info("-" * 60)
-                self.log_error(f"✗ Compilation failed for: {selected_file}")
-                self.log_error(f"✗ Return code: {result_returncode}")
-                if not os.path.exists(compiled_file):
-                    self.log_error(f"✗ Output file not created: {compiled_file}")
-                self.log_info("-" * 60 + "\n")
-                
-                self.root.after(0, lambda: messagebox.showerror(
-                    "Compilation Failed", 
-                    f"Failed to compile {selected_file}.\n\nCheck the console output for details.\nReturn code: {result_returncode}"
-                ))
-        
+                self.log_success(f"✓ {summary}")
         except Exception as e:
-            self.log_error(f"Exception during compilation: {str(e)}")
-            self.root.after(0, lambda: messagebox.showerror("Error", f"An error occurred:\n{str(e)}"))
+            self.log_error(f"Exception during lint: {str(e)}")
+        finally:
+            self.root.after(0, self._refresh_diagnostics_view)
+            self.root.after(0, lambda: self.lint_button.config(state='normal'))
+
+    def _find_compiler(self):
+        """Return the compiler path, or None after reporting that it is missing and no build workers are set."""
+        compiler_path = self.engine.compiler_path
+        if self.engine.remote is None and not self.engine.compiler_available():
+            self.log_error(f"Compiler not found at: {compiler_path}")
+            self.root.after(0, lambda: messagebox.showerror("Error", f"Compiler not found at:\n{compiler_path}"))
+            return None
+        return compiler_path
+
+    def _plugin_done(self, result):
+        """Report a finished interactive compilation."""
+        self._save_project_caches()
+        selected_file = result.plugin
+        if result.state in ("ok", "failed") and result.timing is not None:
+            self.log_info(format_timing(result.timing))
+        
+        if result.state == "cancelled":
+            self.log_warning(f"Compilation cancelled: {selected_file}")
+        elif result.state == "skipped":
+            messagebox.showinfo("Up to date", f"{selected_file} is already up to date.")
+        elif result.state == "ok":
+            # Show success message and open compiled folder
+            messagebox.showinfo("Success", f"Compiled {selected_file} successfully!")
+            try:
+                os.startfile(self.compiled_directory)
+            except Exception as e:
+                self.log_warning(f"Could not open compiled directory: {e}")
+        else:
+            messagebox.showerror(
+                "Compilation Failed",
+                f"Failed to compile {selected_file}.\n\nCheck the console output for details.\nReturn code: {result.returncode}"
+            )
+
+    def _batch_done(self, batch, quiet=False):
+        """Report the summary of a finished batch compilation."""
+        self._save_project_caches()
+        results = batch.results
+        summary = format_summary(results, batch.elapsed)
+        failed = sorted((result.plugin for result in results if result.state == "failed"), key=str.lower)
+        self.log_info("=" * 60)
+        if failed:
+            self.log_error(f"✗ {summary}")
+            for file in failed:
+                self.log_error(f"✗ Failed: {file}")
+        else:
+            self.log_success(f"✓ {summary}")
+        self.log_info("=" * 60 + "\n")
         
+        if quiet:
+            pass
+        elif failed:
+            messagebox.showerror("Batch Compilation", f"{summary}.\n\nCheck the console output for details.")
+        else:
+            messagebox.showinfo("Batch Compilation", f"{summary}.")
+
+    def _save_project_caches(self):
+        """Persist the include index, build cache and artifact manifest, logging any failure."""
+        if self.engine is None:
+            return
+        try:
+            self.engine.save()
+        except Exception as e:
+            self.log_warning(f"Failed to save build cache: {e}")
+
+    def _poll_build_queue(self):
+        """Show the build queue depth, refresh the jobs window, build states and diagnostics, then poll again."""
+        try:
+            queued, running = self.scheduler.depth() if self.scheduler else (0, 0)
+            if self.scheduler is None:
+                self.queue_label.config(text="⏳ Loading build engine...")
+            elif queued or running:
+                self.queue_label.config(text=f"⚙ {running} running, {queued} queued")
+            else:
+                self.queue_label.config(text="⏸ Idle")
+            self.cancel_button.config(state='normal' if queued or running else 'disabled')
+            self._refresh_jobs_view()
+            if self.build_status_changed:
+                self.build_status_changed = False
+                self.file_view.refresh()
+            if self.diagnostics_changed:
+                self.diagnostics_changed = False
+                self._refresh_diagnostics_view()
         finally:
-            # Re-enable compile button - this will ALWAYS execute
-            self.root.after(0, self._enable_compile_button)
-    
-    def _enable_compile_button(self):
-        """Re-enable the compile button."""
-        self.compile_button.config(state='normal')
-        self.root.update_idletasks()
+            self.root.after(self.QUEUE_POLL_MS, self._poll_build_queue)
+
+    def open_jobs(self):
+        """Show the queued and running compile jobs, creating the window on first use."""
+        if self.jobs_window and self.jobs_window.winfo_exists():
+            self.jobs_window.deiconify()
+            self.jobs_window.lift()
+            self._refresh_jobs_view()
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("Build Queue")
+        window.geometry("560x300")
+        window.configure(bg="#1e1e1e")
+        window.columnconfigure(0, weight=1)
+        window.rowconfigure(0, weight=1)
+        self.jobs_window = window
+        
+        table_frame = ttk.Frame(window, padding=(10, 10, 10, 5))
+        table_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        table_frame.columnconfigure(0, weight=1)
+        table_frame.rowconfigure(0, weight=1)
+        
+        columns = ("plugin", "priority", "state", "time")
+        tree = ttk.Treeview(table_frame, columns=columns, show="headings", selectmode="extended")
+        for column, width in zip(columns, (220, 100, 90, 80)):
+            tree.heading(column, text=column.capitalize())
+            tree.column(column, width=width, stretch=(column == "plugin"), anchor=tk.E if column == "time" else tk.W)
+        tree.tag_configure("running", foreground="#4ec9b0")
+        tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        tree_scroll = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree_scroll.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        tree.configure(yscrollcommand=tree_scroll.set)
+        self.jobs_tree = tree
+        
+        def cancel_selected():
+            plugins = list(tree.selection())
+            if plugins and self.scheduler:
+                self.scheduler.cancel(plugins)
+                self.log_warning(f"Cancelling {len(plugins)} job(s)...")
+        
+        button_frame = ttk.Frame(window, padding=(10, 0, 10, 10))
+        button_frame.grid(row=1, column=0, sticky=tk.E)
+        ttk.Button(button_frame, text="⛔ Cancel Selected", command=cancel_selected).grid(row=0, column=0, padx=5)
+        ttk.Button(button_frame, text="Close", command=window.destroy).grid(row=0, column=1, padx=5)
+        
+        self._refresh_jobs_view()
+
+    def _refresh_jobs_view(self):
+        """Update the jobs window from a snapshot of the build queue, keeping the selection."""
+        if not (self.jobs_window and self.jobs_window.winfo_exists()):
+            return
+        
+        tree = self.jobs_tree
+        jobs = self.scheduler.snapshot() if self.scheduler else []
+        now = time.time()
+        current = set(tree.get_children())
+        wanted = set()
+        for index, job in enumerate(jobs):
+            # Running jobs show how long they have run, queued jobs how long they have waited
+            seconds = now - (job.started or job.submitted)
+            values = (job.plugin, job.priority, job.state, f"{seconds:.1f}s")
+            wanted.add(job.plugin)
+            if job.plugin in current:
+                tree.item(job.plugin, values=values, tags=(job.state,))
+                tree.move(job.plugin, "", index)
+            else:
+                tree.insert("", index, iid=job.plugin, values=values, tags=(job.state,))
+        stale = current - wanted
+        if stale:
+            tree.delete(*stale)
+
+    def open_diagnostics(self):
+        """Show the diagnostics panel, creating it on first use."""
+        if self.diagnostics_window and self.diagnostics_window.winfo_exists():
+            self.diagnostics_window.deiconify()
+            self.diagnostics_window.lift()
+            self._refresh_diagnostics_view()
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("Diagnostics")
+        window.geometry("900x400")
+        window.configure(bg="#1e1e1e")
+        window.columnconfigure(0, weight=1)
+        window.rowconfigure(1, weight=1)
+        self.diagnostics_window = window
+        
+        # Filter bar
+        filter_frame = ttk.Frame(window, padding=(10, 10, 10, 5))
+        filter_frame.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        filter_frame.columnconfigure(3, weight=1)
+        
+        ttk.Label(filter_frame, text="Severity:").grid(row=0, column=0, padx=(0, 5))
+        self.diagnostics_severity_var = tk.StringVar(value="All")
+        severity_box = ttk.Combobox(filter_frame, textvariable=self.diagnostics_severity_var,
+                                    values=["All", "Errors", "Warnings"], state="readonly", width=10)
+        severity_box.grid(row=0, column=1, padx=(0, 10))
+        severity_box.bind("<<ComboboxSelected>>", lambda e: self._refresh_diagnostics_view())
+        
+        ttk.Label(filter_frame, text="🔍 Filter:").grid(row=0, column=2, padx=(0, 5))
+        self.diagnostics_filter_var = tk.StringVar()
+        self.diagnostics_filter_var.trace_add("write", lambda *args: self._refresh_diagnostics_view())
+        ttk.Entry(filter_frame, textvariable=self.diagnostics_filter_var).grid(row=0, column=3, sticky=(tk.W, tk.E))
+        
+        self.diagnostics_count_label = ttk.Label(filter_frame, text="")
+        self.diagnostics_count_label.grid(row=0, column=4, padx=(10, 0))
+        
+        # Diagnostics table
+        table_frame = ttk.Frame(window, padding=(10, 0, 10, 10))
+        table_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        table_frame.columnconfigure(0, weight=1)
+        table_frame.rowconfigure(0, weight=1)
+        
+        columns = ("plugin", "file", "line", "severity", "code", "message")
+        tree = ttk.Treeview(table_frame, columns=columns, show="headings", selectmode="browse")
+        for column, width in zip(columns, (140, 160, 50, 70, 90, 380)):
+            tree.heading(column, text=column.capitalize(), command=lambda c=column: self._sort_diagnostics(c))
+            tree.column(column, width=width, stretch=(column == "message"),
+                        anchor=tk.E if column == "line" else tk.W)
+        tree.tag_configure("error", foreground="#f48771")
+        tree.tag_configure("warning", foreground="#dcdcaa")
+        tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        tree.bind("<Double-1>", self._open_diagnostic)
+        
+        tree_scroll = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree_scroll.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        tree.configure(yscrollcommand=tree_scroll.set)
+        self.diagnostics_tree = tree
+        
+        self._refresh_diagnostics_view()
+
+    def _refresh_diagnostics_view(self):
+        """Repopulate the diagnostics table from the store and the filters."""
+        if not (self.diagnostics_window and self.diagnostics_window.winfo_exists()) or self.engine is None:
+            return
+        
+        severity = {"Errors": "error", "Warnings": "warning"}.get(self.diagnostics_severity_var.get())
+        rows = self.engine.diagnostics.query(severity, self.diagnostics_filter_var.get())
+        rows += self.engine.linter.findings.query(severity, self.diagnostics_filter_var.get())
+        column, reverse = self.diagnostics_sort
+        rows.sort(key=lambda d: getattr(d, column) if column == "line" else str(getattr(d, column)).lower(),
+                  reverse=reverse)
+        
+        tree = self.diagnostics_tree
+        tree.delete(*tree.get_children())
+        self.diagnostics_rows = {}
+        for diagnostic in rows:
+            item = tree.insert("", tk.END, values=(
+                diagnostic.plugin, os.path.basename(diagnostic.file), diagnostic.line,
+                diagnostic.severity, diagnostic.code, diagnostic.message
+            ), tags=(diagnostic.severity,))
+            self.diagnostics_rows[item] = diagnostic
+        
+        errors = sum(1 for diagnostic in rows if diagnostic.severity == "error")
+        self.diagnostics_count_label.config(text=f"{errors} error(s), {len(rows) - errors} warning(s)")
+
+    def _sort_diagnostics(self, column):
+        """Sort the diagnostics table by a column, toggling the direction."""
+        current, reverse = self.diagnostics_sort
+        self.diagnostics_sort = (column, not reverse if column == current else False)
+        self._refresh_diagnostics_view()
+
+    def _open_diagnostic(self, event=None):
+        """Open the file and line of the selected diagnostic in VS Code."""
+        selection = self.diagnostics_tree.selection()
+        if not selection:
+            return
+        diagnostic = self.diagnostics_rows[selection[0]]
+        self._open_in_vscode(os.path.join(self.directory, diagnostic.file), diagnostic.line)
+
+    def open_builds(self):
+        """Show the stored builds of the selected plugin and offer to restore one."""
+        if self._engine_pending(self.open_builds):
+            return
+        plugins = self._selected_plugins()
+        if not plugins:
+            self.log_warning("Please select a file to show its builds")
+            messagebox.showwarning("Warning", "Please select a file to show its stored builds.")
+            return
+        plugin = plugins[0]
+        
+        window = tk.Toplevel(self.root)
+        window.title(f"Builds of {plugin}")
+        window.geometry("560x300")
+        window.configure(bg="#1e1e1e")
+        window.columnconfigure(0, weight=1)
+        window.rowconfigure(0, weight=1)
+        
+        table_frame = ttk.Frame(window, padding=(10, 10, 10, 5))
+        table_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        table_frame.columnconfigure(0, weight=1)
+        table_frame.rowconfigure(0, weight=1)
+        
+        columns = ("stored", "size", "hash")
+        tree = ttk.Treeview(table_frame, columns=columns, show="headings", selectmode="browse")
+        for column, width in zip(columns, (160, 100, 260)):
+            tree.heading(column, text=column.capitalize())
+            tree.column(column, width=width, stretch=(column == "hash"), anchor=tk.E if column == "size" else tk.W)
+        tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        tree_scroll = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree_scroll.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        tree.configure(yscrollcommand=tree_scroll.set)
+        
+        engine = self.engine
+        artifacts = {}
+        for artifact in engine.artifacts.history(plugin):
+            stored = datetime.fromtimestamp(artifact.stored).strftime("%Y-%m-%d %H:%M:%S")
+            item = tree.insert("", tk.END, values=(stored, f"{artifact.size / 1024:.1f} KB", artifact.hash))
+            artifacts[item] = artifact
+        
+        def restore():
+            selection = tree.selection()
+            if not selection:
+                return
+            artifact = artifacts[selection[0]]
+            try:
+                compiled_file = engine.rollback(plugin, artifact)
+                engine.save()
+                self.log_success(f"Restored build {artifact.hash[:10]} of {plugin} to {compiled_file}")
+                window.destroy()
+            except OSError as e:
+                self.log_error(f"Failed to restore build: {e}")
+                messagebox.showerror("Error", f"Failed to restore build:\n{e}", parent=window)
+        
+        button_frame = ttk.Frame(window, padding=(10, 0, 10, 10))
+        button_frame.grid(row=1, column=0, sticky=tk.E)
+        ttk.Button(button_frame, text="⏪ Restore", command=restore).grid(row=0, column=0, padx=5)
+        ttk.Button(button_frame, text="Close", command=window.destroy).grid(row=0, column=1, padx=5)
+        tree.bind("<Double-1>", lambda e: restore())
+
+    def open_history(self):
+        """Show the logged builds, filtered by plugin and state, with the output of the selected one."""
+        if self._engine_pending(self.open_history):
+            return
+        plugins = self._selected_plugins()
+        
+        window = tk.Toplevel(self.root)
+        window.title("Build History")
+        window.geometry("900x550")
+        window.configure(bg="#1e1e1e")
+        window.columnconfigure(0, weight=1)
+        window.rowconfigure(1, weight=1)
+        window.rowconfigure(2, weight=1)
+        
+        # Filter bar
+        filter_frame = ttk.Frame(window, padding=(10, 10, 10, 5))
+        filter_frame.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        filter_frame.columnconfigure(1, weight=1)
+        
+        ttk.Label(filter_frame, text="Plugin:").grid(row=0, column=0, padx=(0, 5))
+        plugin_var = tk.StringVar(value=plugins[0] if plugins else "")
+        engine = self.engine
+        ttk.Combobox(filter_frame, textvariable=plugin_var, values=[""] + engine.build_log.plugins()).grid(
+            row=0, column=1, sticky=(tk.W, tk.E))
+        
+        ttk.Label(filter_frame, text="State:").grid(row=0, column=2, padx=(10, 5))
+        state_var = tk.StringVar(value="All")
+        ttk.Combobox(filter_frame, textvariable=state_var, values=["All", "failed", "ok", "skipped", "cancelled"],
+                     state="readonly", width=10).grid(row=0, column=3)
+        
+        # Build table
+        table_frame = ttk.Frame(window, padding=(10, 0, 10, 5))
+        table_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        table_frame.columnconfigure(0, weight=1)
+        table_frame.rowconfigure(0, weight=1)
+        
+        columns = ("time", "plugin", "state", "elapsed", "errors", "warnings")
+        tree = ttk.Treeview(table_frame, columns=columns, show="headings", selectmode="browse")
+        for column, width in zip(columns, (150, 220, 80, 80, 60, 70)):
+            tree.heading(column, text=column.capitalize())
+            tree.column(column, width=width, stretch=(column == "plugin"),
+                        anchor=tk.W if column in ("time", "plugin", "state") else tk.E)
+        tree.tag_configure("failed", foreground="#f48771")
+        tree.tag_configure("ok", foreground="#4ec9b0")
+        tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        tree_scroll = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree_scroll.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        tree.configure(yscrollcommand=tree_scroll.set)
+        
+        # Output of the selected build
+        output = scrolledtext.ScrolledText(window, font=("Consolas", 9), bg="#1e1e1e", fg="#cccccc",
+                                           wrap=tk.WORD, height=10)
+        output.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=10, pady=(0, 10))
+        for tag, color in (("error", "#f48771"), ("warning", "#dcdcaa"), ("success", "#4ec9b0")):
+            output.tag_config(tag, foreground=color)
+        
+        records = {}
+        
+        def refresh(*args):
+            state = state_var.get()
+            found = engine.build_log.query(plugin_var.get().strip() or None,
+                                           None if state == "All" else state, limit=self.HISTORY_LIMIT)
+            tree.delete(*tree.get_children())
+            records.clear()
+            for record in found:
+                started = datetime.fromtimestamp(record.time).strftime("%Y-%m-%d %H:%M:%S")
+                item = tree.insert("", tk.END, values=(started, record.plugin, record.state, f"{record.elapsed:.2f}s",
+                                                       record.errors, record.warnings), tags=(record.state,))
+                records[item] = record
+            show()
+        
+        def show(*args):
+            output.delete(1.0, tk.END)
+            selection = tree.selection()
+            if not selection:
+                return
+            for line in records[selection[0]].output:
+                tag = classify_output_line(line, parse_diagnostic(line))
+                if tag is None and line.startswith("✓"):
+                    tag = "success"
+                elif tag is None and line.startswith("✗"):
+                    tag = "error"
+                output.insert(tk.END, line.rstrip("\n") + "\n", tag)
+        
+        ttk.Button(filter_frame, text="🔍 Search", command=refresh).grid(row=0, column=4, padx=(10, 0))
+        state_var.trace_add("write", refresh)
+        tree.bind("<<TreeviewSelect>>", show)
+        refresh()
 
     def open_with_vscode(self):
         """Open the selected SourcePawn file with Visual Studio Code."""
-        selection = self.file_listbox.curselection()
-        if not selection:
+        plugins = self._selected_plugins()
+        if not plugins:
             self.log_warning("Please select a file to open")
             messagebox.showwarning("Warning", "Please select a file to open with Visual Studio Code.")
             return
         
-        selected_file = self.file_listbox.get(selection[0])
-        if selected_file == "No files found...":
-            return
-        
-        file_path = os.path.join(self.directory, selected_file)
+        selected_file = plugins[0]
+        self._open_in_vscode(os.path.join(self.directory, selected_file))
+
+    def _open_in_vscode(self, file_path, line=None):
+        """Open a file, optionally at a line, with Visual Studio Code."""
         try:
-            subprocess.run(["code", file_path], check=True)
-            self.log_info(f"Opened in VS Code: {selected_file}")
+            if line:
+                subprocess.run(["code", "-g", f"{file_path}:{line}"], check=True)
+                self.log_info(f"Opened in VS Code: {os.path.basename(file_path)}:{line}")
+            else:
+                subprocess.run(["code", file_path], check=True)
+                self.log_info(f"Opened in VS Code: {os.path.basename(file_path)}")
         except subprocess.CalledProcessError:
             self.log_error("VS Code not found or failed to open")
             messagebox.showerror("Error", "Failed to open VS Code.\n\nMake sure VS Code is installed and 'code' command is in PATH.")
@@ -460,35 +1905,48 @@ class PawnCompilerApp:
             self.log_error(f"Failed to open VS Code: {e}")
             messagebox.showerror("Error", f"An error occurred:\n{str(e)}")
 
+    def sort_files(self, mode, reverse=None):
+        """Sort the files in memory by a column, in its default direction unless reverse is given."""
+        self.sort_mode = mode
+        self.sort_reverse = self.SORT_REVERSE[mode] if reverse is None else reverse
+        key, reverse = self._sort_key()
+        self.files.sort(key=key, reverse=reverse)
+        self.file_view.set_sort_indicator(mode, reverse)
+        self.update_list()
+
+    def _sort_column(self, mode):
+        """Sort by a clicked column heading, reversing the order when it is already the sort column."""
+        self.sort_files(mode, not self.sort_reverse if mode == self.sort_mode else None)
+        order = "descending" if self.sort_reverse else "ascending"
+        self.log_info(f"Sorted by {self.file_view.headings[mode].lower()} ({order})")
+
     def sort_by_name(self):
         """Sort the files by name."""
-        self.files.sort(key=lambda x: x.lower())
-        self.update_list()
+        self.sort_files("name")
         self.log_info("Sorted by name")
 
     def sort_by_date(self):
         """Sort the files by date (most recent first)."""
-        self.files.sort(key=lambda x: os.path.getmtime(os.path.join(self.directory, x)), reverse=True)
-        self.update_list()
+        self.sort_files("date")
         self.log_info("Sorted by date (newest first)")
 
     def sort_by_size(self):
         """Sort the files by size (largest first)."""
-        self.files.sort(key=lambda x: os.path.getsize(os.path.join(self.directory, x)), reverse=True)
-        self.update_list()
+        self.sort_files("size")
         self.log_info("Sorted by size (largest first)")
 
     def refresh_files(self):
         """Refresh the list of files in the directory."""
         self.log_info("Refreshing file list...")
         self.update_files()
-        self.update_list()
+        if self.project_scanned:
+            self.scan_project()
 
 if __name__ == "__main__":
     """Hello Pawn! v2.0"""
     root = tk.Tk()
     app = PawnCompilerApp(root)
-    
+
     # Try to set icon if compiler.exe exists
     try:
         icon_path = os.path.join(app.directory, "compiler.exe")
@@ -496,5 +1954,5 @@ if __name__ == "__main__":
             root.iconbitmap(icon_path)
     except:
         pass
-    
+
     root.mainloop()
@@ -0,0 +1,62 @@
+"""
+UI-free build engine of PyTkWin Pawn Compiler.
+
+Everything in this package runs without tkinter, so the same compile
+pipeline drives both the Tk application and the headless command line:
+
+    python -m pawncompiler build path/to/scripting --jobs 8 --json
+"""
+
+from .artifacts import Artifact, ArtifactStore
+from .buildlog import BuildLog, BuildRecord
+from .cache import BuildCache
+from .diagnostics import Diagnostic, DiagnosticStore, classify_output_line, parse_diagnostic
+from .engine import BuildEngine, BuildResult, format_summary
+from .includes import IncludeIndex, parse_includes
+from .lint import LintResult, Linter, analyze_source
+from .scanner import DirectoryWatcher, FileEntry, iter_sources, load_listing, save_listing, scan_directory
+from .preprocess import Preprocessor, lex_source
+from .remote import BuildWorker, RemoteBuildPool, RemoteError
+from .scheduler import BuildBatch, BuildScheduler
+from .search import SearchIndex, fuzzy_score
+from .service import CompileService
+from .timing import CompileTiming, TimingHistory, format_timing
+
+__all__ = [
+    "Artifact",
+    "ArtifactStore",
+    "BuildBatch",
+    "BuildCache",
+    "BuildEngine",
+    "BuildLog",
+    "BuildRecord",
+    "BuildResult",
+    "BuildScheduler",
+    "BuildWorker",
+    "CompileService",
+    "CompileTiming",
+    "Diagnostic",
+    "DiagnosticStore",
+    "DirectoryWatcher",
+    "FileEntry",
+    "IncludeIndex",
+    "LintResult",
+    "Linter",
+    "Preprocessor",
+    "RemoteBuildPool",
+    "RemoteError",
+    "SearchIndex",
+    "TimingHistory",
+    "analyze_source",
+    "classify_output_line",
+    "format_summary",
+    "format_timing",
+    "fuzzy_score",
+    "iter_sources",
+    "lex_source",
+    "load_listing",
+    "parse_diagnostic",
+    "parse_includes",
+    "save_listing",
+    "scan_directory",
+]
@@ -0,0 +1,178 @@
+"""
+Content-addressed store of compiled plugins with bounded retention.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import namedtuple
+
+# One stored build of a plugin: sha1 of the .smx, its size in bytes, when it
+# was stored and the build cache digest it was compiled from (None if unknown)
+Artifact = namedtuple('Artifact', ['hash', 'size', 'stored', 'digest'])
+
+
+class ArtifactStore:
+    """Hash-named .smx blobs plus a manifest of every plugin's build history.
+
+    Identical outputs share one blob. Each plugin keeps its last keep builds;
+    with max_bytes set the oldest builds of all plugins are evicted until the
+    blobs fit the budget, but a plugin's latest build is never evicted.
+    Blobs no build refers to any more are deleted immediately.
+    """
+
+    STORE_NAME = ".artifacts"
+    MANIFEST_NAME = "manifest.json"
+
+    def __init__(self, compiled_directory, keep=10, max_bytes=None):
+        self.store_directory = os.path.join(compiled_directory, self.STORE_NAME)
+        self.manifest_file = os.path.join(self.store_directory, self.MANIFEST_NAME)
+        self.keep = max(1, keep)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.plugins = {}
+        self.references = {}
+        self.blob_sizes = {}
+        self.load()
+
+    def load(self):
+        """Load the manifest, dropping builds whose blob has disappeared.
+        
+        Nothing is evicted here: the retention settings are those of this
+        run, so history kept by a run with a larger keep or budget is only
+        trimmed once a build is stored.
+        """
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            plugins = {plugin: [Artifact(*entry) for entry in entries]
+                       for plugin, entries in data.get("plugins", {}).items()}
+        except (OSError, ValueError, TypeError):
+            plugins = {}
+        
+        self.plugins = {}
+        self.references = {}
+        self.blob_sizes = {}
+        for plugin, entries in plugins.items():
+            entries = [entry for entry in entries if os.path.exists(self.blob_path(entry.hash))]
+            if entries:
+                self.plugins[plugin] = entries
+                for entry in entries:
+                    self._reference(entry)
+
+    def save(self):
+        """Write the manifest to disk atomically."""
+        with self.lock:
+            data = {"plugins": {plugin: [list(entry) for entry in entries] for plugin, entries in self.plugins.items()}}
+            os.makedirs(self.store_directory, exist_ok=True)
+            temp_file = self.manifest_file + ".tmp"
+            with open(temp_file, 'w', encoding='utf-8') as file:
+                json.dump(data, file)
+            os.replace(temp_file, self.manifest_file)
+
+    def blob_path(self, sha1):
+        """Return the path of the blob with the given hash."""
+        return os.path.join(self.store_directory, sha1[:2], sha1 + ".smx")
+
+    def _reference(self, entry):
+        """Count one more build referring to a blob."""
+        self.references[entry.hash] = self.references.get(entry.hash, 0) + 1
+        self.blob_sizes[entry.hash] = entry.size
+
+    def _release(self, entry):
+        """Count one build less referring to a blob and delete the blob once unused."""
+        count = self.references.get(entry.hash, 0) - 1
+        if count > 0:
+            self.references[entry.hash] = count
+            return
+        self.references.pop(entry.hash, None)
+        self.blob_sizes.pop(entry.hash, None)
+        try:
+            os.remove(self.blob_path(entry.hash))
+        except OSError:
+            pass
+
+    def total_bytes(self):
+        """Return the size of every stored blob."""
+        with self.lock:
+            return sum(self.blob_sizes.values())
+
+    def store(self, plugin, compiled_file, digest=None):
+        """Store a compiled file as the latest build of a plugin and return its Artifact.
+        
+        Storing the same output as the latest build again only returns it.
+        """
+        sha1 = hashlib.sha1()
+        size = 0
+        with open(compiled_file, 'rb') as file:
+            for chunk in iter(lambda: file.read(65536), b''):
+                sha1.update(chunk)
+                size += len(chunk)
+        sha1 = sha1.hexdigest()
+        
+        with self.lock:
+            entries = self.plugins.setdefault(plugin, [])
+            if entries and entries[-1].hash == sha1:
+                if digest and entries[-1].digest != digest:
+                    entries[-1] = entries[-1]._replace(digest=digest)
+                return entries[-1]
+            
+            blob = self.blob_path(sha1)
+            if sha1 not in self.references and not os.path.exists(blob):
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                temp_file = f"{blob}.{threading.get_ident()}.tmp"
+                shutil.copyfile(compiled_file, temp_file)
+                os.replace(temp_file, blob)
+            
+            entry = Artifact(sha1, size, time.time(), digest)
+            entries.append(entry)
+            self._reference(entry)
+            self._evict(plugin)
+            return entry
+
+    def _evict(self, plugin):
+        """Drop the builds of a plugin beyond the retention count, then fit the size budget."""
+        entries = self.plugins[plugin]
+        while len(entries) > self.keep:
+            self._release(entries.pop(0))
+        self._fit_budget()
+
+    def _fit_budget(self):
+        """Drop the oldest builds of any plugin until the blobs fit the size budget."""
+        if self.max_bytes is None:
+            return
+        while sum(self.blob_sizes.values()) > self.max_bytes:
+            candidates = [(entries[0].stored, name) for name, entries in self.plugins.items() if len(entries) > 1]
+            if not candidates:
+                break
+            _, oldest = min(candidates)
+            self._release(self.plugins[oldest].pop(0))
+
+    def history(self, plugin):
+        """Return the stored builds of a plugin, newest first."""
+        with self.lock:
+            return list(reversed(self.plugins.get(plugin, ())))
+
+    def latest(self, plugin):
+        """Return the latest stored build of a plugin, or None."""
+        with self.lock:
+            entries = self.plugins.get(plugin)
+            return entries[-1] if entries else None
+
+    def find(self, plugin, prefix):
+        """Return the newest build of a plugin whose hash starts with prefix, or None if ambiguous."""
+        matches = {}
+        for entry in self.history(plugin):
+            if entry.hash.startswith(prefix):
+                matches.setdefault(entry.hash, entry)
+        return next(iter(matches.values())) if len(matches) == 1 else None
+
+    def restore(self, artifact, compiled_file):
+        """Copy a stored build over a compiled file, atomically."""
+        os.makedirs(os.path.dirname(compiled_file), exist_ok=True)
+        temp_file = compiled_file + ".restore.tmp"
+        shutil.copyfile(self.blob_path(artifact.hash), temp_file)
+        os.replace(temp_file, compiled_file)
@@ -0,0 +1,297 @@
+"""
+Reproducible benchmark of scanning, searching and compiling.
+
+A synthetic scripting directory with N plugins, a shared include set and a
+stub compiler is generated, so the numbers can be measured on any platform
+without the real SourcePawn toolchain:
+
+    python -m pawncompiler bench --files 500 --jobs 8
+"""
+
+import os
+import queue
+import shutil
+import stat
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+
+from .engine import BuildEngine
+from .includes import IncludeIndex
+from .lint import Linter
+from .preprocess import Preprocessor
+from .scanner import scan_directory
+from .search import SearchIndex
+from .timing import percentile
+
+# Stub compiler: reads each plugin and its includes like spcomp would, prints
+# a fixed number of warnings and writes compiled/<name>.smx for every source
+STUB_COMPILER = '''\
+import os
+import re
+import sys
+import time
+
+LINES = {lines}
+COMPILE_MS = {compile_ms}
+
+# Like spcomp, several sources make up one program written to the output
+# of the first
+print("SourcePawn Compiler (benchmark stub)")
+data = b""
+for source in sys.argv[1:]:
+    with open(source, 'rb') as file:
+        data += file.read()
+for name in re.findall(rb'#include <([^>]+)>', data):
+    with open(os.path.join('include', name.decode() + '.inc'), 'rb') as file:
+        data += file.read()
+if COMPILE_MS:
+    time.sleep(COMPILE_MS / 1000)
+for line in range(LINES):
+    print(f"{{sys.argv[1]}}({{line + 1}}) : warning 203: symbol is never used: \\"unused_{{line}}\\"")
+name = os.path.splitext(os.path.basename(sys.argv[1]))[0]
+os.makedirs('compiled', exist_ok=True)
+with open(os.path.join('compiled', name + '.smx'), 'wb') as file:
+    file.write(data[:4096])
+print(f"Code size: {{len(data)}} bytes")
+print("{{}} Warnings.".format(LINES))
+'''
+
+PLUGIN_TEMPLATE = '''\
+{includes}
+
+public Plugin myinfo =
+{{
+    name = "Benchmark Plugin {number}",
+    author = "pawncompiler bench",
+    description = "Synthetic plugin {number}",
+    version = "1.0"
+}};
+
+public void OnPluginStart()
+{{
+    RegConsoleCmd("sm_bench_{number}", Command_Bench);
+}}
+
+public Action Command_Bench(int client, int args)
+{{
+    int total = 0;
+    for (int i = 0; i < {number}; i++)
+    {{
+        total += i;
+    }}
+    return Plugin_Handled;
+}}
+'''
+
+
+def create_project(directory, files=200, includes=20, lines=20, compile_ms=0):
+    """Generate a synthetic scripting directory and return its stub compiler path."""
+    include_directory = os.path.join(directory, "include")
+    os.makedirs(include_directory, exist_ok=True)
+    for number in range(includes):
+        with open(os.path.join(include_directory, f"bench_{number:03d}.inc"), 'w') as file:
+            file.write(f"#if defined _bench_{number}_included\n #endinput\n#endif\n#define _bench_{number}_included\n")
+            if number:
+                file.write(f"#include <bench_{number - 1:03d}>\n")
+            for native in range(20):
+                file.write(f"native int Bench{number}_Native{native}(int value);\n")
+
+    for number in range(files):
+        used = sorted({number % includes, (number * 7) % includes, (number * 13) % includes}) if includes else []
+        directives = "\n".join(f"#include <bench_{used_include:03d}>" for used_include in used)
+        with open(os.path.join(directory, f"plugin_{number:05d}.sp"), 'w') as file:
+            file.write(PLUGIN_TEMPLATE.format(includes=directives, number=number))
+
+    stub = STUB_COMPILER.format(lines=lines, compile_ms=compile_ms)
+    if os.name == 'nt':
+        with open(os.path.join(directory, "bench_compiler.py"), 'w') as file:
+            file.write(stub)
+        compiler_path = os.path.join(directory, "bench_compiler.cmd")
+        with open(compiler_path, 'w') as file:
+            file.write(f'@"{sys.executable}" "%~dp0bench_compiler.py" %*\n')
+    else:
+        compiler_path = os.path.join(directory, "bench_compiler")
+        with open(compiler_path, 'w') as file:
+            file.write(f"#!{sys.executable}\n" + stub)
+        os.chmod(compiler_path, os.stat(compiler_path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return compiler_path
+
+
+def _timed(function, repeat=1):
+    """Run a function repeatedly and return (median seconds, last result)."""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        durations.append(time.perf_counter() - start)
+    return percentile(durations, 0.5), result
+
+
+def _run_with_ui_ticker(work, log_queue, tick, max_lines=5000, batch_size=2000):
+    """Run work on a thread while the calling thread mimics the Tk main loop.
+
+    Every tick the "UI thread" drains the log queue into a bounded buffer, as
+    PawnCompilerApp._flush_log_queue does, and measures how late it woke up.
+    Returns (stall seconds per tick, seconds spent draining).
+    """
+    thread = threading.Thread(target=work)
+    thread.start()
+    console = deque(maxlen=max_lines)
+    stalls = []
+    drain_time = 0.0
+    deadline = time.perf_counter() + tick
+    while thread.is_alive() or not log_queue.empty():
+        delay = deadline - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        now = time.perf_counter()
+        stalls.append(max(0.0, now - deadline))
+        
+        start = time.perf_counter()
+        for _ in range(batch_size):
+            try:
+                console.append(log_queue.get_nowait())
+            except queue.Empty:
+                break
+        drain_time += time.perf_counter() - start
+        deadline = time.perf_counter() + tick
+    thread.join()
+    return stalls, drain_time
+
+
+def _compile_phase(engine, plugins, jobs, incremental, tick):
+    """Build plugins under the simulated UI thread and summarize the run."""
+    log_queue = queue.SimpleQueue()
+    results = []
+
+    def work():
+        results.extend(engine.build(plugins, jobs=jobs, incremental=incremental,
+                                    log=lambda message, tag=None: log_queue.put((message, tag))))
+
+    start = time.perf_counter()
+    stalls, drain_time = _run_with_ui_ticker(work, log_queue, tick)
+    elapsed = time.perf_counter() - start
+
+    timings = [result.timing for result in results if result.timing]
+    walls = [timing.wall for timing in timings]
+    cpu_times = [timing.cpu for timing in timings if timing.cpu is not None]
+    return {
+        "files": len(results),
+        "failed": sum(1 for result in results if result.state == "failed"),
+        "elapsed": elapsed,
+        "throughput": len(results) / elapsed if elapsed else None,
+        "p50": percentile(walls, 0.5),
+        "p95": percentile(walls, 0.95),
+        "spawn_mean": sum(timing.spawn for timing in timings) / len(timings) if timings else None,
+        "cpu_total": sum(cpu_times) if cpu_times else None,
+        "output_bytes": sum(timing.output_bytes for timing in timings),
+        "log_time": sum(timing.log for timing in timings),
+        "ui_stall_total": sum(stalls),
+        "ui_stall_max": max(stalls, default=0.0),
+        "ui_stall_p95": percentile(stalls, 0.95),
+        "ui_drain_time": drain_time,
+    }
+
+
+def run_benchmark(files=200, jobs=None, includes=20, lines=20, compile_ms=0, repeat=5, tick_ms=10,
+                  directory=None, group=1):
+    """Run every benchmark phase and return the report as a dict."""
+    owns_directory = directory is None
+    directory = directory or tempfile.mkdtemp(prefix="pawnbench_")
+    try:
+        compiler_path = create_project(directory, files, includes, lines, compile_ms)
+        report = {"files": files, "includes": includes, "lines": lines, "jobs": jobs or os.cpu_count() or 1,
+                  "group": group}
+        
+        scan_time, entries = _timed(lambda: scan_directory(directory), repeat)
+        plugins = sorted(entries)
+        report["scan"] = {"files": len(entries), "seconds": scan_time}
+        
+        compiled_directory = os.path.join(directory, "compiled")
+        index = IncludeIndex(directory, compiled_directory)
+        cold_index, _ = _timed(lambda: index.update(plugins))
+        warm_index, _ = _timed(lambda: index.update(plugins), repeat)
+        report["index"] = {"cold": cold_index, "warm": warm_index}
+        
+        preprocessor = Preprocessor(index)
+        cold_check, _ = _timed(lambda: [preprocessor.check(plugin) for plugin in plugins])
+        warm_check, _ = _timed(lambda: [preprocessor.check(plugin) for plugin in plugins], repeat)
+        report["precheck"] = {"cold": cold_check, "warm": warm_check}
+        
+        linter = Linter(directory, compiled_directory, index)
+        cold_lint, _ = _timed(lambda: linter.run(plugins, jobs=jobs))
+        warm_lint, _ = _timed(lambda: linter.run(plugins, jobs=jobs), repeat)
+        report["lint"] = {"cold": cold_lint, "warm": warm_lint}
+        
+        search_index = SearchIndex()
+        build_time, _ = _timed(lambda: search_index.set_names(plugins), repeat)
+        content_time, _ = _timed(lambda: search_index.index_contents(directory))
+        target = plugins[len(plugins) // 2] if plugins else "plugin"
+        keystrokes = []
+        for length in range(1, len(target) + 1):
+            keystroke_time, _ = _timed(lambda: search_index.search(target[:length]))
+            keystrokes.append(keystroke_time)
+        content_query, _ = _timed(lambda: search_index.search("synthetic plugin 1", contents=True), repeat)
+        report["search"] = {
+            "build": build_time,
+            "content_index": content_time,
+            "keystrokes": len(keystrokes),
+            "keystroke_total": sum(keystrokes),
+            "keystroke_max": max(keystrokes, default=0.0),
+            "content_query": content_query,
+        }
+        
+        engine = BuildEngine(directory, compiler_path=compiler_path)
+        tick = tick_ms / 1000
+        report["compile_cold"] = _compile_phase(engine, plugins, jobs, False, tick)
+        report["compile_warm"] = _compile_phase(engine, plugins, jobs, True, tick)
+        
+        # Same cold build with several plugins per compiler invocation; the
+        # stub, like spcomp, only builds the first, so this measures the cost
+        # of the one-by-one fallback
+        if group > 1:
+            grouped_engine = BuildEngine(directory, compiler_path=compiler_path, sources_per_invocation=group)
+            report["compile_grouped"] = _compile_phase(grouped_engine, plugins, jobs, False, tick)
+        return report
+    finally:
+        if owns_directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def format_report(report):
+    """Return a human readable rendering of a benchmark report."""
+    def ms(value):
+        return "n/a" if value is None else f"{value * 1000:.2f} ms"
+
+    lines = [
+        f"Benchmark: {report['files']} plugins, {report['includes']} includes, "
+        f"{report['lines']} output lines per compile, {report['jobs']} job(s), "
+        f"{report['group']} source(s) per grouped invocation",
+        f"  scan            {ms(report['scan']['seconds'])} for {report['scan']['files']} files",
+        f"  include index   cold {ms(report['index']['cold'])}, warm {ms(report['index']['warm'])}",
+        f"  pre-check       cold {ms(report['precheck']['cold'])}, warm {ms(report['precheck']['warm'])}",
+        f"  lint            cold {ms(report['lint']['cold'])}, warm {ms(report['lint']['warm'])}",
+        f"  search          build {ms(report['search']['build'])}, "
+        f"{report['search']['keystrokes']} keystrokes {ms(report['search']['keystroke_total'])} "
+        f"(max {ms(report['search']['keystroke_max'])})",
+        f"  content search  index {ms(report['search']['content_index'])}, "
+        f"query {ms(report['search']['content_query'])}",
+    ]
+    for phase in ("compile_cold", "compile_warm", "compile_grouped"):
+        if phase not in report:
+            continue
+        data = report[phase]
+        throughput = "n/a" if data['throughput'] is None else f"{data['throughput']:.1f} files/s"
+        lines += [
+            f"  {phase.replace('_', ' '):<15} {throughput}, p50 {ms(data['p50'])}, p95 {ms(data['p95'])}, "
+            f"{data['failed']} failed",
+            f"  {'':<15} spawn mean {ms(data['spawn_mean'])}, compiler cpu {ms(data['cpu_total'])}, "
+            f"{data['output_bytes']} output bytes, log callbacks {ms(data['log_time'])}",
+            f"  {'':<15} UI stall total {ms(data['ui_stall_total'])}, max {ms(data['ui_stall_max'])}, "
+            f"p95 {ms(data['ui_stall_p95'])}, drain {ms(data['ui_drain_time'])}",
+        ]
+    return "\n".join(lines)
@@ -0,0 +1,276 @@
+"""
+Append-only structured log of every build, rotated by size and indexed by plugin.
+
+Each build becomes one JSON line holding its outcome, timing, diagnostics
+and the output logged for it. Records are queued by the compile threads and
+written in batches by a writer thread, so compiling never waits on the disk.
+The log is split into numbered segments; a segment is sealed once it grows
+past max_bytes and gets a small sidecar index of the offset, time, state and
+duration of every record per plugin, and the oldest segments are deleted beyond
+max_segments. Queries only read the records they return.
+"""
+
+import json
+import os
+import queue
+import re
+import threading
+import time
+from collections import namedtuple
+
+# Outcome of one build as stored in the log; time is when the build started,
+# diagnostics are [file, line, severity, code, message] lists and output the
+# lines logged for the build
+BuildRecord = namedtuple('BuildRecord', [
+    'time', 'plugin', 'state', 'returncode', 'elapsed', 'errors', 'warnings', 'diagnostics', 'output'
+])
+
+SEGMENT_PATTERN = re.compile(r'^builds-(\d+)\.jsonl$')
+
+
+class BuildLog:
+    """Rotating JSON-lines build log of one compiled directory.
+
+    record() only queues; flush() waits until everything queued is on disk.
+    The in-memory index maps each plugin to (segment, offset, time, state,
+    elapsed) entries in time order.
+    """
+
+    LOG_DIRECTORY = ".buildlogs"
+
+    # Most records written per batch
+    BATCH_SIZE = 500
+
+    def __init__(self, compiled_directory, max_bytes=4 * 1024 * 1024, max_segments=8):
+        self.log_directory = os.path.join(compiled_directory, self.LOG_DIRECTORY)
+        self.max_bytes = max_bytes
+        self.max_segments = max(1, max_segments)
+        self.lock = threading.Lock()
+        self.written = threading.Condition(self.lock)
+        self.pending = queue.SimpleQueue()
+        self.submitted = 0
+        self.completed = 0
+        self.writer = None
+        self.segments = []
+        self.index = {}
+        self.load()
+
+    def _segment_path(self, segment):
+        """Return the path of a log segment."""
+        return os.path.join(self.log_directory, f"builds-{segment:06d}.jsonl")
+
+    def _index_path(self, segment):
+        """Return the path of the sidecar index of a sealed segment."""
+        return os.path.join(self.log_directory, f"builds-{segment:06d}.idx.json")
+
+    def load(self):
+        """Rebuild the index from the sealed segments' sidecars and a scan of the active segment."""
+        try:
+            names = os.listdir(self.log_directory)
+        except OSError:
+            names = []
+        self.segments = sorted(int(match.group(1)) for match in map(SEGMENT_PATTERN.match, names) if match)
+        self.index = {}
+        for segment in self.segments:
+            entries = None
+            if segment != self.segments[-1]:
+                try:
+                    with open(self._index_path(segment), 'r', encoding='utf-8') as file:
+                        entries = json.load(file)
+                except (OSError, ValueError):
+                    entries = None
+            if entries is None:
+                entries = self._scan_segment(segment)
+            for plugin, plugin_entries in entries.items():
+                self.index.setdefault(plugin, []).extend(
+                    (segment, *entry[:3], entry[3] if len(entry) > 3 else None) for entry in plugin_entries)
+
+    def _scan_segment(self, segment):
+        """Return the index entries of a segment by reading it."""
+        entries = {}
+        try:
+            with open(self._segment_path(segment), 'rb') as file:
+                offset = 0
+                for line in file:
+                    try:
+                        data = json.loads(line)
+                        entries.setdefault(data["plugin"], []).append(
+                            [offset, data["time"], data["state"], data.get("elapsed")])
+                    except (ValueError, KeyError, TypeError):
+                        pass
+                    offset += len(line)
+        except OSError:
+            pass
+        return entries
+
+    def record(self, record):
+        """Queue a BuildRecord to be written by the writer thread."""
+        with self.lock:
+            self.submitted += 1
+            if self.writer is None:
+                self.writer = threading.Thread(target=self._write_loop)
+                self.writer.daemon = True
+                self.writer.start()
+        self.pending.put(record)
+
+    def flush(self, timeout=None):
+        """Wait until every queued record has been written; return False on timeout."""
+        with self.written:
+            target = self.submitted
+            return self.written.wait_for(lambda: self.completed >= target, timeout)
+
+    def _write_loop(self):
+        """Writer thread: append queued records to the active segment in batches."""
+        while True:
+            batch = [self.pending.get()]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except OSError:
+                pass
+            finally:
+                with self.written:
+                    self.completed += len(batch)
+                    self.written.notify_all()
+
+    def _write(self, batch):
+        """Append records to the active segment, rotating it whenever it is full."""
+        lines = [json.dumps(record._asdict()).encode('utf-8') + b"\n" for record in batch]
+        os.makedirs(self.log_directory, exist_ok=True)
+        position = 0
+        while position < len(batch):
+            with self.lock:
+                if not self.segments:
+                    self.segments.append(1)
+                segment = self.segments[-1]
+            with open(self._segment_path(segment), 'ab') as file:
+                offset = file.tell()
+                first = position
+                entries = []
+                # Every segment takes at least one record
+                while position < len(batch) and (position == first or offset < self.max_bytes):
+                    entries.append((batch[position], offset))
+                    offset += len(lines[position])
+                    position += 1
+                file.write(b"".join(lines[first:position]))
+            
+            with self.lock:
+                for record, record_offset in entries:
+                    self.index.setdefault(record.plugin, []).append(
+                        (segment, record_offset, record.time, record.state, record.elapsed))
+            if offset >= self.max_bytes:
+                self._rotate(segment)
+
+    def _rotate(self, segment):
+        """Seal the active segment with its sidecar index, start a new one and drop the oldest."""
+        with self.lock:
+            entries = {}
+            for plugin, plugin_entries in self.index.items():
+                sealed = [list(entry[1:]) for entry in plugin_entries if entry[0] == segment]
+                if sealed:
+                    entries[plugin] = sealed
+        temp_file = self._index_path(segment) + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as file:
+            json.dump(entries, file)
+        os.replace(temp_file, self._index_path(segment))
+        
+        with self.lock:
+            self.segments.append(segment + 1)
+            expired = self.segments[:-self.max_segments]
+            self.segments = self.segments[-self.max_segments:]
+            if expired:
+                oldest = self.segments[0]
+                for plugin in list(self.index):
+                    entries = [entry for entry in self.index[plugin] if entry[0] >= oldest]
+                    if entries:
+                        self.index[plugin] = entries
+                    else:
+                        del self.index[plugin]
+        for old in expired:
+            for path in (self._segment_path(old), self._index_path(old)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def plugins(self):
+        """Return every plugin with at least one logged build."""
+        with self.lock:
+            return sorted(self.index, key=str.lower)
+
+    def latest(self):
+        """Return {plugin: (time, state, elapsed)} of every plugin's newest logged build.
+        
+        Answered from the index alone; elapsed is None for builds indexed by
+        an older version of the log.
+        """
+        with self.lock:
+            return {plugin: entries[-1][2:] for plugin, entries in self.index.items() if entries}
+
+    def query(self, plugin=None, state=None, since=None, until=None, limit=None):
+        """Return logged BuildRecords, newest first.
+        
+        Filters by plugin, state and start time (since <= time < until)
+        are answered from the index; only the matching records are read.
+        """
+        self.flush()
+        with self.lock:
+            if plugin is None:
+                entries = [entry for plugin_entries in self.index.values() for entry in plugin_entries]
+                entries.sort(key=lambda entry: entry[2])
+            else:
+                entries = list(self.index.get(plugin, ()))
+        
+        matches = []
+        for entry in reversed(entries):
+            started, entry_state = entry[2], entry[3]
+            if state and entry_state != state:
+                continue
+            if since is not None and started < since or until is not None and started >= until:
+                continue
+            matches.append(entry)
+            if limit and len(matches) >= limit:
+                break
+        return self._read(matches)
+
+    def last(self, plugin, state=None):
+        """Return the newest BuildRecord of a plugin, optionally in a given state, or None."""
+        records = self.query(plugin, state, limit=1)
+        return records[0] if records else None
+
+    def _read(self, entries):
+        """Read the records at the given index entries, keeping their order."""
+        records = []
+        files = {}
+        try:
+            for segment, offset, *_ in entries:
+                file = files.get(segment)
+                if file is None:
+                    try:
+                        file = files[segment] = open(self._segment_path(segment), 'rb')
+                    except OSError:
+                        continue
+                file.seek(offset)
+                try:
+                    records.append(BuildRecord(**json.loads(file.readline())))
+                except (ValueError, TypeError):
+                    continue
+        finally:
+            for file in files.values():
+                file.close()
+        return records
+
+
+def make_record(result, output=()):
+    """Return the BuildRecord of a BuildResult and the lines logged for it."""
+    timing = result.timing
+    errors = sum(1 for diagnostic in result.diagnostics if diagnostic.severity == "error")
+    return BuildRecord(
+        round(timing.started if timing else time.time(), 3), result.plugin, result.state, result.returncode,
+        round(result.elapsed, 4), errors, len(result.diagnostics) - errors,
+        [[d.file, d.line, d.severity, d.code, d.message] for d in result.diagnostics], list(output)
+    )
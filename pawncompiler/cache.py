@@ -0,0 +1,107 @@
+"""
+Incremental build cache keyed on source and include dependency hashes.
+"""
+
+import os
+import json
+import hashlib
+import threading
+
+class BuildCache:
+    """Persistent build cache keyed on source and include dependency hashes.
+    
+    A plugin is up to date when the hash of its source, every include it
+    transitively pulls in and the compiler binary matches the hash recorded
+    after its last successful compile, and the recorded output is untouched.
+    The include graph comes from the IncludeIndex; file hashes are memoized
+    by (mtime, size) so unchanged files are only stat'ed, never re-read.
+    """
+
+    CACHE_NAME = ".buildcache.json"
+
+    def __init__(self, directory, compiled_directory, include_index):
+        self.directory = directory
+        self.include_index = include_index
+        self.cache_file = os.path.join(compiled_directory, self.CACHE_NAME)
+        self.lock = threading.Lock()
+        self.plugins = {}
+        self.files = {}
+        self.load()
+
+    def load(self):
+        """Load the cache from disk, starting empty if it is missing or invalid."""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            self.plugins = data.get("plugins", {})
+            self.files = data.get("files", {})
+        except (OSError, ValueError):
+            self.plugins = {}
+            self.files = {}
+
+    def save(self):
+        """Write the cache to disk atomically."""
+        with self.lock:
+            data = {"plugins": self.plugins, "files": self.files}
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            temp_file = self.cache_file + ".tmp"
+            with open(temp_file, 'w', encoding='utf-8') as file:
+                json.dump(data, file)
+            os.replace(temp_file, self.cache_file)
+
+    def hash_file(self, path):
+        """Return the sha1 of a file, re-reading it only when it changed."""
+        stat = os.stat(path)
+        with self.lock:
+            cached = self.files.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        
+        sha1 = hashlib.sha1()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(65536), b''):
+                sha1.update(chunk)
+        
+        entry = [stat.st_mtime_ns, stat.st_size, sha1.hexdigest()]
+        with self.lock:
+            self.files[path] = entry
+        return entry[2]
+
+    def digest(self, plugin, compiler_path=None):
+        """Hash a plugin together with its transitive includes and the compiler."""
+        includes, missing = self.include_index.walk(plugin)
+        parts = []
+        for relpath in [plugin, *includes]:
+            sha1 = self.hash_file(os.path.join(self.directory, relpath))
+            parts.append(f"{os.path.normpath(relpath)}={sha1}")
+        # A missing include changes the digest once it appears
+        parts.extend(f"missing:{name}" for name in missing)
+        
+        if compiler_path and os.path.exists(compiler_path):
+            stat = os.stat(compiler_path)
+            parts.append(f"compiler={stat.st_mtime_ns}:{stat.st_size}")
+        
+        return hashlib.sha1("\n".join(sorted(parts)).encode('utf-8')).hexdigest()
+
+    def is_up_to_date(self, plugin, digest, compiled_file):
+        """Return True if the plugin was last built from this exact digest."""
+        with self.lock:
+            entry = self.plugins.get(plugin)
+        if not entry or entry["digest"] != digest:
+            return False
+        try:
+            stat = os.stat(compiled_file)
+        except OSError:
+            return False
+        return entry["output"] == [stat.st_mtime_ns, stat.st_size]
+
+    def record(self, plugin, digest, compiled_file):
+        """Remember the digest a plugin was successfully built from."""
+        stat = os.stat(compiled_file)
+        with self.lock:
+            self.plugins[plugin] = {"digest": digest, "output": [stat.st_mtime_ns, stat.st_size]}
+
+    def forget(self, plugin):
+        """Drop a plugin from the cache so it is rebuilt next time."""
+        with self.lock:
+            self.plugins.pop(plugin, None)
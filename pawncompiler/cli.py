@@ -0,0 +1,336 @@
+"""
+Command line interface of the headless build engine.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from .buildlog import BuildLog
+from .engine import BuildEngine, format_summary
+from .remote import BuildWorker, RemoteBuildPool
+
+
+def _result_to_dict(result):
+    """Return a JSON serializable dict for a BuildResult."""
+    return {
+        "plugin": result.plugin,
+        "state": result.state,
+        "returncode": result.returncode,
+        "output": result.compiled_file,
+        "elapsed": round(result.elapsed, 4),
+        "timing": result.timing and {
+            key: round(value, 6) if isinstance(value, float) else value
+            for key, value in result.timing._asdict().items() if key not in ("plugin", "state")
+        },
+        "diagnostics": [
+            {"file": d.file, "line": d.line, "severity": d.severity, "code": d.code, "message": d.message}
+            for d in result.diagnostics
+        ],
+    }
+
+
+def build_command(args):
+    """Compile the plugins of a scripting directory and return the exit code."""
+    directory = os.path.abspath(args.directory)
+    if not os.path.isdir(directory):
+        print(f"error: not a directory: {directory}", file=sys.stderr)
+        return 2
+
+    remote = None
+    if args.remote:
+        try:
+            remote = RemoteBuildPool(args.remote)
+        except ValueError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 2
+    engine = BuildEngine(directory, compiler_path=args.compiler and os.path.abspath(args.compiler),
+                         sources_per_invocation=args.group, keep_builds=args.keep,
+                         artifact_budget=args.max_mb and int(args.max_mb * 1024 * 1024), precheck=not args.no_precheck,
+                         remote=remote)
+    jobs = args.jobs
+    if remote:
+        # One job per worker slot
+        capacity = remote.capacity()
+        if not capacity and not engine.compiler_available():
+            print("error: no build worker is reachable", file=sys.stderr)
+            return 2
+        jobs = jobs or capacity or None
+    elif not engine.compiler_available():
+        print(f"error: compiler not found at: {engine.compiler_path}", file=sys.stderr)
+        return 2
+
+    plugins = args.plugins or engine.discover()
+    if not plugins:
+        print(f"No .sp files found in {directory}", file=sys.stderr)
+        return 0
+
+    # Keep stdout for the JSON report when one is requested
+    stream = sys.stderr if args.json else sys.stdout
+
+    def log(message, tag=None):
+        if not args.quiet:
+            print(message, file=stream, flush=True)
+
+    start_time = time.perf_counter()
+    try:
+        results = engine.build(plugins, jobs=jobs, incremental=not args.force, log=log)
+    except KeyboardInterrupt:
+        engine.cancel()
+        print("Build cancelled", file=sys.stderr)
+        return 130
+    finally:
+        if remote:
+            remote.close()
+    elapsed = time.perf_counter() - start_time
+
+    results.sort(key=lambda result: result.plugin.lower())
+    failed = [result for result in results if result.state == "failed"]
+    summary = format_summary(results, elapsed)
+
+    if args.json:
+        json.dump({
+            "directory": directory,
+            "compiler": engine.compiler_path,
+            "elapsed": round(elapsed, 4),
+            "summary": summary,
+            "results": [_result_to_dict(result) for result in results],
+        }, sys.stdout, indent=2)
+        print()
+    else:
+        for result in failed:
+            print(f"✗ Failed: {result.plugin}")
+        print(summary)
+    return 1 if failed else 0
+
+
+def artifacts_command(args):
+    """List the stored builds of a scripting directory or roll a plugin back."""
+    directory = os.path.abspath(args.directory)
+    if not os.path.isdir(directory):
+        print(f"error: not a directory: {directory}", file=sys.stderr)
+        return 2
+    engine = BuildEngine(directory)
+    store = engine.artifacts
+
+    if not args.plugin:
+        for plugin in sorted(store.plugins, key=str.lower):
+            history = store.history(plugin)
+            print(f"{plugin}: {len(history)} build(s), latest {history[0].hash[:10]}")
+        print(f"{store.total_bytes()} bytes in {len(store.blob_sizes)} blob(s)")
+        return 0
+
+    if args.rollback:
+        artifact = store.find(args.plugin, args.rollback)
+        if artifact is None:
+            print(f"error: no single build of {args.plugin} matches {args.rollback}", file=sys.stderr)
+            return 1
+        compiled_file = engine.rollback(args.plugin, artifact)
+        engine.save()
+        print(f"Restored {artifact.hash[:10]} to {compiled_file}")
+        return 0
+
+    for artifact in store.history(args.plugin):
+        stored = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(artifact.stored))
+        print(f"{artifact.hash[:10]}  {stored}  {artifact.size:>9} bytes")
+    return 0
+
+
+def log_command(args):
+    """Query the build log of a scripting directory."""
+    directory = os.path.abspath(args.directory)
+    if not os.path.isdir(directory):
+        print(f"error: not a directory: {directory}", file=sys.stderr)
+        return 2
+    try:
+        since = args.since and datetime.fromisoformat(args.since).timestamp()
+    except ValueError:
+        print(f"error: invalid date: {args.since}", file=sys.stderr)
+        return 2
+
+    build_log = BuildLog(os.path.join(directory, "compiled"))
+    records = build_log.query(args.plugin, args.state, since=since, limit=args.limit)
+    if args.json:
+        json.dump([record._asdict() for record in records], sys.stdout, indent=2)
+        print()
+        return 0
+
+    for record in records:
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.time))
+        print(f"{started}  {record.state:<9} {record.plugin}  {record.elapsed:.2f}s  "
+              f"{record.errors} error(s), {record.warnings} warning(s)")
+        if args.output:
+            for line in record.output:
+                print(f"    {line.rstrip()}")
+    if not records:
+        print("No matching builds", file=sys.stderr)
+    return 0
+
+
+def lint_command(args):
+    """Lint the plugins of a scripting directory and return the exit code."""
+    directory = os.path.abspath(args.directory)
+    if not os.path.isdir(directory):
+        print(f"error: not a directory: {directory}", file=sys.stderr)
+        return 2
+    engine = BuildEngine(directory)
+    plugins = args.plugins or engine.discover()
+    if not plugins:
+        print(f"No .sp files found in {directory}", file=sys.stderr)
+        return 0
+
+    def report(result):
+        if not args.json:
+            for d in result.findings:
+                print(f"{d.file}({d.line}) : {d.code}: {d.message}", flush=True)
+
+    start_time = time.perf_counter()
+    results = engine.linter.run(plugins, jobs=args.jobs, on_result=report)
+    elapsed = time.perf_counter() - start_time
+    engine.linter.save()
+
+    findings = sum(len(result.findings) for result in results)
+    cached = sum(1 for result in results if result.cached)
+    if args.json:
+        json.dump({
+            "directory": directory,
+            "elapsed": round(elapsed, 4),
+            "results": [
+                {"plugin": result.plugin, "cached": result.cached, "findings": [
+                    {"line": d.line, "code": d.code, "message": d.message} for d in result.findings
+                ]}
+                for result in sorted(results, key=lambda result: result.plugin.lower())
+            ],
+        }, sys.stdout, indent=2)
+        print()
+    else:
+        print(f"Lint finished in {elapsed:.1f}s: {findings} finding(s) in {len(results)} plugin(s), {cached} cached")
+    return 1 if findings else 0
+
+
+def worker_command(args):
+    """Serve compile requests from remote engines until interrupted."""
+    compiler = os.path.abspath(args.compiler)
+    if not os.path.exists(compiler):
+        print(f"error: compiler not found at: {compiler}", file=sys.stderr)
+        return 2
+
+    def log(message, tag=None):
+        if not args.quiet:
+            print(message, file=sys.stderr, flush=True)
+
+    try:
+        worker = BuildWorker(args.listen, compiler, root=args.root and os.path.abspath(args.root), slots=args.slots,
+                             log=log, max_bytes=args.max_mb and int(args.max_mb * 1024 * 1024),
+                             max_age=args.max_days and args.max_days * 86400)
+        address = worker.bind()
+    except (OSError, ValueError) as e:
+        print(f"error: cannot listen on {args.listen}: {e}", file=sys.stderr)
+        return 2
+    if isinstance(address, tuple):
+        address = f"{address[0]}:{address[1]}"
+    print(f"Build worker listening on {address} with {worker.slots} slot(s), files in {worker.root}", flush=True)
+    try:
+        worker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.stop()
+    return 0
+
+
+def bench_command(args):
+    """Run the benchmark suite and print its report."""
+    from .bench import format_report, run_benchmark
+
+    report = run_benchmark(files=args.files, jobs=args.jobs, includes=args.includes, lines=args.lines,
+                           compile_ms=args.compile_ms, repeat=args.repeat, tick_ms=args.tick_ms,
+                           directory=args.directory and os.path.abspath(args.directory), group=args.group)
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_report(report))
+    return 0
+
+
+def main(argv=None):
+    """Parse the command line and run the requested command."""
+    parser = argparse.ArgumentParser(prog="pawncompiler", description="Headless SourcePawn build engine.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="compile the plugins of a scripting directory")
+    build.add_argument("directory", help="SourcePawn scripting directory")
+    build.add_argument("plugins", nargs="*", help="plugins to compile, relative to the directory (default: all .sp files)")
+    build.add_argument("-j", "--jobs", type=int, default=None, help="parallel compile jobs (default: CPU count)")
+    build.add_argument("--compiler", help="compiler executable (default: DIRECTORY/compiler.exe)")
+    build.add_argument("--group", type=int, default=1,
+                       help="plugins passed to one compiler invocation in a batch, for compilers that write "
+                            "one output per source (default: 1)")
+    build.add_argument("--force", action="store_true", help="rebuild plugins even if they are up to date")
+    build.add_argument("--no-precheck", action="store_true",
+                       help="always start the compiler, even for plugins the syntax pre-check rejects")
+    build.add_argument("--keep", type=int, default=10, help="stored builds kept per plugin (default: 10)")
+    build.add_argument("--max-mb", type=float, default=None, help="size budget of the stored builds in MiB")
+    build.add_argument("--remote", action="append", metavar="ADDRESS",
+                       help="compile on the build worker at host:port or unix:PATH; repeat for more workers")
+    build.add_argument("--json", action="store_true", help="print a JSON report on stdout")
+    build.add_argument("-q", "--quiet", action="store_true", help="do not print compiler output")
+    build.set_defaults(func=build_command)
+
+    worker = subparsers.add_parser("worker", help="compile for remote engines started with build --remote")
+    worker.add_argument("--listen", default="127.0.0.1:7650", metavar="ADDRESS",
+                        help="host:port or unix:PATH to listen on; workers do not authenticate clients, so only "
+                             "listen on trusted networks (default: 127.0.0.1:7650, this machine only)")
+    worker.add_argument("--compiler", required=True, help="compiler executable run for every request")
+    worker.add_argument("--slots", type=int, default=None, help="compiles run at once (default: CPU count)")
+    worker.add_argument("--root", help="folder of the received files and the build sandboxes (default: a temp dir)")
+    worker.add_argument("--max-mb", type=float, default=2048,
+                        help="size budget of the received files in MiB, least recently used first out (default: 2048)")
+    worker.add_argument("--max-days", type=float, default=30,
+                        help="delete received files unused for this many days (default: 30)")
+    worker.add_argument("-q", "--quiet", action="store_true", help="do not print a line per compile")
+    worker.set_defaults(func=worker_command)
+
+    artifacts = subparsers.add_parser("artifacts", help="list stored builds or roll a plugin back")
+    artifacts.add_argument("directory", help="SourcePawn scripting directory")
+    artifacts.add_argument("plugin", nargs="?", help="plugin whose builds to list, relative to the directory")
+    artifacts.add_argument("--rollback", metavar="HASH", help="restore the build whose hash starts with HASH")
+    artifacts.set_defaults(func=artifacts_command)
+
+    log = subparsers.add_parser("log", help="query the logged builds of a scripting directory, newest first")
+    log.add_argument("directory", help="SourcePawn scripting directory")
+    log.add_argument("plugin", nargs="?", help="only builds of this plugin, relative to the directory")
+    log.add_argument("--state", choices=["ok", "failed", "skipped", "cancelled"], help="only builds in this state")
+    log.add_argument("--since", help="only builds started at or after this ISO date, e.g. 2026-01-31T12:00")
+    log.add_argument("-n", "--limit", type=int, default=20, help="most builds shown, 0 for all (default: 20)")
+    log.add_argument("--output", action="store_true", help="also print the output of every build")
+    log.add_argument("--json", action="store_true", help="print the records as JSON")
+    log.set_defaults(func=log_command)
+
+    lint = subparsers.add_parser("lint", help="check the plugins of a scripting directory for common issues")
+    lint.add_argument("directory", help="SourcePawn scripting directory")
+    lint.add_argument("plugins", nargs="*", help="plugins to lint, relative to the directory (default: all .sp files)")
+    lint.add_argument("-j", "--jobs", type=int, default=None, help="parallel lint processes (default: CPU count)")
+    lint.add_argument("--json", action="store_true", help="print a JSON report on stdout")
+    lint.set_defaults(func=lint_command)
+
+    bench = subparsers.add_parser("bench", help="benchmark scanning, searching and compiling with a stub compiler")
+    bench.add_argument("--files", type=int, default=200, help="synthetic plugins to generate (default: 200)")
+    bench.add_argument("-j", "--jobs", type=int, default=None, help="parallel compile jobs (default: CPU count)")
+    bench.add_argument("--includes", type=int, default=20, help="synthetic include files (default: 20)")
+    bench.add_argument("--lines", type=int, default=20, help="output lines per compile (default: 20)")
+    bench.add_argument("--compile-ms", type=int, default=0, help="extra time the stub compiler sleeps")
+    bench.add_argument("--repeat", type=int, default=5, help="repetitions of the scan and search timings")
+    bench.add_argument("--group", type=int, default=1,
+                       help="plugins per invocation in a grouped phase, run when above 1 (default: 1)")
+    bench.add_argument("--tick-ms", type=int, default=10, help="simulated UI thread tick (default: 10)")
+    bench.add_argument("--directory", help="generate the project here and keep it (default: a temp dir)")
+    bench.add_argument("--json", action="store_true", help="print the report as JSON")
+    bench.set_defaults(func=bench_command)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,92 @@
+"""
+Parsing of SourcePawn compiler output into structured diagnostics.
+"""
+
+import re
+import threading
+from collections import namedtuple
+
+# spcomp diagnostics: "file.sp(12) : error 017: message", with an optional
+# "(first -- last)" line range, in which case the last line is reported
+DIAGNOSTIC_PATTERN = re.compile(
+    r'^(?P<file>.+?)\((?P<line>\d+)(?:\s*--\s*(?P<end_line>\d+))?\)\s*:\s*'
+    r'(?P<severity>fatal error|error|warning)\s+(?P<code>\d+)\s*:\s*(?P<message>.*)$',
+    re.IGNORECASE
+)
+
+# Compiler summary lines such as "2 Errors." or "Compilation aborted."
+SUMMARY_PATTERN = re.compile(r'^\s*(?:\d+\s+(?P<kind>error|warning)s?\.|(?P<aborted>compilation aborted\.))\s*$',
+                             re.IGNORECASE)
+
+# Parsed compiler diagnostic
+Diagnostic = namedtuple('Diagnostic', ['plugin', 'file', 'line', 'severity', 'code', 'message'])
+
+
+def parse_diagnostic(line, plugin=None):
+    """Parse one line of compiler output into a Diagnostic, or return None."""
+    match = DIAGNOSTIC_PATTERN.match(line.strip())
+    if not match:
+        return None
+    severity = match.group('severity').lower()
+    return Diagnostic(
+        plugin,
+        match.group('file').strip(),
+        int(match.group('end_line') or match.group('line')),
+        'error' if severity == 'fatal error' else severity,
+        f"{severity} {match.group('code')}",
+        match.group('message').strip()
+    )
+
+
+def classify_output_line(line, diagnostic=None):
+    """Return the console tag for a line of compiler output."""
+    if diagnostic:
+        return diagnostic.severity
+    match = SUMMARY_PATTERN.match(line)
+    if match:
+        return 'error' if match.group('aborted') else match.group('kind').lower()
+    return None
+
+
+class DiagnosticStore:
+    """Thread-safe store of the diagnostics of each plugin's latest build."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.plugins = {}
+
+    def replace(self, plugin, diagnostics):
+        """Replace the diagnostics recorded for a plugin."""
+        with self.lock:
+            if diagnostics:
+                self.plugins[plugin] = list(diagnostics)
+            else:
+                self.plugins.pop(plugin, None)
+
+    def for_plugin(self, plugin):
+        """Return the diagnostics of one plugin."""
+        with self.lock:
+            return list(self.plugins.get(plugin, ()))
+
+    def counts(self, plugin):
+        """Return the (errors, warnings) counts of one plugin."""
+        diagnostics = self.for_plugin(plugin)
+        errors = sum(1 for diagnostic in diagnostics if diagnostic.severity == 'error')
+        return errors, len(diagnostics) - errors
+
+    def query(self, severity=None, text=None):
+        """Return every diagnostic matching a severity and a case-insensitive text filter."""
+        text = (text or "").lower()
+        with self.lock:
+            groups = list(self.plugins.values())
+        return [
+            diagnostic for diagnostics in groups for diagnostic in diagnostics
+            if (not severity or diagnostic.severity == severity)
+            and (not text or text in diagnostic.message.lower() or text in diagnostic.plugin.lower()
+                 or text in diagnostic.code)
+        ]
+
+    def clear(self):
+        """Forget every diagnostic."""
+        with self.lock:
+            self.plugins.clear()
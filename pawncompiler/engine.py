@@ -0,0 +1,491 @@
+"""
+UI-free compile pipeline for a SourcePawn scripting directory.
+
+The engine owns the include index, the incremental build cache, the artifact
+store, the linter, the build log and the diagnostics of a directory, runs
+the compiler on one plugin or on a batch of plugins in parallel, locally or
+on remote build workers, and reports progress through a log(message, tag)
+callback whose tags match the console tags of the GUI ("info", "success",
+"warning", "error" or None).
+"""
+
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .artifacts import ArtifactStore
+from .buildlog import BuildLog, make_record
+from .cache import BuildCache
+from .diagnostics import DiagnosticStore, classify_output_line, parse_diagnostic
+from .includes import IncludeIndex
+from .lint import Linter
+from .preprocess import Preprocessor
+from .remote import RemoteError
+from .scanner import scan_directory
+from .service import CompileService
+from .timing import CompileTimer, TimingHistory, wait_with_cpu_time
+
+# Outcome of compiling one plugin; state is "ok", "failed", "skipped" or "cancelled"
+# and timing is its CompileTiming
+BuildResult = namedtuple('BuildResult', [
+    'plugin', 'state', 'returncode', 'compiled_file', 'diagnostics', 'elapsed', 'timing'
+])
+
+
+def _discard(message, tag=None):
+    """Log callback that drops every message."""
+
+
+def format_summary(results, elapsed):
+    """Return a one-line summary of a batch of build results."""
+    counts = {"ok": 0, "skipped": 0, "failed": 0, "cancelled": 0}
+    for result in results:
+        counts[result.state] += 1
+    return (f"Batch finished in {elapsed:.1f}s: {counts['ok']} succeeded, {counts['skipped']} up to date, "
+            f"{counts['failed']} failed, {counts['cancelled']} cancelled")
+
+
+class BuildEngine:
+    """Compile pipeline for one scripting directory.
+
+    With a RemoteBuildPool as remote, compiler invocations run on the build
+    workers and fall back to the local compiler, if there is one, while no
+    worker can be reached.
+    """
+
+    def __init__(self, directory, compiler_path=None, compiled_directory=None, sources_per_invocation=1,
+                 keep_builds=10, artifact_budget=None, precheck=True, remote=None):
+        self.directory = directory
+        self.compiled_directory = compiled_directory or os.path.join(directory, "compiled")
+        self.compiler_path = compiler_path or os.path.join(directory, "compiler.exe")
+        self.service = CompileService(self.compiler_path, directory, sources_per_invocation)
+        self.remote = remote
+        self.include_index = IncludeIndex(directory, self.compiled_directory,
+                                          [os.path.join(os.path.dirname(os.path.abspath(self.compiler_path)), "include")])
+        self.build_cache = BuildCache(directory, self.compiled_directory, self.include_index)
+        self.preprocessor = Preprocessor(self.include_index)
+        self.precheck = precheck
+        self.artifacts = ArtifactStore(self.compiled_directory, keep_builds, artifact_budget)
+        self.diagnostics = DiagnosticStore()
+        self.linter = Linter(directory, self.compiled_directory, self.include_index)
+        self.timings = TimingHistory(self.compiled_directory)
+        self.build_log = BuildLog(self.compiled_directory)
+        self.cancel_event = threading.Event()
+        self.process_lock = threading.Lock()
+        self.active_processes = {}
+        self.cancelled_plugins = set()
+        self.jobs = {}
+
+    def discover(self):
+        """Return the .sp files of the directory, sorted by name."""
+        return sorted(scan_directory(self.directory), key=str.lower)
+
+    def output_path(self, plugin):
+        """Return the path of the .smx a plugin compiles to.
+        
+        Plugins may be paths relative to the directory or absolute paths in
+        other scripting roots; the compiler writes every output into the flat
+        compiled folder under the plugin's base name.
+        """
+        return os.path.join(self.compiled_directory, os.path.splitext(os.path.basename(plugin))[0] + '.smx')
+
+    def compiler_available(self):
+        """Return True if the configured compiler exists."""
+        return self.service.available()
+
+    def cancel(self):
+        """Cancel queued jobs and kill every running compiler process."""
+        self.cancel_event.set()
+        with self.process_lock:
+            processes = list(self.active_processes)
+        for process in processes:
+            try:
+                process.kill()
+            except Exception:
+                pass
+
+    def cancel_plugins(self, plugins):
+        """Cancel the given plugins only, killing the compiler processes building them.
+        
+        A cancelled plugin stays cancelled until resume_plugins is called for it.
+        """
+        plugins = set(plugins)
+        with self.process_lock:
+            self.cancelled_plugins.update(plugins)
+            processes = [process for process, group in self.active_processes.items() if plugins.intersection(group)]
+        for process in processes:
+            try:
+                process.kill()
+            except Exception:
+                pass
+
+    def resume_plugins(self, plugins):
+        """Allow previously cancelled plugins to be compiled again."""
+        with self.process_lock:
+            self.cancelled_plugins.difference_update(plugins)
+
+    def is_cancelled(self, plugin):
+        """Return True if every compile or this plugin's compile was cancelled."""
+        return self.cancel_event.is_set() or plugin in self.cancelled_plugins
+
+    def save(self):
+        """Persist the include index, the build cache, the artifact manifest and the lint cache.
+        
+        Also waits until the queued build log records are written.
+        """
+        self.include_index.save()
+        self.build_cache.save()
+        self.artifacts.save()
+        self.linter.save()
+        self.build_log.flush()
+
+    def rollback(self, plugin, artifact):
+        """Restore a stored build of a plugin as its current output and return the output path.
+        
+        The restored build becomes the plugin's latest build, and the build
+        cache forgets the plugin so the next compile rebuilds it from source.
+        """
+        compiled_file = self.output_path(plugin)
+        self.artifacts.restore(artifact, compiled_file)
+        self.artifacts.store(plugin, compiled_file, artifact.digest)
+        self.build_cache.forget(plugin)
+        return compiled_file
+
+    def compile(self, plugin, log=None, incremental=True):
+        """Compile one plugin and return its BuildResult.
+        
+        With incremental set, a plugin whose source, includes and compiler
+        are unchanged since its last successful build is skipped. The timing
+        of every compile that was not cancelled is appended to the history.
+        """
+        return self.compile_group([plugin], log, incremental)[0]
+
+    def compile_group(self, plugins, log=None, incremental=True):
+        """Compile plugins with a single compiler invocation and return their BuildResults.
+        
+        Up-to-date plugins are skipped as in compile, and plugins the
+        preprocessor pre-check proves broken fail without starting the
+        compiler. If the shared invocation fails or leaves an output missing,
+        the plugins of the group are compiled again one by one so each gets
+        its exact result and diagnostics. Each plugin is charged an even
+        share of the invocation.
+        """
+        log = log or _discard
+        results = {}
+        pending = []
+        for plugin in plugins:
+            timer = CompileTimer(plugin)
+            plugin_log = timer.wrap_log(log)
+            if self.is_cancelled(plugin):
+                results[plugin] = self._result(plugin, timer, "cancelled")
+                continue
+            if self.remote is None and not self.compiler_available():
+                raise FileNotFoundError(f"Compiler not found at: {self.compiler_path}")
+            
+            # Hash the source and its includes before compiling so edits made
+            # while the compiler runs still trigger the next rebuild
+            digest = None
+            hash_start = time.perf_counter()
+            try:
+                digest = self.build_cache.digest(plugin, self.compiler_path)
+            except OSError as e:
+                plugin_log(f"Could not hash {plugin} for the build cache: {e}", "warning")
+            timer.hash = time.perf_counter() - hash_start
+            
+            if incremental and digest and self.build_cache.is_up_to_date(plugin, digest, self.output_path(plugin)):
+                plugin_log(f"✓ Up to date, skipped: {plugin}", "success")
+                results[plugin] = self._result(plugin, timer, "skipped", 0, self.diagnostics.for_plugin(plugin))
+                continue
+            
+            if self.precheck and self._precheck_failed(plugin, timer, plugin_log):
+                results[plugin] = self._result(plugin, timer, "failed", None, self.diagnostics.for_plugin(plugin))
+                continue
+            pending.append((plugin, timer, digest))
+        
+        if len(pending) > 1:
+            group_timer = CompileTimer(None)
+            group_log = group_timer.wrap_log(log)
+            for plugin, _, _ in pending:
+                self._archive_output(plugin, group_log)
+            group_log(f"Running compiler on {len(pending)} plugins in one invocation...", "info")
+            returncode, diagnostics, output = self._run_compiler([plugin for plugin, _, _ in pending], group_timer,
+                                                                 group_log)
+            
+            if returncode == 0 and all(os.path.exists(self.output_path(plugin)) for plugin, _, _ in pending):
+                for plugin, timer, digest in pending:
+                    timer.share(group_timer, len(pending))
+                    timer.lines.extend(output[plugin])
+                    results[plugin] = self._finish(plugin, timer, digest, returncode, diagnostics[plugin],
+                                                   timer.wrap_log(log))
+                pending = []
+            else:
+                # The previous outputs were archived above; whatever the failed
+                # invocation wrote is not a build of any single plugin
+                for plugin, _, _ in pending:
+                    try:
+                        os.remove(self.output_path(plugin))
+                    except OSError:
+                        pass
+                if not all(self.is_cancelled(plugin) for plugin, _, _ in pending):
+                    group_log(f"Grouped invocation failed, compiling {len(pending)} plugin(s) one by one", "warning")
+        
+        archived = len(pending) > 1
+        for plugin, timer, digest in pending:
+            if self.is_cancelled(plugin):
+                results[plugin] = self._result(plugin, timer, "cancelled")
+                continue
+            plugin_log = timer.wrap_log(log)
+            if not archived:
+                self._archive_output(plugin, plugin_log)
+            plugin_log(f"Running compiler on {plugin}...", "info")
+            returncode, diagnostics, _ = self._run_compiler([plugin], timer, plugin_log)
+            results[plugin] = self._finish(plugin, timer, digest, returncode, diagnostics[plugin], plugin_log)
+        return [results[plugin] for plugin in plugins]
+
+    def _precheck_failed(self, plugin, timer, log):
+        """Run the preprocessor syntax check and return True if the plugin certainly fails.
+        
+        The errors are logged in the compiler's own format and become the
+        plugin's diagnostics, so the compiler is never started for it.
+        """
+        start = time.perf_counter()
+        try:
+            errors = self.preprocessor.check(plugin)
+        except OSError:
+            # Let the compiler report unreadable files
+            return False
+        finally:
+            timer.precheck = time.perf_counter() - start
+        if not errors:
+            return False
+        
+        self.diagnostics.replace(plugin, errors)
+        self.build_cache.forget(plugin)
+        for diagnostic in errors:
+            log(f"{diagnostic.file}({diagnostic.line}) : {diagnostic.code}: {diagnostic.message}", "error")
+        log(f"✗ Pre-check failed for: {plugin}, compiler not started", "error")
+        return True
+
+    def _result(self, plugin, timer, state, returncode=None, diagnostics=()):
+        """Return the BuildResult of a compile, recording its timing unless it was cancelled.
+        
+        Every result and the lines logged for it are queued for the build log.
+        """
+        timing = timer.finish(state)
+        if state != "cancelled":
+            try:
+                self.timings.record(timing)
+            except OSError:
+                pass
+        result = BuildResult(plugin, state, returncode, self.output_path(plugin), list(diagnostics), timing.wall,
+                             timing)
+        self.build_log.record(make_record(result, timer.lines))
+        return result
+
+    def abandon(self, plugins, state="failed", message=None):
+        """Return BuildResults of plugins whose compile did not run to the end.
+        
+        Used for jobs that were cancelled while queued or raised an
+        exception; the results carry a timing and are logged like any other,
+        with message as their output.
+        """
+        results = []
+        for plugin in plugins:
+            timer = CompileTimer(plugin)
+            if message:
+                timer.lines.append(message)
+            results.append(self._result(plugin, timer, state))
+        return results
+
+    def _archive_output(self, plugin, log):
+        """Move the previous output of a plugin into the artifact store before it is rebuilt."""
+        compiled_file = self.output_path(plugin)
+        if not os.path.exists(compiled_file):
+            return
+        try:
+            artifact = self.artifacts.store(plugin, compiled_file)
+            os.remove(compiled_file)
+            log(f"Archived previous build: {artifact.hash[:10]}", "info")
+        except OSError as e:
+            log(f"Failed to archive previous build: {e}", "error")
+
+    def _run_compiler(self, plugins, timer, log):
+        """Run one compiler invocation over plugins, locally or on a build worker, and stream its output to the log.
+        
+        Returns (returncode, dict of plugin -> diagnostics, dict of plugin ->
+        output lines). A diagnostic, and the line it came from, is attributed
+        to the plugin whose source it names, otherwise to the plugin whose
+        source was named last.
+        """
+        os.makedirs(self.compiled_directory, exist_ok=True)
+        sources = {os.path.normcase(os.path.join(self.directory, plugin)): plugin for plugin in plugins}
+        diagnostics = {plugin: [] for plugin in plugins}
+        output = {plugin: [] for plugin in plugins}
+        current = plugins[0]
+        
+        spawn_start = time.perf_counter()
+        process = self._start_remote(plugins, log) if self.remote is not None else None
+        remote = process is not None
+        if not remote:
+            process = self.service.spawn(list(sources))
+        timer.spawn = time.perf_counter() - spawn_start
+        with self.process_lock:
+            self.active_processes[process] = plugins
+        
+        try:
+            # Close stdin immediately so compiler doesn't wait for Enter key
+            if not remote:
+                process.stdin.close()
+            
+            # Read output line by line in real-time
+            output_lines = 0
+            for line in (process.lines() if remote else process.stdout):
+                line = line.rstrip()
+                if not line:
+                    continue
+                output_lines += 1
+                timer.output(line)
+                diagnostic = parse_diagnostic(line, current)
+                if diagnostic:
+                    owner = sources.get(os.path.normcase(os.path.join(self.directory, diagnostic.file)))
+                    if owner and owner != current:
+                        current = owner
+                        diagnostic = diagnostic._replace(plugin=owner)
+                    diagnostics[current].append(diagnostic)
+                output[current].append(line)
+                log(line, classify_output_line(line, diagnostic))
+            
+            returncode, timer.cpu = (process.returncode, process.cpu) if remote else wait_with_cpu_time(process)
+            timer.run = time.perf_counter() - spawn_start - timer.spawn
+        except OSError as e:
+            if not (remote and process.killed):
+                raise
+            log(f"Remote build of {', '.join(plugins)} aborted: {e}", "warning")
+            returncode = None
+        finally:
+            if remote:
+                process.close()
+            else:
+                process.stdout.close()
+            with self.process_lock:
+                self.active_processes.pop(process, None)
+        
+        if not output_lines:
+            log("No output received from compiler", "warning")
+        return returncode, diagnostics, output
+
+    def _start_remote(self, plugins, log):
+        """Send a compiler invocation to the build workers and return its RemoteJob.
+        
+        Every plugin goes with its transitive includes, except those from
+        the include folder of a compiler outside the scripting directory,
+        which the workers' compiler brings along. Returns None to compile
+        locally if no worker is reachable or a file lies outside the
+        scripting directory, and the local compiler exists.
+        """
+        compiler_includes = os.path.join(os.path.dirname(os.path.abspath(self.compiler_path)), "include", "")
+        names = [plugin.replace(os.sep, "/") for plugin in plugins]
+        try:
+            files = {}
+            for plugin in plugins:
+                includes, _ = self.include_index.walk(plugin)
+                for relpath in [plugin, *includes]:
+                    name = relpath.replace(os.sep, "/")
+                    if os.path.isabs(relpath) or name.startswith("../"):
+                        if os.path.abspath(os.path.join(self.directory, relpath)).startswith(compiler_includes):
+                            continue
+                        raise RemoteError(f"Remote builds only cover files inside the scripting directory: {relpath}")
+                    path = os.path.join(self.directory, relpath)
+                    files[name] = (path, self.build_cache.hash_file(path))
+            return self.remote.start(names, files, dict(zip(names, map(self.output_path, plugins))))
+        except RemoteError as e:
+            if not self.compiler_available():
+                raise
+            log(f"{e}, compiling locally", "warning")
+            return None
+
+    def _finish(self, plugin, timer, digest, returncode, diagnostics, log):
+        """Record the outcome of a compiled plugin, log its summary and return its BuildResult."""
+        compiled_file = self.output_path(plugin)
+        self.diagnostics.replace(plugin, diagnostics)
+        errors, warnings = self.diagnostics.counts(plugin)
+        
+        # Check compilation result
+        success = returncode == 0 and os.path.exists(compiled_file)
+        log("-" * 60, "info")
+        if success:
+            log(f"✓ Successfully compiled: {plugin}", "success")
+            log(f"✓ Output: {compiled_file}", "success")
+            if warnings:
+                log(f"{warnings} warning(s)", "warning")
+            if digest:
+                self.build_cache.record(plugin, digest, compiled_file)
+            try:
+                self.artifacts.store(plugin, compiled_file, digest)
+            except OSError as e:
+                log(f"Failed to store build artifact: {e}", "warning")
+        else:
+            self.build_cache.forget(plugin)
+            log(f"✗ Compilation failed for: {plugin}", "error")
+            log(f"✗ Return code: {returncode}", "error")
+            if not os.path.exists(compiled_file):
+                log(f"✗ Output file not created: {compiled_file}", "error")
+            if errors or warnings:
+                log(f"✗ {errors} error(s), {warnings} warning(s)", "error")
+        log("-" * 60 + "\n", "info")
+        
+        if not success and self.is_cancelled(plugin):
+            return self._result(plugin, timer, "cancelled", returncode, diagnostics)
+        return self._result(plugin, timer, "ok" if success else "failed", returncode, diagnostics)
+
+    def build(self, plugins, jobs=None, incremental=True, log=None, on_result=None):
+        """Compile plugins on a bounded thread pool and return their BuildResults.
+        
+        Each job compiles a group of up to service.sources_per_invocation
+        plugins. The output of each job is buffered and logged as one block so
+        parallel jobs do not interleave. on_result is called with each BuildResult as
+        its job finishes; self.jobs tracks the state of every job meanwhile.
+        """
+        log = log or _discard
+        plugins = list(plugins)
+        jobs = max(1, min(jobs or os.cpu_count() or 1, len(plugins)))
+        groups = self.service.groups(plugins, jobs)
+        jobs = min(jobs, len(groups))
+        log_lock = threading.Lock()
+        self.jobs = {plugin: "queued" for plugin in plugins}
+        
+        def run_job(group):
+            if self.cancel_event.is_set():
+                return self.compile_group(group)
+            for plugin in group:
+                self.jobs[plugin] = "running"
+            messages = []
+            try:
+                return self.compile_group(group, lambda message, tag=None: messages.append((message, tag)), incremental)
+            finally:
+                with log_lock:
+                    for message, tag in messages:
+                        log(message, tag)
+        
+        results = []
+        try:
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                futures = {pool.submit(run_job, group): group for group in groups}
+                for future in as_completed(futures):
+                    group = futures[future]
+                    try:
+                        group_results = future.result()
+                    except Exception as e:
+                        message = f"Exception while compiling {', '.join(group)}: {e}"
+                        log(message, "error")
+                        group_results = self.abandon(group, "failed", message)
+                    for result in group_results:
+                        self.jobs[result.plugin] = result.state
+                        results.append(result)
+                        if on_result:
+                            on_result(result)
+        finally:
+            self.save()
+        return results
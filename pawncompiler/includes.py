@@ -0,0 +1,212 @@
+"""
+Include dependency graph of a SourcePawn scripting directory.
+"""
+
+import os
+import re
+import json
+import threading
+
+# Matches #include <file> / #tryinclude "file" directives
+INCLUDE_PATTERN = re.compile(r'^\s*#\s*(?:include|tryinclude)\s*[<"]([^>"]+)[>"]')
+
+
+def parse_includes(path):
+    """Return the include names a file references, streaming it line by line."""
+    includes = []
+    with open(path, 'rb') as file:
+        for line in file:
+            if b'include' in line:
+                match = INCLUDE_PATTERN.match(line.decode('utf-8', 'replace'))
+                if match:
+                    includes.append(match.group(1).strip())
+    return includes
+
+
+class IncludeIndex:
+    """On-disk index of the include graph of a scripting directory.
+
+    Every node is a file path relative to the scripting directory holding its
+    (mtime, size), resolved includes and unresolved include names. Nodes are
+    only re-parsed when their mtime or size changes. The transitive
+    dependencies of every plugin and the reverse map from each include to the
+    plugins that use it are kept in memory so both lookups are constant time.
+
+    Includes are searched next to the including file, then in the include
+    folder of the scripting directory, then in include_directories such as
+    the include folder of the compiler. Includes outside the scripting
+    directory are kept as relative paths too, or absolute ones on another
+    drive.
+    """
+
+    INDEX_NAME = ".includeindex.json"
+
+    def __init__(self, directory, compiled_directory, include_directories=()):
+        self.directory = directory
+        self.include_directory = os.path.join(directory, "include")
+        self.search_path = [self.include_directory]
+        for include_directory in include_directories:
+            if os.path.normcase(os.path.abspath(include_directory)) not in (
+                    os.path.normcase(os.path.abspath(path)) for path in self.search_path):
+                self.search_path.append(include_directory)
+        self.index_file = os.path.join(compiled_directory, self.INDEX_NAME)
+        self.lock = threading.RLock()
+        self.nodes = {}
+        self.closures = {}
+        self.reverse = {}
+        self.load()
+
+    def load(self):
+        """Load the index from disk, starting empty if it is missing, invalid or built for another search path."""
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            self.nodes = data.get("nodes", {}) if data.get("search_path") == self.search_path else {}
+        except (OSError, ValueError, AttributeError):
+            self.nodes = {}
+
+    def save(self):
+        """Write the index to disk atomically."""
+        with self.lock:
+            data = {"search_path": self.search_path, "nodes": self.nodes}
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            temp_file = self.index_file + ".tmp"
+            with open(temp_file, 'w', encoding='utf-8') as file:
+                json.dump(data, file)
+            os.replace(temp_file, self.index_file)
+
+    def resolve_include(self, name, from_directory):
+        """Resolve an include name the way the compiler does, or return None."""
+        names = [name] if os.path.splitext(name)[1] else [name + ".inc", name]
+        for base in (from_directory, *self.search_path):
+            for candidate in names:
+                path = os.path.normpath(os.path.join(base, candidate))
+                if os.path.isfile(path):
+                    return path
+        return None
+
+    def _refresh_node(self, relpath):
+        """Re-parse a node if it changed on disk and return (node, changed)."""
+        path = os.path.join(self.directory, relpath)
+        stat = os.stat(path)
+        node = self.nodes.get(relpath)
+        if node and node["mtime"] == stat.st_mtime_ns and node["size"] == stat.st_size:
+            return node, False
+        
+        includes, missing = [], []
+        for name in parse_includes(path):
+            include_path = self.resolve_include(name, os.path.dirname(path))
+            if include_path:
+                try:
+                    includes.append(os.path.relpath(include_path, self.directory))
+                except ValueError:
+                    includes.append(include_path)
+            else:
+                missing.append(name)
+        node = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "includes": includes, "missing": missing}
+        self.nodes[relpath] = node
+        return node, True
+
+    def _walk(self, plugin, refresh):
+        """Return the transitive (includes, missing names) of a plugin."""
+        includes, missing = set(), []
+        pending = [plugin]
+        seen = set()
+        while pending:
+            relpath = pending.pop()
+            if relpath in seen:
+                continue
+            seen.add(relpath)
+            if refresh:
+                try:
+                    node = self._refresh_node(relpath)[0]
+                except OSError:
+                    # An include deleted after it was indexed is now missing
+                    self.nodes.pop(relpath, None)
+                    missing.append(relpath)
+                    continue
+            else:
+                node = self.nodes.get(relpath)
+                if node is None:
+                    continue
+            missing.extend(node["missing"])
+            for include in node["includes"]:
+                if include not in seen:
+                    includes.add(include)
+                    pending.append(include)
+        includes.discard(plugin)
+        return includes, missing
+
+    def _set_closure(self, plugin, includes):
+        """Replace a plugin's transitive includes and patch the reverse map."""
+        for include in self.closures.get(plugin, ()):
+            users = self.reverse.get(include)
+            if users is not None:
+                users.discard(plugin)
+                if not users:
+                    del self.reverse[include]
+        self.closures[plugin] = frozenset(includes)
+        for include in includes:
+            self.reverse.setdefault(include, set()).add(plugin)
+
+    def update(self, plugins):
+        """Bring the index up to date for the given plugins and return the re-parsed paths.
+        
+        Only files whose mtime or size changed since the last update are read;
+        plugins that are no longer present are dropped from the index.
+        """
+        with self.lock:
+            changed = []
+            live = set()
+            for plugin in plugins:
+                pending = [plugin]
+                while pending:
+                    relpath = pending.pop()
+                    if relpath in live:
+                        continue
+                    live.add(relpath)
+                    try:
+                        node, was_changed = self._refresh_node(relpath)
+                    except OSError:
+                        self.nodes.pop(relpath, None)
+                        continue
+                    if was_changed:
+                        changed.append(relpath)
+                    pending.extend(node["includes"])
+            
+            for relpath in list(self.nodes):
+                if relpath not in live:
+                    del self.nodes[relpath]
+            
+            self.closures = {}
+            self.reverse = {}
+            for plugin in plugins:
+                self._set_closure(plugin, self._walk(plugin, refresh=False)[0])
+            return changed
+
+    def walk(self, plugin):
+        """Refresh and return the transitive (includes, missing names) of one plugin."""
+        with self.lock:
+            includes, missing = self._walk(plugin, refresh=True)
+            self._set_closure(plugin, includes)
+            return includes, missing
+
+    def dependencies(self, plugin):
+        """Return the includes a plugin transitively uses."""
+        with self.lock:
+            return self.closures.get(plugin, frozenset())
+
+    def dependents(self, include):
+        """Return the plugins that transitively use an include."""
+        with self.lock:
+            return frozenset(self.reverse.get(include, ()))
+
+    def affected_by(self, includes):
+        """Return the plugins that must be recompiled after the includes changed."""
+        with self.lock:
+            affected = set()
+            for include in includes:
+                affected.update(self.reverse.get(include, ()))
+                if include in self.closures:
+                    affected.add(include)
+            return affected
@@ -0,0 +1,437 @@
+"""
+Static lint pass over SourcePawn sources, without starting the compiler.
+
+Every file is tokenized once per content hash, in a process pool when there
+are many: comments and strings are stripped, directives, identifiers and
+top-level declarations are collected and the file-local rules run. The
+results are cached in compiled/.lintcache.json; the rules that look across
+files, such as an include none of whose symbols is used, run in this
+process over the cached reports. A plugin is reported as soon as every
+file it includes has been analyzed.
+
+Rules:
+
+    lint 001  an #include none of whose declarations the plugin uses
+    lint 002  a plugin without "public Plugin myinfo"
+    lint 003  a deprecated old-syntax declaration or tag
+    lint 004  a local array big enough to overflow the plugin stack
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .diagnostics import Diagnostic, DiagnosticStore
+
+# Lint findings of one plugin; cached is True when no file had to be analyzed
+LintResult = namedtuple('LintResult', ['plugin', 'findings', 'cached'])
+
+# Bump when the rules change so cached reports are analyzed again
+LINT_VERSION = 2
+
+# Stack and heap of a plugin in cells unless #pragma dynamic changes it; a
+# single local array taking more than half of it is reported
+STACK_CELLS = 4096
+
+COMMENT_OR_STRING_PATTERN = re.compile(r'//[^\n]*|/\*.*?(?:\*/|\Z)|"(?:[^"\\\n]|\\.)*"?|\'(?:[^\'\\\n]|\\.)*\'?',
+                                       re.DOTALL)
+STRING_PATTERN = re.compile(r'"(?:[^"\\\n]|\\.)*"?|\'(?:[^\'\\\n]|\\.)*\'?')
+DIRECTIVE_PATTERN = re.compile(r'#\s*(\w+)\s*(.*)$')
+INCLUDE_ARGUMENT_PATTERN = re.compile(r'[<"]([^>"]+)[>"]')
+IDENTIFIER_PATTERN = re.compile(r'\b[A-Za-z_]\w*')
+FUNCTION_PATTERN = re.compile(r'([A-Za-z_]\w*)\s*\(')
+GLOBAL_PATTERN = re.compile(r'([A-Za-z_]\w*)\s*(?:\[[^\]]*\]\s*)*(?:=|;|,)')
+TYPE_PATTERN = re.compile(r'\b(?:methodmap|enum\s+struct|enum|typedef|typeset|funcenum|functag)\s+([A-Za-z_]\w*)')
+ENUM_BLOCK_PATTERN = re.compile(r'\benum\b(?!\s+struct)[^{;]*\{([^}]*)\}')
+ENUM_MEMBER_PATTERN = re.compile(r'(?:^|,)\s*(?:\w+:)?([A-Za-z_]\w*)')
+ARRAY_PATTERN = re.compile(
+    r'(?:\b(static)\s+)?\b(?:(?:new|decl)\s+(?:(\w+):)?|(char|int|float|bool|any)\s+)'
+    r'([A-Za-z_]\w*)\s*((?:\[\s*\d+\s*\]\s*)+)'
+)
+DIMENSION_PATTERN = re.compile(r'\d+')
+BRACE_PATTERN = re.compile(r'[{};]')
+# Headers of blocks that declare a type rather than run code
+TYPE_BLOCK_PATTERN = re.compile(r'\b(?:enum|struct|methodmap|typeset|funcenum|property)\b')
+
+# Deprecated constructs of the old syntax and what replaces them
+OLD_SYNTAX_RULES = [
+    (re.compile(r'\bdecl\s+'), "'decl' is deprecated, declare the variable with its type"),
+    (re.compile(r'\bnew\s+[A-Za-z_]\w*\s*[\[=;,]'), "'new' declaration, use a typed declaration such as 'int'"),
+    (re.compile(r'\b(?:String|Float|Handle|bool|Action|Plugin|any)\s*:\s*[A-Za-z_]'),
+     "old-style tag, use the new type syntax"),
+]
+
+# Report of a file that could not be read
+EMPTY_REPORT = {"used": [], "declared": [], "includes": [], "findings": []}
+
+# Words that look like function or variable names to the declaration patterns
+KEYWORDS = frozenset({
+    "if", "else", "for", "while", "do", "switch", "case", "return", "sizeof", "view_as", "new", "delete",
+    "native", "forward", "stock", "public", "static", "const", "decl", "int", "float", "bool", "char", "void",
+    "any", "property", "function", "null", "true", "false", "this",
+})
+
+
+def _blank(match):
+    """Replace a comment by its newlines and keep strings, so line numbers stay put."""
+    text = match.group()
+    if text[0] == '/':
+        return '\n' * text.count('\n')
+    return text
+
+
+def analyze_source(text):
+    """Tokenize a source and return its lint report as a JSON serializable dict.
+
+    The report holds the identifiers the file uses, the names it declares at
+    the top level, its #include directives as [line, name] and the findings
+    of the file-local rules as [line, code, message].
+    """
+    source = COMMENT_OR_STRING_PATTERN.sub(_blank, text)
+    code = STRING_PATTERN.sub('""', source)
+    source_lines = source.split('\n')
+    code_lines = code.split('\n')
+
+    used = set()
+    declared = set()
+    includes = []
+    findings = []
+    newdecls = False
+    stack_cells = STACK_CELLS
+    old_syntax = {}
+    arrays = []
+    depth = 0
+    # One entry per open brace, True for function bodies and the blocks in
+    # them, False for enum structs, methodmaps and other type bodies
+    blocks = []
+    header = ""
+    for number, line in enumerate(code_lines, 1):
+        stripped = line.strip()
+        if stripped.startswith('#'):
+            match = DIRECTIVE_PATTERN.match(source_lines[number - 1].strip())
+            if not match:
+                continue
+            name, argument = match.groups()
+            if name in ("include", "tryinclude"):
+                include = INCLUDE_ARGUMENT_PATTERN.search(argument)
+                if include:
+                    includes.append([number, include.group(1).strip()])
+            elif name == "define":
+                words = IDENTIFIER_PATTERN.findall(argument)
+                if words:
+                    declared.add(words[0])
+                    used.update(words[1:])
+            elif name == "pragma":
+                words = argument.split()
+                if words[:2] == ["newdecls", "required"]:
+                    newdecls = True
+                elif len(words) > 1 and words[0] == "dynamic" and words[1].isdigit():
+                    stack_cells = int(words[1])
+            else:
+                used.update(IDENTIFIER_PATTERN.findall(argument))
+            continue
+        
+        used.update(IDENTIFIER_PATTERN.findall(line))
+        if depth == 0:
+            function = FUNCTION_PATTERN.search(line)
+            if function:
+                if function.group(1) not in KEYWORDS:
+                    declared.add(function.group(1))
+            else:
+                variable = GLOBAL_PATTERN.search(line)
+                if variable and variable.group(1) not in KEYWORDS:
+                    declared.add(variable.group(1))
+        for pattern, message in OLD_SYNTAX_RULES:
+            if pattern.search(line):
+                first = old_syntax.setdefault(message, [number, 0])
+                first[1] += 1
+        
+        # Only arrays declared in function bodies live on the stack
+        position = 0
+        for brace in [*BRACE_PATTERN.finditer(line), None]:
+            end = brace.start() if brace else len(line)
+            segment = line[position:end]
+            if blocks and blocks[-1]:
+                for match in ARRAY_PATTERN.finditer(segment):
+                    if not match.group(1):
+                        arrays.append((number, match))
+            header += segment + " "
+            if brace is None:
+                break
+            position = brace.end()
+            if brace.group() == '{':
+                blocks.append(bool(blocks and blocks[-1]) or bool(
+                    FUNCTION_PATTERN.search(header) and not TYPE_BLOCK_PATTERN.search(header)))
+            elif brace.group() == '}' and blocks:
+                blocks.pop()
+            header = ""
+        depth = len(blocks)
+
+    declared.update(TYPE_PATTERN.findall(code))
+    for block in ENUM_BLOCK_PATTERN.findall(code):
+        declared.update(ENUM_MEMBER_PATTERN.findall(block))
+
+    if not newdecls:
+        for message, (number, count) in old_syntax.items():
+            if count > 1:
+                message += f" ({count} occurrences)"
+            findings.append([number, "lint 003", message])
+    for number, match in arrays:
+        dimensions = [int(size) for size in DIMENSION_PATTERN.findall(match.group(5))]
+        if match.group(3) == "char" or match.group(2) == "String":
+            # Strings are packed four characters to a cell
+            dimensions[-1] = math.ceil(dimensions[-1] / 4)
+        cells = math.prod(dimensions)
+        if cells > stack_cells // 2:
+            findings.append([number, "lint 004",
+                             f"local array '{match.group(4)}' takes {cells} of the {stack_cells} stack cells; "
+                             f"make it static or raise #pragma dynamic"])
+    findings.sort()
+    return {"used": sorted(used), "declared": sorted(declared), "includes": includes, "findings": findings}
+
+
+def analyze_file(path):
+    """Read, hash and analyze one file; return (path, mtime_ns, size, sha1, report).
+
+    Everything but the path is None if the file cannot be read.
+    """
+    try:
+        stat = os.stat(path)
+        with open(path, 'rb') as file:
+            data = file.read()
+    except OSError:
+        return path, None, None, None, None
+    report = analyze_source(data.decode('utf-8', 'replace'))
+    return path, stat.st_mtime_ns, stat.st_size, hashlib.sha1(data).hexdigest(), report
+
+
+def _analyze_files(paths):
+    """Process pool task: analyze a chunk of files."""
+    return [analyze_file(path) for path in paths]
+
+
+class Linter:
+    """Lint engine of a scripting directory with a persistent per-hash report cache.
+
+    Files are identified by their content hash; the hash of each path is
+    memoized by (mtime, size) so unchanged files are only stat'ed. The
+    findings of the latest run of every plugin are kept in a DiagnosticStore.
+    """
+
+    CACHE_NAME = ".lintcache.json"
+
+    # Files per process pool task, and the fewest files worth starting a pool for
+    CHUNK_SIZE = 16
+    POOL_THRESHOLD = 32
+
+    def __init__(self, directory, compiled_directory, include_index):
+        self.directory = directory
+        self.include_index = include_index
+        self.cache_file = os.path.join(compiled_directory, self.CACHE_NAME)
+        self.lock = threading.Lock()
+        self.files = {}
+        self.reports = {}
+        self.dirty = False
+        self.findings = DiagnosticStore()
+        self.load()
+
+    def load(self):
+        """Load the cache from disk, starting empty if it is missing, invalid or outdated."""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            if data.get("version") != LINT_VERSION:
+                raise ValueError("outdated lint cache")
+            self.files = data.get("files", {})
+            self.reports = data.get("reports", {})
+        except (OSError, ValueError):
+            self.files = {}
+            self.reports = {}
+
+    def save(self):
+        """Write the cache to disk atomically if it changed, dropping deleted files and unused reports."""
+        with self.lock:
+            if not self.dirty:
+                return
+            self.files = {path: entry for path, entry in self.files.items() if os.path.exists(path)}
+            hashes = {entry[2] for entry in self.files.values()}
+            self.reports = {sha1: report for sha1, report in self.reports.items() if sha1 in hashes}
+            data = {"version": LINT_VERSION, "files": self.files, "reports": self.reports}
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            temp_file = self.cache_file + ".tmp"
+            with open(temp_file, 'w', encoding='utf-8') as file:
+                json.dump(data, file)
+            os.replace(temp_file, self.cache_file)
+            self.dirty = False
+
+    def _path(self, relpath):
+        """Return the normalized absolute path of a file of the directory."""
+        return os.path.normpath(os.path.join(self.directory, relpath))
+
+    def _cached_report(self, path):
+        """Return the cached report of a file if it is unchanged on disk, else None."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self.lock:
+            entry = self.files.get(path)
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                return self.reports.get(entry[2])
+        return None
+
+    def _store(self, path, mtime, size, sha1, report):
+        """Cache the report of an analyzed file."""
+        with self.lock:
+            self.files[path] = [mtime, size, sha1]
+            self.reports[sha1] = report
+            self.dirty = True
+
+    def run(self, plugins, jobs=None, on_result=None):
+        """Lint plugins and return their LintResults.
+        
+        Files whose report is not cached are analyzed on up to jobs processes.
+        on_result is called with each LintResult as soon as the plugin and
+        every file it includes are analyzed.
+        """
+        plugins = list(dict.fromkeys(plugins))
+        reports = {}
+        resolved = {}
+        declarations = {}
+        closures = {plugin: set() for plugin in plugins}
+        waiting = {plugin: set() for plugin in plugins}
+        dependents = {}
+        requested = set()
+        stale = []
+        results = []
+        cached = set(plugins)
+        
+        def request(path):
+            if path in requested:
+                return
+            requested.add(path)
+            report = self._cached_report(path)
+            if report is None:
+                stale.append(path)
+            else:
+                reports[path] = report
+        
+        def includes_of(path):
+            if path not in resolved:
+                from_directory = os.path.dirname(path)
+                resolved[path] = [
+                    (line, name, self.include_index.resolve_include(name, from_directory))
+                    for line, name in reports[path]["includes"]
+                ]
+            return resolved[path]
+        
+        def visit(plugin, path):
+            # Add a file and what it includes to a plugin's closure, waiting for unanalyzed files
+            pending = [path]
+            while pending:
+                path = pending.pop()
+                if path in closures[plugin]:
+                    continue
+                closures[plugin].add(path)
+                request(path)
+                if path in reports:
+                    pending.extend(include for _, _, include in includes_of(path) if include)
+                else:
+                    waiting[plugin].add(path)
+                    dependents.setdefault(path, set()).add(plugin)
+                    cached.discard(plugin)
+        
+        def finish(plugin):
+            result = LintResult(plugin, self._findings(plugin, reports, includes_of, declarations),
+                                plugin in cached)
+            self.findings.replace(plugin, result.findings)
+            results.append(result)
+            if on_result:
+                on_result(result)
+        
+        def arrived(path, report):
+            reports[path] = report
+            for plugin in dependents.pop(path, ()):
+                waiting[plugin].discard(path)
+                for _, _, include in includes_of(path):
+                    if include:
+                        visit(plugin, include)
+                if not waiting[plugin]:
+                    finish(plugin)
+        
+        for plugin in plugins:
+            visit(plugin, self._path(plugin))
+            if not waiting[plugin]:
+                finish(plugin)
+        
+        jobs = max(1, jobs or os.cpu_count() or 1)
+        pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 and len(stale) >= self.POOL_THRESHOLD else None
+        futures = set()
+        try:
+            while stale or futures:
+                if stale and pool:
+                    while stale:
+                        chunk, stale[:] = stale[:self.CHUNK_SIZE], stale[self.CHUNK_SIZE:]
+                        futures.add(pool.submit(_analyze_files, chunk))
+                if futures:
+                    done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    analyzed = [entry for future in done for entry in future.result()]
+                else:
+                    chunk, stale[:] = stale[:self.CHUNK_SIZE], stale[self.CHUNK_SIZE:]
+                    analyzed = _analyze_files(chunk)
+                for path, mtime, size, sha1, report in analyzed:
+                    if report is None:
+                        report = EMPTY_REPORT
+                    else:
+                        self._store(path, mtime, size, sha1, report)
+                    arrived(path, report)
+        finally:
+            if pool:
+                for future in futures:
+                    future.cancel()
+                pool.shutdown()
+        return results
+
+    def _findings(self, plugin, reports, includes_of, declarations):
+        """Return the Diagnostics of one plugin from the reports of its files."""
+        path = self._path(plugin)
+        report = reports[path]
+        if report is EMPTY_REPORT:
+            return []
+        findings = [Diagnostic(plugin, plugin, line, "warning", code, message)
+                    for line, code, message in report["findings"]]
+        used = set(report["used"])
+        
+        if "myinfo" not in used:
+            findings.append(Diagnostic(plugin, plugin, 1, "warning", "lint 002",
+                                       "no 'public Plugin myinfo' block describing the plugin"))
+        for line, name, include in includes_of(path):
+            if include is None:
+                continue
+            if include not in declarations:
+                declarations[include] = self._declarations(include, reports, includes_of)
+            declared = declarations[include]
+            if declared and declared.isdisjoint(used):
+                findings.append(Diagnostic(plugin, plugin, line, "warning", "lint 001",
+                                           f"unused include <{name}>: none of its declarations is used"))
+        findings.sort(key=lambda diagnostic: diagnostic.line)
+        return findings
+
+    def _declarations(self, include, reports, includes_of):
+        """Return every name an include and the files it pulls in declare."""
+        declared = set()
+        seen = set()
+        pending = [include]
+        while pending:
+            path = pending.pop()
+            if path in seen or path not in reports:
+                continue
+            seen.add(path)
+            declared.update(reports[path]["declared"])
+            pending.extend(included for _, _, included in includes_of(path) if included)
+        return frozenset(declared)
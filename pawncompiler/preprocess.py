@@ -0,0 +1,587 @@
+"""
+Cached preprocessing and syntax pre-check of SourcePawn sources.
+
+Every source and include is read once per (mtime, size) through a memory
+map and lexed into its directives, bracket runs and lexical errors. Expanding
+a plugin then only walks these cached units in memory: #include and
+#tryinclude are resolved like the compiler does, #define / #undef are
+tracked and #if / #elseif / #else / #endif are evaluated where possible.
+The expansion of every include is memoized together with the macros it
+tested, and replayed for the next plugin that includes it in the same state.
+
+The pre-check only reports errors it is certain of, so a plugin it rejects
+would certainly fail to compile: an unconditional include that cannot be
+found, an unterminated string or comment, an unmatched #if / #endif or
+unbalanced brackets in the plugin's own source. Anything depending on a
+condition it cannot evaluate is left to the compiler.
+"""
+
+import mmap
+import os
+import re
+import threading
+from collections import namedtuple
+
+from .diagnostics import Diagnostic
+
+# Lexed source file: items are (kind, line, value) tuples in source order, kind
+# being "directive" (value: (name, argument)), "brackets" (value: the bracket
+# characters of the line) or "error" (value: (code, message)); exact is False
+# when the lexer met something it cannot follow, such as a string continued
+# on the next line
+SourceUnit = namedtuple('SourceUnit', ['path', 'mtime', 'size', 'items', 'exact'])
+
+# Result of expanding a plugin: every file it pulls in, in inclusion order,
+# the macros defined at its end and the certain errors found on the way
+Expansion = namedtuple('Expansion', ['files', 'defines', 'diagnostics'])
+
+DIRECTIVE_PATTERN = re.compile(r'#\s*(\w+)\s*(.*)$', re.DOTALL)
+INCLUDE_ARGUMENT_PATTERN = re.compile(r'[<"]([^>"]+)[>"]')
+DEFINE_PATTERN = re.compile(r'(\w+)(?:\(.*?\))?\s*(.*)$', re.DOTALL)
+TOKEN_PATTERN = re.compile(r'''//|/\*|"(?:[^"\\]|\\.)*("?)|'(?:[^'\\]|\\.)*('?)|[{}()\[\]]''')
+EXPRESSION_TOKEN_PATTERN = re.compile(r'\s*(0x[0-9a-fA-F]+|\d+|\w+|&&|\|\||==|!=|<=|>=|[!()<>+\-*])')
+
+BRACKET_PAIRS = {')': '(', ']': '[', '}': '{'}
+CLOSERS = {opener: closer for closer, opener in BRACKET_PAIRS.items()}
+CONDITIONALS = ("if", "elseif", "else", "endif")
+
+# Value of a macro defined inside a branch whose condition is unknown, and
+# of a macro that is not defined
+UNKNOWN = object()
+MISSING = object()
+
+
+def _strip_directive_comment(text):
+    """Remove the comments from a directive line and report if a block comment stays open."""
+    result = []
+    position = 0
+    while position < len(text):
+        if text.startswith('//', position):
+            break
+        if text.startswith('/*', position):
+            end = text.find('*/', position + 2)
+            if end < 0:
+                return "".join(result).strip(), True
+            position = end + 2
+            continue
+        result.append(text[position])
+        position += 1
+    return "".join(result).strip(), False
+
+
+def lex_source(text):
+    """Lex a source into its directives, bracket runs and lexical errors.
+
+    Returns (items, exact) as stored in a SourceUnit.
+    """
+    items = []
+    exact = True
+    lines = text.split('\n')
+    in_comment = False
+    comment_line = 0
+    index = 0
+    while index < len(lines):
+        line = lines[index].rstrip('\r')
+        number = index + 1
+        index += 1
+        
+        if not in_comment and line.lstrip().startswith('#'):
+            directive = line.strip()
+            while directive.endswith('\\') and index < len(lines):
+                directive = directive[:-1] + " " + lines[index].strip()
+                index += 1
+            directive, in_comment = _strip_directive_comment(directive)
+            if in_comment:
+                comment_line = number
+            match = DIRECTIVE_PATTERN.match(directive)
+            if match:
+                items.append(("directive", number, (match.group(1), match.group(2).strip())))
+                if match.group(1) == "pragma" and match.group(2).startswith("ctrlchar"):
+                    # A different escape character changes how strings end
+                    exact = False
+            continue
+        
+        brackets = []
+        position = 0
+        while True:
+            if in_comment:
+                end = line.find('*/', position)
+                if end < 0:
+                    break
+                in_comment = False
+                position = end + 2
+            match = TOKEN_PATTERN.search(line, position)
+            if not match:
+                break
+            token = match.group()
+            if token == '//':
+                break
+            if token == '/*':
+                in_comment = True
+                comment_line = number
+                position = match.end()
+                continue
+            if token[0] in '"\'' and not (match.group(1) or match.group(2)):
+                if line.rstrip().endswith('\\'):
+                    # A string continued on the next line is beyond this lexer
+                    exact = False
+                elif token[0] == '"':
+                    items.append(("error", number, ("error 037", "invalid string (possibly non-terminated string)")))
+                else:
+                    items.append(("error", number, ("error 027", "invalid character constant")))
+                break
+            if token[0] not in '"\'':
+                brackets.append(token)
+            position = match.end()
+        if brackets:
+            items.append(("brackets", number, "".join(brackets)))
+
+    if in_comment:
+        items.append(("error", comment_line, ("error 001", 'expected token: "*/", but found "-end of file-"')))
+    return items, exact
+
+
+class _ExpressionParser:
+    """Evaluates a #if expression to an int, or None when it depends on unknowns."""
+
+    def __init__(self, text, state):
+        self.tokens = EXPRESSION_TOKEN_PATTERN.findall(text)
+        self.position = 0
+        self.state = state
+
+    def evaluate(self):
+        """Return the value of the expression, or None if it cannot be evaluated."""
+        try:
+            value = self._or()
+        except (IndexError, ValueError):
+            return None
+        return value if self.position == len(self.tokens) else None
+
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _next(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def _or(self):
+        values = [self._and()]
+        while self._peek() == '||':
+            self._next()
+            values.append(self._and())
+        if len(values) == 1:
+            return values[0]
+        if any(values):
+            return 1
+        return None if None in values else 0
+
+    def _and(self):
+        values = [self._compare()]
+        while self._peek() == '&&':
+            self._next()
+            values.append(self._compare())
+        if len(values) == 1:
+            return values[0]
+        if 0 in values:
+            return 0
+        return None if None in values else 1
+
+    def _compare(self):
+        left = self._sum()
+        operator = self._peek()
+        if operator not in ('==', '!=', '<', '>', '<=', '>='):
+            return left
+        self._next()
+        right = self._sum()
+        if left is None or right is None:
+            return None
+        return int({'==': left == right, '!=': left != right, '<': left < right, '>': left > right,
+                    '<=': left <= right, '>=': left >= right}[operator])
+
+    def _sum(self):
+        value = self._unary()
+        while self._peek() in ('+', '-', '*'):
+            operator = self._next()
+            right = self._unary()
+            if value is None or right is None:
+                value = None
+            elif operator == '+':
+                value += right
+            elif operator == '-':
+                value -= right
+            else:
+                value *= right
+        return value
+
+    def _unary(self):
+        token = self._next()
+        if token == '!':
+            value = self._unary()
+            return None if value is None else int(not value)
+        if token == '-':
+            value = self._unary()
+            return None if value is None else -value
+        if token == '(':
+            value = self._or()
+            if self._next() != ')':
+                raise ValueError("unbalanced parentheses")
+            return value
+        if token == 'defined':
+            parenthesized = self._peek() == '('
+            if parenthesized:
+                self._next()
+            value = self.state.is_defined(self._next())
+            if parenthesized and self._next() != ')':
+                raise ValueError("unbalanced parentheses")
+            return value
+        if token[0].isdigit():
+            return int(token, 0)
+        return self.state.value_of(token)
+
+
+class _Recording:
+    """Everything an include contributed to an expansion, so it can be replayed.
+
+    reads holds the macros the include tested that it did not define itself,
+    with the value they had; effects the macros it defined (or MISSING when it
+    undefined them) and files the (normalized path, path, unit) it pulled in.
+    """
+
+    def __init__(self):
+        self.reads = {}
+        self.effects = {}
+        self.files = []
+        self.diagnostics = []
+        self.bracket_macros = False
+        self.tainted = False
+
+
+class _ExpansionState:
+    """Macros, visited files and findings of one plugin expansion.
+
+    Every change goes through these methods so the recordings of the
+    includes being expanded see it too.
+    """
+
+    def __init__(self):
+        self.defines = {}
+        self.files = []
+        self.visited = set()
+        self.diagnostics = []
+        self.recordings = []
+        # Set once something may have been defined that the expansion did not see
+        self.tainted = False
+        # Set once a macro expands to unbalanced brackets
+        self.bracket_macros = False
+
+    def read(self, name):
+        """Return the raw value of a macro (MISSING if undefined), noting the read."""
+        value = self.defines.get(name, MISSING)
+        for recording in self.recordings:
+            if name not in recording.effects:
+                recording.reads.setdefault(name, value)
+        return value
+
+    def define(self, name, value):
+        """Define a macro, or undefine it when value is MISSING."""
+        if value is MISSING:
+            self.defines.pop(name, None)
+        else:
+            self.defines[name] = value
+        for recording in self.recordings:
+            recording.effects[name] = value
+
+    def add_file(self, normalized, path, unit):
+        """Mark a file as included."""
+        self.visited.add(normalized)
+        self.files.append(path)
+        for recording in self.recordings:
+            recording.files.append((normalized, path, unit))
+
+    def add_diagnostic(self, diagnostic):
+        """Record a certain error."""
+        self.diagnostics.append(diagnostic)
+        for recording in self.recordings:
+            recording.diagnostics.append(diagnostic)
+
+    def taint(self):
+        """Note that macros the expansion did not see may be defined."""
+        self.tainted = True
+        for recording in self.recordings:
+            recording.tainted = True
+
+    def mark_bracket_macro(self):
+        """Note that a macro expands to unbalanced brackets."""
+        self.bracket_macros = True
+        for recording in self.recordings:
+            recording.bracket_macros = True
+
+    def is_defined(self, name):
+        """Return 1 or 0 for defined(name), or None if it cannot be known."""
+        value = self.read(name)
+        if value is MISSING:
+            return None if self.tainted else 0
+        return None if value is UNKNOWN else 1
+
+    def value_of(self, name):
+        """Return the integer value of a macro, or None if it has none."""
+        value = self.read(name)
+        if value is MISSING or value is UNKNOWN:
+            return None
+        try:
+            return int(value, 0)
+        except ValueError:
+            return None
+
+
+class Preprocessor:
+    """Memoized source units and plugin expansion over an IncludeIndex's search path."""
+
+    def __init__(self, include_index):
+        self.include_index = include_index
+        self.lock = threading.Lock()
+        self.units = {}
+        self.expansions = {}
+        self.hits = 0
+        self.misses = 0
+        self.replays = 0
+
+    def unit(self, path):
+        """Return the lexed SourceUnit of a file, re-reading it only when it changed."""
+        stat = os.stat(path)
+        with self.lock:
+            unit = self.units.get(path)
+            if unit and unit.mtime == stat.st_mtime_ns and unit.size == stat.st_size:
+                self.hits += 1
+                return unit
+            self.misses += 1
+        
+        with open(path, 'rb') as file:
+            if stat.st_size:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    text = mapped[:].decode('utf-8', 'replace')
+            else:
+                text = ""
+        items, exact = lex_source(text)
+        unit = SourceUnit(path, stat.st_mtime_ns, stat.st_size, items, exact)
+        with self.lock:
+            self.units[path] = unit
+        return unit
+
+    def expand(self, plugin):
+        """Expand a plugin and its includes and return its Expansion."""
+        path = os.path.join(self.include_index.directory, plugin)
+        state = _ExpansionState()
+        self._expand(plugin, path, state, True)
+        return Expansion(state.files, {name: value for name, value in state.defines.items() if value is not UNKNOWN},
+                         state.diagnostics)
+
+    def check(self, plugin):
+        """Return the Diagnostics of the errors a plugin certainly has, empty if none are known."""
+        return self.expand(plugin).diagnostics
+
+    def _expand(self, plugin, path, state, is_plugin):
+        """Expand one file, replaying the memoized expansion of an include when it still applies."""
+        # The compiler includes every file at most once
+        normalized = os.path.normcase(os.path.abspath(path))
+        if normalized in state.visited:
+            return
+        if is_plugin or state.tainted:
+            self._walk(plugin, normalized, path, state, is_plugin)
+            return
+        if self._replay(plugin, normalized, state):
+            return
+        
+        recording = _Recording()
+        state.recordings.append(recording)
+        try:
+            self._walk(plugin, normalized, path, state, is_plugin)
+        finally:
+            state.recordings.pop()
+        if not recording.tainted:
+            with self.lock:
+                self.expansions[normalized] = recording
+
+    def _replay(self, plugin, normalized, state):
+        """Apply the recorded expansion of an include if nothing it depends on changed."""
+        with self.lock:
+            recording = self.expansions.get(normalized)
+        if recording is None:
+            return False
+        if any(file in state.visited for file, _, _ in recording.files):
+            return False
+        if any(state.defines.get(name, MISSING) is not value and state.defines.get(name, MISSING) != value
+               for name, value in recording.reads.items()):
+            return False
+        try:
+            if any(self.unit(path) is not unit for _, path, unit in recording.files):
+                return False
+        except OSError:
+            return False
+        
+        with self.lock:
+            self.replays += 1
+        for name in recording.reads:
+            state.read(name)
+        for file, path, unit in recording.files:
+            state.add_file(file, path, unit)
+        for name, value in recording.effects.items():
+            state.define(name, value)
+        for diagnostic in recording.diagnostics:
+            state.add_diagnostic(diagnostic._replace(plugin=plugin))
+        if recording.bracket_macros:
+            state.mark_bracket_macro()
+        return True
+
+    def _walk(self, plugin, normalized, path, state, is_plugin):
+        """Walk one file's cached unit, recursing into the includes it pulls in."""
+        unit = self.unit(path)
+        state.add_file(normalized, path, unit)
+        
+        def error(line, code, message):
+            state.add_diagnostic(Diagnostic(plugin, path, line, 'error', code, message))
+        
+        # Conditional frames: [mode, taken] with mode "on", "off" or "unknown"
+        # and taken whether an earlier branch was taken (None if unknown)
+        frames = []
+        brackets = []
+        bracket_error = None
+        brackets_known = is_plugin and unit.exact
+        for kind, line, value in unit.items:
+            mode = frames[-1][0] if frames else "on"
+            if kind == "directive":
+                name, argument = value
+                if name in CONDITIONALS:
+                    if not self._conditional(name, argument, frames, state):
+                        if unit.exact:
+                            error(line, "error 026", f'no matching "#if" for "#{name}"')
+                        return
+                    continue
+                if mode == "off":
+                    continue
+                if mode == "unknown":
+                    state.taint()
+                    brackets_known = False
+                if name in ("include", "tryinclude"):
+                    self._include(plugin, path, line, name, argument, mode, state, error)
+                elif name == "define":
+                    match = DEFINE_PATTERN.match(argument)
+                    if match:
+                        body = match.group(2)
+                        state.define(match.group(1), body if mode == "on" else UNKNOWN)
+                        if any(body.count(opener) != body.count(closer) for closer, opener in BRACKET_PAIRS.items()):
+                            state.mark_bracket_macro()
+                elif name == "undef" and argument:
+                    state.define(argument.split()[0], MISSING if mode == "on" else UNKNOWN)
+                elif name == "endinput":
+                    if mode == "on":
+                        break
+                    brackets_known = False
+            elif mode == "off":
+                continue
+            elif mode == "unknown":
+                brackets_known = False
+            elif kind == "error":
+                if is_plugin and unit.exact:
+                    error(line, *value)
+            elif kind == "brackets" and brackets_known and bracket_error is None:
+                for char in value:
+                    if char in BRACKET_PAIRS:
+                        if not brackets or brackets[-1][0] != BRACKET_PAIRS[char]:
+                            bracket_error = (line, CLOSERS[brackets[-1][0]] if brackets else None, char)
+                            break
+                        brackets.pop()
+                    else:
+                        brackets.append((char, line))
+        else:
+            if frames and unit.exact:
+                error(unit.items[-1][1] if unit.items else 1, "error 001",
+                      'expected token: "#endif", but found "-end of file-"')
+        
+        # Brackets are only judged in the plugin itself, once every include
+        # has been seen and no macro can hide a bracket
+        if not brackets_known or state.bracket_macros:
+            return
+        if bracket_error:
+            line, expected, found = bracket_error
+            if expected:
+                error(line, "error 001", f'expected token: "{expected}", but found "{found}"')
+            else:
+                error(line, "error 054", f'unmatched closing brace ("{found}")')
+        elif brackets:
+            char, line = brackets[-1]
+            closer = CLOSERS[char]
+            error(line, "error 001", f'expected token: "{closer}", but found "-end of file-"')
+
+    def _conditional(self, name, argument, frames, state):
+        """Apply a conditional directive to the frame stack; return False if it has no #if."""
+        if name == "if":
+            parent = frames[-1][0] if frames else "on"
+            if parent == "off":
+                frames.append(["off", True])
+                return True
+            value = _ExpressionParser(argument, state).evaluate()
+            taken = None if value is None else bool(value)
+            frames.append([self._mode(parent, taken), taken])
+            return True
+        
+        if not frames:
+            return False
+        if name == "endif":
+            frames.pop()
+            return True
+        
+        parent = frames[-2][0] if len(frames) > 1 else "on"
+        frame = frames[-1]
+        if parent == "off":
+            return True
+        if name == "else":
+            branch = None if frame[1] is None else not frame[1]
+            frame[0] = self._mode(parent, branch)
+            frame[1] = None if frame[1] is None else True
+            return True
+        
+        # elseif: only taken if no earlier branch was
+        if frame[1]:
+            frame[0] = "off"
+            return True
+        value = _ExpressionParser(argument, state).evaluate()
+        branch = None if value is None or frame[1] is None else bool(value)
+        frame[0] = self._mode(parent, branch)
+        frame[1] = branch
+        return True
+
+    @staticmethod
+    def _mode(parent, taken):
+        """Return the mode of a branch given its parent's mode and whether it is taken."""
+        if taken is False:
+            return "off"
+        if taken is None or parent == "unknown":
+            return "unknown"
+        return "on"
+
+    def _include(self, plugin, path, line, name, argument, mode, state, error):
+        """Resolve an include directive and expand the file it names."""
+        match = INCLUDE_ARGUMENT_PATTERN.search(argument)
+        if not match:
+            return
+        include_name = match.group(1).strip()
+        include_path = self.include_index.resolve_include(include_name, os.path.dirname(path))
+        if include_path is None:
+            # Whatever the include would have defined is unknown. The search
+            # path covers the compiler's include folder; a missing include is
+            # only reported in a project with its own include folder
+            state.taint()
+            if name == "include" and mode == "on" and os.path.isdir(self.include_index.include_directory):
+                error(line, "fatal error 417", f'cannot read from file: "{include_name}"')
+            return
+        if mode == "unknown":
+            # Whatever the include defines may or may not apply
+            state.taint()
+            return
+        try:
+            self._expand(plugin, include_path, state, False)
+        except OSError:
+            if name == "include":
+                error(line, "fatal error 417", f'cannot read from file: "{include_name}"')
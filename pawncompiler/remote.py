@@ -0,0 +1,675 @@
+"""
+Build offload to worker processes over TCP or Unix sockets.
+
+A BuildWorker runs its local compiler for remote engines. The engine's
+RemoteBuildPool ships each group of plugins together with the include files
+they resolve to, streams the compiler output back line by line and writes
+the returned .smx files into the compiled folder, so a batch fans out over
+the slots of every worker while the build cache, diagnostics and artifact
+store stay on the client.
+
+Files travel as content-addressed blobs: before a compile the client asks
+which hashes the worker lacks and sends only those, and workers keep blobs
+on disk, so an unchanged include reaches each worker once. Blobs unused for
+long or beyond the worker's size budget are pruned. Every message is a frame
+of two big-endian 32-bit lengths followed by a JSON header and a binary
+payload.
+
+Workers do not authenticate clients, so they listen on the loopback
+interface unless given another address on a trusted network:
+
+    python -m pawncompiler worker --listen 127.0.0.1:7650 --compiler ./spcomp
+    python -m pawncompiler build path/to/scripting --remote 127.0.0.1:7650 --remote unix:/tmp/pawn.sock
+"""
+
+import hashlib
+import json
+import os
+import re
+import select
+import shutil
+import socket
+import socketserver
+import struct
+import tempfile
+import threading
+import time
+import uuid
+
+from .service import CompileService
+from .timing import wait_with_cpu_time
+
+PROTOCOL_VERSION = 1
+
+# Frame prefix: header length and payload length
+FRAME = struct.Struct('>II')
+MAX_HEADER_BYTES = 16 * 1024 * 1024
+MAX_PAYLOAD_BYTES = 256 * 1024 * 1024
+
+HASH_PATTERN = re.compile(r'^[0-9a-f]{40}$')
+
+
+class RemoteError(OSError):
+    """A worker could not be reached, broke the protocol or rejected a request."""
+
+
+class WorkerError(RemoteError):
+    """A worker rejected a request."""
+
+
+def _discard(message, tag=None):
+    """Log callback that drops every message."""
+
+
+def parse_address(address):
+    """Return ("unix", path) or ("tcp", (host, port)) for a worker address.
+
+    Accepts "host:port", ":port", "[v6 address]:port", "unix:PATH" and bare
+    socket paths. An empty host means every interface to a server and this
+    machine to a client.
+    """
+    if address.startswith("unix:"):
+        return "unix", address[5:]
+    if "/" in address or os.sep in address:
+        return "unix", address
+    host, _, port = address.rpartition(":")
+    if not port.isdigit():
+        raise ValueError(f"invalid worker address: {address}")
+    return "tcp", (host.strip("[]"), int(port))
+
+
+def send_message(sock, header, payload=b""):
+    """Send one frame."""
+    data = json.dumps(header).encode('utf-8')
+    sock.sendall(FRAME.pack(len(data), len(payload)) + data)
+    if payload:
+        sock.sendall(payload)
+
+
+def receive_message(file):
+    """Read one frame from a buffered socket file and return (header, payload), or (None, None) at EOF."""
+    prefix = file.read(FRAME.size)
+    if not prefix:
+        return None, None
+    if len(prefix) < FRAME.size:
+        raise RemoteError("connection closed in the middle of a message")
+    header_size, payload_size = FRAME.unpack(prefix)
+    if header_size > MAX_HEADER_BYTES or payload_size > MAX_PAYLOAD_BYTES:
+        raise RemoteError("message too large")
+    data = file.read(header_size)
+    payload = file.read(payload_size) if payload_size else b""
+    if len(data) < header_size or len(payload) < payload_size:
+        raise RemoteError("connection closed in the middle of a message")
+    try:
+        header = json.loads(data)
+    except ValueError:
+        raise RemoteError("malformed message header") from None
+    if not isinstance(header, dict):
+        raise RemoteError("malformed message header")
+    return header, payload
+
+
+class BlobStore:
+    """Files of a worker stored once by their sha1.
+
+    Every lookup refreshes a blob's modification time, so it records its
+    last use. prune deletes the blobs unused for max_age seconds, then the
+    least recently used ones until the store fits max_bytes. Blobs used in
+    the last RECENT_SECONDS are always kept, since a client may be about to
+    compile with them.
+    """
+
+    RECENT_SECONDS = 3600
+
+    # Most time between two prunes while the store fits its budget
+    PRUNE_INTERVAL = 3600
+
+    def __init__(self, directory, max_bytes=None, max_age=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.prune_lock = threading.Lock()
+        self.size = None
+        self.pruned = None
+
+    def path(self, sha1):
+        """Return the path of a blob; the hash is validated so it can never name another file."""
+        if not isinstance(sha1, str) or not HASH_PATTERN.match(sha1):
+            raise RemoteError(f"invalid blob hash: {sha1!r}")
+        return os.path.join(self.directory, sha1[:2], sha1)
+
+    def has(self, sha1):
+        """Return True if the blob is stored, marking it as used."""
+        path = self.path(sha1)
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError:
+            return os.path.exists(path)
+
+    def put(self, sha1, data):
+        """Store a blob after checking it matches its hash."""
+        path = self.path(sha1)
+        if hashlib.sha1(data).hexdigest() != sha1:
+            raise RemoteError(f"blob does not match its hash: {sha1}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Connections may store the same blob at once
+        temp_file = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_file, 'wb') as file:
+            file.write(data)
+        added = not os.path.exists(path)
+        os.replace(temp_file, path)
+        with self.lock:
+            if added and self.size is not None:
+                self.size += len(data)
+
+    def prune_due(self):
+        """Return True if the store outgrew its budget or has not been pruned for PRUNE_INTERVAL."""
+        with self.lock:
+            if self.pruned is None or time.monotonic() - self.pruned >= self.PRUNE_INTERVAL:
+                return True
+            return bool(self.max_bytes and self.size > self.max_bytes)
+
+    def prune(self):
+        """Delete expired and least recently used blobs and return (blobs, bytes) removed."""
+        if not self.prune_lock.acquire(blocking=False):
+            return 0, 0
+        try:
+            blobs = []
+            for folder, _, names in os.walk(self.directory):
+                for name in names:
+                    path = os.path.join(folder, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    blobs.append((stat.st_mtime, stat.st_size, path))
+            blobs.sort()
+            
+            now = time.time()
+            total = sum(size for _, size, _ in blobs)
+            removed = freed = 0
+            for used, size, path in blobs:
+                if now - used < self.RECENT_SECONDS:
+                    break
+                expired = self.max_age is not None and now - used > self.max_age
+                if not expired and not (self.max_bytes and total > self.max_bytes):
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+                freed += size
+            with self.lock:
+                self.size = total
+                self.pruned = time.monotonic()
+            return removed, freed
+        finally:
+            self.prune_lock.release()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Serves one client connection."""
+
+    def handle(self):
+        self.server.worker._serve(self.connection, self.rfile)
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _TCP6Server(_TCPServer):
+    address_family = socket.AF_INET6
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+class BuildWorker:
+    """Compile server running a local compiler on behalf of remote engines.
+
+    Every compile runs in a fresh sandbox under root/jobs that holds the
+    files it was sent at their paths in the client's scripting directory,
+    copied from the blob store. The compiler is started there on the
+    sources, its output lines are sent back with the sandbox path removed,
+    then every compiled/<name>.smx it wrote. At most slots compiles run at
+    once; further requests wait for a free slot. The blob store is kept to
+    max_bytes and max_age seconds, see BlobStore.
+    """
+
+    def __init__(self, address, compiler_path, root=None, slots=None, log=None, max_bytes=None, max_age=None):
+        self.kind, self.address = parse_address(address)
+        self.root = root or os.path.join(tempfile.gettempdir(), "pawncompiler-worker")
+        self.service = CompileService(compiler_path, self.root)
+        self.slots = max(1, slots or os.cpu_count() or 1)
+        self.log = log or _discard
+        self.blobs = BlobStore(os.path.join(self.root, "blobs"), max_bytes, max_age)
+        self.jobs_directory = os.path.join(self.root, "jobs")
+        self.semaphore = threading.BoundedSemaphore(self.slots)
+        self.server = None
+        self.thread = None
+
+    def bind(self):
+        """Open the listening socket and return the address it is bound to."""
+        if self.kind == "unix":
+            if not hasattr(socketserver, 'UnixStreamServer'):
+                raise RemoteError("Unix sockets are not supported on this platform")
+            try:
+                os.remove(self.address)
+            except FileNotFoundError:
+                pass
+            self.server = _UnixServer(self.address, _Handler)
+        else:
+            server_class = _TCP6Server if ":" in self.address[0] else _TCPServer
+            self.server = server_class(self.address, _Handler)
+        self.server.worker = self
+        return self.server.server_address
+
+    def serve_forever(self):
+        """Serve clients until stop is called."""
+        if self.server is None:
+            self.bind()
+        self.server.serve_forever()
+
+    def start(self):
+        """Serve clients on a daemon thread and return the bound address."""
+        address = self.bind()
+        self.thread = threading.Thread(target=self.server.serve_forever, name="BuildWorker")
+        self.thread.daemon = True
+        self.thread.start()
+        return address
+
+    def stop(self):
+        """Stop serving and close the listening socket."""
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        if self.kind == "unix":
+            try:
+                os.remove(self.address)
+            except OSError:
+                pass
+
+    def _serve(self, connection, file):
+        """Answer the requests of one connection until the client disconnects."""
+        if self.kind == "tcp":
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            while True:
+                header, payload = receive_message(file)
+                if header is None:
+                    return
+                request = header.get("op")
+                if request == "hello":
+                    if header.get("version") != PROTOCOL_VERSION:
+                        raise RemoteError(f"unsupported protocol version: {header.get('version')}")
+                    send_message(connection, {"op": "hello", "version": PROTOCOL_VERSION, "slots": self.slots})
+                elif request == "missing":
+                    hashes = [sha1 for sha1 in header.get("hashes", []) if not self.blobs.has(sha1)]
+                    send_message(connection, {"op": "missing", "hashes": hashes})
+                elif request == "blob":
+                    self.blobs.put(header.get("hash"), payload)
+                elif request == "compile":
+                    self._compile(connection, header.get("sources", []), header.get("files", {}))
+                    if self.blobs.prune_due():
+                        self._prune()
+                else:
+                    raise RemoteError(f"unknown request: {request}")
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            self.log(f"Connection error: {e}", "warning")
+            try:
+                send_message(connection, {"op": "error", "message": str(e)})
+            except OSError:
+                pass
+
+    def _prune(self):
+        """Prune the blob store, logging what was removed."""
+        removed, freed = self.blobs.prune()
+        if removed:
+            self.log(f"Pruned {removed} blob(s), {freed / (1024 * 1024):.1f} MiB", "info")
+
+    def _sandbox_path(self, sandbox, name):
+        """Return the path of a file name of the scripting directory inside a sandbox.
+        
+        The compiled folder is where the compiler writes, so no file is
+        accepted there.
+        """
+        parts = name.split("/") if isinstance(name, str) else []
+        if not parts or any(part in ("", ".", "..") or "\\" in part or ":" in part for part in parts):
+            raise RemoteError(f"invalid file name: {name!r}")
+        if parts[0].lower() == "compiled":
+            raise RemoteError(f"files in the compiled folder are not accepted: {name!r}")
+        return os.path.join(sandbox, *parts)
+
+    def _compile(self, connection, sources, files):
+        """Run one compile request and send back its output, .smx files and return code."""
+        with self.semaphore:
+            sandbox = os.path.join(self.jobs_directory, uuid.uuid4().hex)
+            try:
+                for name, sha1 in files.items():
+                    if not self.blobs.has(sha1):
+                        raise RemoteError(f"missing blob for {name}")
+                    path = self._sandbox_path(sandbox, name)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    # A copy, never a link: the compiler must not be able to
+                    # change a blob other compiles use
+                    shutil.copyfile(self.blobs.path(sha1), path)
+                paths = [os.path.relpath(self._sandbox_path(sandbox, source), sandbox) for source in sources]
+                self.log(f"Compiling {', '.join(sources)}", "info")
+                returncode, cpu = self._run_compiler(connection, sandbox, paths)
+                
+                for source in sources:
+                    name = os.path.splitext(source.rsplit("/", 1)[-1])[0] + ".smx"
+                    compiled_file = os.path.join(sandbox, "compiled", name)
+                    if os.path.isfile(compiled_file):
+                        with open(compiled_file, 'rb') as file:
+                            send_message(connection, {"op": "artifact", "source": source}, file.read())
+                send_message(connection, {"op": "done", "returncode": returncode, "cpu": cpu})
+            finally:
+                shutil.rmtree(sandbox, ignore_errors=True)
+
+    def _run_compiler(self, connection, sandbox, paths):
+        """Run the compiler in a sandbox, streaming its output; kill it if the client goes away."""
+        process = self.service.spawn(paths, cwd=sandbox)
+        prefix = sandbox + os.sep
+        done = threading.Event()
+        watcher = threading.Thread(target=self._watch_client, args=(connection, process, done))
+        watcher.daemon = True
+        watcher.start()
+        try:
+            process.stdin.close()
+            for line in process.stdout:
+                line = line.rstrip().replace(prefix, "")
+                if line:
+                    send_message(connection, {"op": "output", "line": line})
+            return wait_with_cpu_time(process)
+        except OSError:
+            process.kill()
+            process.wait()
+            raise
+        finally:
+            done.set()
+            process.stdout.close()
+
+    def _watch_client(self, connection, process, done):
+        """Kill the compiler as soon as the client disconnects, even while it prints nothing."""
+        while not done.is_set():
+            try:
+                readable, _, _ = select.select([connection], [], [], 0.5)
+                if not readable:
+                    continue
+                # Clients send nothing during a compile, so readable means closed
+                if not connection.recv(1, socket.MSG_PEEK):
+                    process.kill()
+                return
+            except (OSError, ValueError):
+                process.kill()
+                return
+
+
+class _Connection:
+    """One open connection to a worker."""
+
+    def __init__(self, worker, sock):
+        self.worker = worker
+        self.socket = sock
+        self.file = sock.makefile('rb')
+
+    def send(self, header, payload=b""):
+        """Send one frame."""
+        send_message(self.socket, header, payload)
+
+    def receive(self):
+        """Read one frame, raising RemoteError if the worker reported an error or disconnected."""
+        header, payload = receive_message(self.file)
+        if header is None:
+            raise RemoteError(f"{self.worker.address} closed the connection")
+        if header.get("op") == "error":
+            raise WorkerError(f"{self.worker.address}: {header.get('message')}")
+        return header, payload
+
+    def close(self):
+        """Close the connection, waking up any thread blocked on it."""
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.file.close()
+        self.socket.close()
+
+
+class _Worker:
+    """Client side state of one worker address."""
+
+    def __init__(self, address):
+        self.address = address
+        self.kind, self.target = parse_address(address)
+        self.slots = None
+        self.busy = 0
+        self.idle = []
+        self.retry_at = 0.0
+
+
+class RemoteJob:
+    """A compile running on a worker.
+
+    Iterate lines() for the compiler output; the .smx files are written to
+    their output paths as they arrive, and returncode and cpu are set once
+    the output is complete. kill() aborts the compile and close() hands the
+    connection back to the pool.
+    """
+
+    def __init__(self, pool, worker, connection, outputs):
+        self.pool = pool
+        self.worker = worker
+        self.connection = connection
+        self.outputs = outputs
+        self.returncode = None
+        self.cpu = None
+        self.finished = False
+        self.killed = False
+
+    def lines(self):
+        """Yield the compiler output lines until the worker reports the return code."""
+        while True:
+            header, payload = self.connection.receive()
+            message = header.get("op")
+            if message == "output":
+                yield header.get("line", "")
+            elif message == "artifact":
+                self._write(header.get("source"), payload)
+            elif message == "done":
+                self.returncode = header.get("returncode")
+                self.cpu = header.get("cpu")
+                self.finished = True
+                return
+            else:
+                raise RemoteError(f"unexpected message from {self.worker.address}: {message}")
+
+    def _write(self, source, data):
+        """Write a returned .smx to the output path of its source atomically."""
+        path = self.outputs.get(source)
+        if path is None:
+            return
+        temp_file = path + ".part"
+        with open(temp_file, 'wb') as file:
+            file.write(data)
+        os.replace(temp_file, path)
+
+    def kill(self):
+        """Abort the compile; the worker kills its compiler once the connection drops."""
+        self.killed = True
+        try:
+            self.connection.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def close(self):
+        """Return the connection to the pool, or drop it if the compile did not finish."""
+        self.pool._release(self.worker, self.connection, self.finished and not self.killed)
+
+
+class RemoteBuildPool:
+    """Client of a set of build workers.
+
+    Each compile goes to the least busy reachable worker with a free slot,
+    over a connection kept open for the next compile. A worker that cannot
+    be reached is skipped for RETRY_SECONDS.
+    """
+
+    RETRY_SECONDS = 30
+
+    def __init__(self, addresses, timeout=10.0):
+        self.workers = [_Worker(address) for address in addresses]
+        if not self.workers:
+            raise ValueError("no worker addresses given")
+        self.timeout = timeout
+        self.condition = threading.Condition()
+
+    def capacity(self):
+        """Contact the workers not reached yet and return the slots of every reachable worker."""
+        for worker in self.workers:
+            if worker.slots is None and worker.retry_at <= time.monotonic():
+                try:
+                    connection = self._connect(worker)
+                except OSError:
+                    with self.condition:
+                        worker.retry_at = time.monotonic() + self.RETRY_SECONDS
+                    continue
+                with self.condition:
+                    worker.idle.append(connection)
+        with self.condition:
+            return sum(worker.slots for worker in self.workers
+                       if worker.slots and worker.retry_at <= time.monotonic())
+
+    def close(self):
+        """Close every idle connection."""
+        with self.condition:
+            for worker in self.workers:
+                for connection in worker.idle:
+                    connection.close()
+                worker.idle = []
+
+    def _connect(self, worker):
+        """Open a connection to a worker and learn its slots."""
+        if worker.kind == "unix":
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(worker.target)
+            except OSError:
+                sock.close()
+                raise
+        else:
+            host, port = worker.target
+            sock = socket.create_connection((host or "localhost", port), self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = _Connection(worker, sock)
+        try:
+            connection.send({"op": "hello", "version": PROTOCOL_VERSION})
+            header, _ = connection.receive()
+            if header.get("version") != PROTOCOL_VERSION:
+                raise RemoteError(f"{worker.address} speaks protocol version {header.get('version')}")
+        except (OSError, ValueError, TypeError):
+            connection.close()
+            raise
+        # Compiles may run for a long time once the worker answered
+        sock.settimeout(None)
+        with self.condition:
+            worker.slots = max(1, int(header.get("slots", 1)))
+        return connection
+
+    def _acquire(self):
+        """Wait for a free slot and return (worker, connection)."""
+        while True:
+            with self.condition:
+                while True:
+                    now = time.monotonic()
+                    reachable = [worker for worker in self.workers if worker.retry_at <= now]
+                    if not reachable:
+                        raise RemoteError("no build worker is reachable")
+                    free = [worker for worker in reachable if worker.slots is None or worker.busy < worker.slots]
+                    if free:
+                        break
+                    self.condition.wait(1.0)
+                worker = min(free, key=lambda worker: worker.busy / (worker.slots or 1))
+                worker.busy += 1
+                connection = worker.idle.pop() if worker.idle else None
+            if connection is not None:
+                return worker, connection
+            try:
+                return worker, self._connect(worker)
+            except OSError:
+                with self.condition:
+                    worker.busy -= 1
+                    worker.retry_at = time.monotonic() + self.RETRY_SECONDS
+                    self.condition.notify_all()
+
+    def _release(self, worker, connection, reuse):
+        """Give back a slot, keeping the connection open if it can be reused."""
+        if not reuse:
+            connection.close()
+        with self.condition:
+            worker.busy -= 1
+            if reuse:
+                worker.idle.append(connection)
+            self.condition.notify_all()
+
+    def start(self, sources, files, outputs):
+        """Send a compile to a worker and return its RemoteJob.
+        
+        sources are the plugins to compile and files maps every file they
+        use, named relative to the scripting directory with / separators,
+        to its (path, sha1); outputs maps each source to the path its .smx
+        is written to. Only the files the worker does not hold are sent. A
+        connection that fails before the compile starts is retried on a new
+        connection.
+        """
+        attempts = len(self.workers) + 1
+        while True:
+            worker, connection = self._acquire()
+            try:
+                hashes = self._send_files(worker, connection, files)
+                connection.send({"op": "compile", "sources": sources, "files": hashes})
+                return RemoteJob(self, worker, connection, outputs)
+            except WorkerError:
+                self._release(worker, connection, False)
+                raise
+            except (RemoteError, ConnectionError, socket.timeout):
+                # Usually an idle connection the worker dropped
+                self._release(worker, connection, False)
+                attempts -= 1
+                if not attempts:
+                    raise RemoteError(f"lost the connection to {worker.address}")
+            except BaseException:
+                self._release(worker, connection, False)
+                raise
+
+    def _send_files(self, worker, connection, files):
+        """Send the files the worker lacks and return the name -> sha1 map of the compile."""
+        hashes = {name: sha1 for name, (_, sha1) in files.items()}
+        connection.send({"op": "missing", "hashes": sorted(set(hashes.values()))})
+        header, _ = connection.receive()
+        missing = set(header.get("hashes", ()))
+        for name, (path, sha1) in files.items():
+            if sha1 not in missing:
+                continue
+            with open(path, 'rb') as file:
+                data = file.read()
+            # Send what is on disk now, even if the file changed since it was hashed
+            actual = hashlib.sha1(data).hexdigest()
+            if actual == sha1:
+                missing.discard(sha1)
+            hashes[name] = actual
+            connection.send({"op": "blob", "hash": actual}, data)
+        return hashes
@@ -0,0 +1,294 @@
+"""
+Directory scanning and filesystem watching for SourcePawn scripting directories.
+"""
+
+import os
+import sys
+import json
+import ctypes
+import select
+import struct
+import threading
+from collections import deque, namedtuple
+
+# Directory listing record: file name, modification time (ns) and size in bytes
+FileEntry = namedtuple('FileEntry', ['name', 'mtime', 'size'])
+
+# Listing snapshot kept in the compiled folder between sessions
+LISTING_NAME = ".listing.json"
+LISTING_VERSION = 1
+
+
+def scan_directory(directory, previous=None, extension='.sp'):
+    """List the files with the given extension in one os.scandir pass.
+    
+    Returns a dict of name -> FileEntry. DirEntry.stat() is served from the
+    directory listing itself on Windows, so no per-file syscalls are made
+    there. Records from a previous scan are reused when unchanged.
+    """
+    previous = previous or {}
+    entries = {}
+    with os.scandir(directory) as iterator:
+        for entry in iterator:
+            if not entry.name.endswith(extension):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+            record = previous.get(entry.name)
+            if record is None or record.mtime != stat.st_mtime_ns or record.size != stat.st_size:
+                record = FileEntry(entry.name, stat.st_mtime_ns, stat.st_size)
+            entries[entry.name] = record
+    return entries
+
+
+def load_listing(compiled_directory):
+    """Return the listing saved by save_listing as name -> FileEntry, or {} if there is none.
+    
+    The snapshot may be stale; it only lets a listing be shown before the
+    directory itself has been scanned.
+    """
+    try:
+        with open(os.path.join(compiled_directory, LISTING_NAME), 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        if data.get("version") != LISTING_VERSION:
+            return {}
+        return {name: FileEntry(name, mtime, size) for name, mtime, size in data.get("files", [])}
+    except (OSError, ValueError, TypeError):
+        return {}
+
+
+def save_listing(compiled_directory, entries):
+    """Write a name -> FileEntry listing to the compiled folder atomically."""
+    path = os.path.join(compiled_directory, LISTING_NAME)
+    os.makedirs(compiled_directory, exist_ok=True)
+    temp_file = path + ".tmp"
+    with open(temp_file, 'w', encoding='utf-8') as file:
+        json.dump({"version": LISTING_VERSION, "files": [list(entry) for entry in entries.values()]}, file)
+    os.replace(temp_file, path)
+
+
+class DirectoryWatcher:
+    """Background watcher reporting file deltas in a scripting directory.
+    
+    Watches the top-level .sp and .inc files and the include/ folder. On
+    Linux it waits on inotify events and only re-stats the names that
+    changed; elsewhere, or if inotify is unavailable, it falls back to
+    polling with scan_directory. Deltas are reported as
+    callback(added, removed, modified), where added and modified map a path
+    relative to the directory to its FileEntry and removed lists paths.
+    The callback runs on the watcher thread. An initial snapshot of the .sp
+    files the caller already lists can be passed so nothing changed between
+    that listing and the watcher starting is missed.
+    """
+
+    # inotify constants from <sys/inotify.h>
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+                  IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+    def __init__(self, directory, callback, initial=None, interval=2.0, debounce=0.2):
+        self.directory = directory
+        self.include_directory = os.path.join(directory, "include")
+        self.callback = callback
+        self.interval = interval
+        self.debounce = debounce
+        self.snapshot = dict(initial or {})
+        self.seeded = initial is not None
+        self.backend = None
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Start watching on a daemon thread."""
+        self.thread = threading.Thread(target=self._run, name="DirectoryWatcher")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """Stop watching; the thread exits within one wait interval."""
+        self.stop_event.set()
+
+    def _scan(self):
+        """Return a full snapshot of the watched files keyed by relative path."""
+        snapshot = dict(scan_directory(self.directory, self.snapshot, extension=('.sp', '.inc')))
+        if os.path.isdir(self.include_directory):
+            previous = {os.path.basename(path): record for path, record in self.snapshot.items()
+                        if os.path.dirname(path) == "include"}
+            for name, record in scan_directory(self.include_directory, previous, extension='.inc').items():
+                snapshot[os.path.join("include", name)] = record
+        return snapshot
+
+    def _diff(self, new_snapshot, paths=None):
+        """Report the differences between the current and a new snapshot."""
+        paths = set(self.snapshot) | set(new_snapshot) if paths is None else paths
+        added, removed, modified = {}, [], {}
+        for path in paths:
+            old = self.snapshot.get(path)
+            new = new_snapshot.get(path)
+            if old is new:
+                continue
+            if old is None:
+                added[path] = new
+            elif new is None:
+                removed.append(path)
+            elif old.mtime != new.mtime or old.size != new.size:
+                modified[path] = new
+        for path in paths:
+            if path in new_snapshot:
+                self.snapshot[path] = new_snapshot[path]
+            else:
+                self.snapshot.pop(path, None)
+        if added or removed or modified:
+            self.callback(added, removed, modified)
+
+    def _stat(self, path):
+        """Return a fresh FileEntry for a watched path, or None if it is gone."""
+        try:
+            stat = os.stat(os.path.join(self.directory, path))
+        except OSError:
+            return None
+        old = self.snapshot.get(path)
+        if old is not None and old.mtime == stat.st_mtime_ns and old.size == stat.st_size:
+            return old
+        return FileEntry(os.path.basename(path), stat.st_mtime_ns, stat.st_size)
+
+    def _run(self):
+        """Thread function choosing the watcher backend."""
+        try:
+            snapshot = self._scan()
+            if self.seeded:
+                # Catch up on .sp changes made since the caller's own listing
+                self._diff(snapshot, {path for path in [*self.snapshot, *snapshot] if path.endswith('.sp')})
+            self.snapshot = snapshot
+        except OSError:
+            pass
+        if sys.platform.startswith('linux'):
+            try:
+                self._run_inotify()
+                return
+            except OSError:
+                pass
+        self._run_polling()
+
+    def _run_polling(self):
+        """Rescan the directory every interval and report the differences."""
+        self.backend = "polling"
+        while not self.stop_event.wait(self.interval):
+            try:
+                self._diff(self._scan())
+            except OSError:
+                pass
+
+    def _run_inotify(self):
+        """Wait for inotify events and re-stat only the names that changed."""
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        
+        watches = {}
+        
+        def add_watch(path, prefix):
+            wd = libc.inotify_add_watch(fd, os.fsencode(path), self.WATCH_MASK)
+            if wd >= 0:
+                watches[wd] = prefix
+            return wd
+        
+        try:
+            if add_watch(self.directory, "") < 0:
+                raise OSError(ctypes.get_errno(), f"Cannot watch {self.directory}")
+            add_watch(self.include_directory, "include")
+            self.backend = "inotify"
+            
+            header = struct.Struct('iIII')
+            while not self.stop_event.is_set():
+                readable, _, _ = select.select([fd], [], [], self.interval)
+                if not readable:
+                    continue
+                
+                # Collect events until the burst settles so one save is one delta
+                dirty = set()
+                rescan = False
+                while readable:
+                    try:
+                        data = os.read(fd, 65536)
+                    except BlockingIOError:
+                        data = b''
+                    offset = 0
+                    while offset + header.size <= len(data):
+                        wd, mask, _, length = header.unpack_from(data, offset)
+                        name = data[offset + header.size:offset + header.size + length].rstrip(b'\0')
+                        offset += header.size + length
+                        name = os.fsdecode(name)
+                        prefix = watches.get(wd)
+                        if mask & self.IN_Q_OVERFLOW:
+                            rescan = True
+                        elif mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF | self.IN_IGNORED):
+                            if prefix == "":
+                                raise OSError("Watched directory was removed")
+                            watches.pop(wd, None)
+                            rescan = True
+                        elif prefix == "" and name == "include" and mask & self.IN_ISDIR:
+                            add_watch(self.include_directory, "include")
+                            rescan = True
+                        elif prefix is not None and name.endswith(('.sp', '.inc')):
+                            dirty.add(os.path.join(prefix, name) if prefix else name)
+                    readable, _, _ = select.select([fd], [], [], self.debounce)
+                
+                if rescan:
+                    self._diff(self._scan())
+                elif dirty:
+                    self._diff({path: record for path in dirty
+                                for record in [self._stat(path)] if record is not None}, dirty)
+        finally:
+            os.close(fd)
+
+
+def iter_sources(roots, extension='.sp', skip_directories=('compiled',)):
+    """Lazily yield (root, relative path, FileEntry) for every matching file under the roots.
+    
+    Each root is walked breadth first with os.scandir, so files near the top
+    of a tree arrive first and a caller can stop consuming at any time.
+    Hidden folders and the compiled output folder are skipped.
+    """
+    for root in roots:
+        pending = deque([""])
+        while pending:
+            relative_directory = pending.popleft()
+            try:
+                iterator = os.scandir(os.path.join(root, relative_directory))
+            except OSError:
+                continue
+            subdirectories = []
+            with iterator:
+                for entry in iterator:
+                    if entry.name.startswith('.'):
+                        continue
+                    relative_path = os.path.join(relative_directory, entry.name) if relative_directory else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in skip_directories:
+                                subdirectories.append(relative_path)
+                        elif entry.name.endswith(extension):
+                            stat = entry.stat()
+                            yield root, relative_path, FileEntry(entry.name, stat.st_mtime_ns, stat.st_size)
+                    except OSError:
+                        continue
+            pending.extend(sorted(subdirectories, key=str.lower))
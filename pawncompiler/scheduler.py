@@ -0,0 +1,260 @@
+"""
+Priority build queue shared by interactive compiles, batches and background rebuilds.
+"""
+
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import namedtuple
+
+# Job priorities, most urgent first
+INTERACTIVE = 0
+BATCH = 1
+BACKGROUND = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch", BACKGROUND: "background"}
+
+# Snapshot of one queued or running job; started is None while it is queued
+JobInfo = namedtuple('JobInfo', ['plugin', 'priority', 'state', 'submitted', 'started'])
+
+
+def _discard(message, tag=None):
+    """Log callback that drops every message."""
+
+
+class _Job:
+    """One plugin waiting in or taken from the queue."""
+
+    def __init__(self, plugin, priority, order, incremental, batch):
+        self.plugin = plugin
+        self.priority = priority
+        self.order = order
+        self.incremental = incremental
+        self.batches = [batch]
+        self.sequence = None
+        self.state = "queued"
+        self.submitted = time.time()
+        self.started = None
+        self.cancelled = False
+
+
+class BuildBatch:
+    """Plugins submitted together; on_done gets their BuildResults once all have finished."""
+
+    def __init__(self, plugins, on_done=None):
+        self.plugins = list(plugins)
+        self.remaining = set(self.plugins)
+        self.results = []
+        self.on_done = on_done
+        self.started = time.monotonic()
+        self.elapsed = None
+        self.done = threading.Event()
+
+    def _finish(self, result):
+        """Record one result and return True when the batch just completed."""
+        if result.plugin not in self.remaining:
+            return False
+        self.remaining.discard(result.plugin)
+        self.results.append(result)
+        if self.remaining:
+            return False
+        self.elapsed = time.monotonic() - self.started
+        return True
+
+
+class BuildScheduler:
+    """Priority queue of compile jobs served by a fixed set of worker threads.
+
+    Jobs run by priority, then by their order key, then first come first
+    served. A plugin already waiting is not queued twice; submitting it again
+    only raises its priority. Non-interactive jobs of the same priority are
+    taken up to group_size at a time and compiled in one invocation. The
+    output of interactive jobs streams to the log, the output of other jobs
+    is logged in one block per job. One extra worker only runs interactive
+    jobs, so a plugin the user asked for never waits behind a long batch.
+    """
+
+    def __init__(self, engine, workers=1, log=None, on_result=None, group_size=1):
+        self.engine = engine
+        self.workers = max(1, workers)
+        self.log = log or _discard
+        self.on_result = on_result
+        self.group_size = max(1, group_size)
+        self.condition = threading.Condition()
+        self.log_lock = threading.Lock()
+        self.heap = []
+        self.queued = {}
+        self.running = {}
+        self.sequence = itertools.count()
+        self.threads = []
+        self.stopped = False
+
+    def start(self):
+        """Start the worker threads."""
+        for index in range(self.workers + 1):
+            thread = threading.Thread(target=self._worker, args=(INTERACTIVE if index == 0 else BACKGROUND,))
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        """Cancel every job and let the worker threads exit."""
+        self.cancel()
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def submit(self, plugins, priority=BATCH, incremental=True, order=None, on_done=None):
+        """Queue plugins and return their BuildBatch.
+        
+        order is an optional key function ranking plugins of the same
+        priority, lower first. A plugin that is already running is queued
+        again so its newest source gets built. A forced rebuild of a queued
+        plugin makes its job forced.
+        """
+        plugins = list(dict.fromkeys(plugins))
+        batch = BuildBatch(plugins, on_done)
+        self.engine.resume_plugins(plugins)
+        with self.condition:
+            for plugin in plugins:
+                key = order(plugin) if order else 0
+                job = self.queued.get(plugin)
+                if job is None:
+                    job = _Job(plugin, priority, key, incremental, batch)
+                    self.queued[plugin] = job
+                else:
+                    job.batches.append(batch)
+                    job.incremental = job.incremental and incremental
+                    if (priority, key) >= (job.priority, job.order):
+                        continue
+                    job.priority, job.order = priority, key
+                job.sequence = next(self.sequence)
+                heapq.heappush(self.heap, (job.priority, job.order, job.sequence, job))
+            self.condition.notify_all()
+        if not plugins and on_done:
+            on_done(batch)
+        return batch
+
+    def cancel(self, plugins=None):
+        """Cancel the given plugins' jobs, or every job; running compilers are killed."""
+        with self.condition:
+            if plugins is None:
+                plugins = set(self.queued) | set(self.running)
+            plugins = set(plugins)
+            cancelled = [self.queued.pop(plugin) for plugin in plugins if plugin in self.queued]
+            for job in cancelled:
+                job.state = "cancelled"
+            running = [job for plugin, job in self.running.items() if plugin in plugins]
+            for job in running:
+                job.cancelled = True
+        if running:
+            self.engine.cancel_plugins([job.plugin for job in running])
+        for job in cancelled:
+            self._complete(job, self.engine.abandon([job.plugin], "cancelled")[0])
+
+    def snapshot(self):
+        """Return JobInfos of the running jobs, then the queued jobs in the order they will run."""
+        with self.condition:
+            running = sorted(self.running.values(), key=lambda job: job.started)
+            queued = sorted(self.queued.values(), key=lambda job: (job.priority, job.order, job.sequence))
+            return [JobInfo(job.plugin, PRIORITY_NAMES[job.priority], job.state, job.submitted, job.started)
+                    for job in [*running, *queued]]
+
+    def depth(self):
+        """Return the (queued, running) job counts."""
+        with self.condition:
+            return len(self.queued), len(self.running)
+
+    def _pop_ready(self, limit, lowest):
+        """Pop up to limit jobs of priority lowest or more urgent that can start now, in run order.
+        
+        Stale heap entries are dropped. A plugin resubmitted while it is
+        running stays queued until the running job has finished.
+        """
+        ready = []
+        blocked = []
+        while self.heap and len(ready) < limit:
+            entry = heapq.heappop(self.heap)
+            job = entry[3]
+            if job.sequence != entry[2] or self.queued.get(job.plugin) is not job:
+                continue
+            if job.plugin in self.running:
+                blocked.append(entry)
+                continue
+            if job.priority > lowest:
+                blocked.append(entry)
+                break
+            # Only jobs of one priority share an invocation, interactive jobs never do
+            if ready and (job.priority != ready[0].priority or job.priority == INTERACTIVE):
+                blocked.append(entry)
+                break
+            ready.append(job)
+        for entry in blocked:
+            heapq.heappush(self.heap, entry)
+        return ready
+
+    def _take(self, lowest):
+        """Wait for the next job and take it with the jobs it can share an invocation with."""
+        with self.condition:
+            while True:
+                if self.stopped:
+                    return None
+                # Groups shrink when there are too few jobs to give every worker one
+                limit = min(self.group_size, max(1, math.ceil(len(self.queued) / self.workers)))
+                group = self._pop_ready(limit, lowest)
+                if group:
+                    break
+                self.condition.wait()
+            
+            for job in group:
+                del self.queued[job.plugin]
+                job.state = "running"
+                job.started = time.time()
+                self.running[job.plugin] = job
+            return group
+
+    def _worker(self, lowest):
+        """Worker thread: compile jobs of priority lowest or more urgent until the scheduler stops."""
+        while True:
+            group = self._take(lowest)
+            if group is None:
+                return
+            
+            plugins = [job.plugin for job in group]
+            interactive = group[0].priority == INTERACTIVE
+            messages = []
+            log = self.log if interactive else (lambda message, tag=None: messages.append((message, tag)))
+            try:
+                results = self.engine.compile_group(plugins, log, all(job.incremental for job in group))
+            except Exception as e:
+                message = f"Exception while compiling {', '.join(plugins)}: {e}"
+                log(message, "error")
+                results = self.engine.abandon(plugins, "failed", message)
+            finally:
+                if messages:
+                    with self.log_lock:
+                        for message, tag in messages:
+                            self.log(message, tag)
+            
+            for job, result in zip(group, results):
+                if job.cancelled and result.state == "failed":
+                    result = result._replace(state="cancelled")
+                with self.condition:
+                    if self.running.get(job.plugin) is job:
+                        del self.running[job.plugin]
+                    job.state = result.state
+                    self.condition.notify_all()
+                self._complete(job, result)
+
+    def _complete(self, job, result):
+        """Report a finished job to the result callback and to its batches."""
+        if self.on_result:
+            self.on_result(result)
+        for batch in job.batches:
+            with self.condition:
+                completed = batch._finish(result)
+            if completed:
+                batch.done.set()
+                if batch.on_done:
+                    batch.on_done(batch)
@@ -0,0 +1,187 @@
+"""
+Incremental fuzzy search over the scripts of a scripting directory.
+"""
+
+import os
+import re
+import threading
+
+# Plugin metadata worth searching: the myinfo block, public functions and
+# registered commands / convars
+MYINFO_PATTERN = re.compile(r'public\s+Plugin\s*:?\s*myinfo\s*=\s*\{(.*?)\}', re.DOTALL)
+PUBLIC_PATTERN = re.compile(r'^\s*public\s+(?:\w+:?\s+)?(\w+)\s*\(', re.MULTILINE)
+REGISTER_PATTERN = re.compile(r'\b(?:RegConsoleCmd|RegAdminCmd|RegServerCmd|CreateConVar)\s*\(\s*"([^"]*)"')
+STRING_PATTERN = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+# Score of matches in the file name; content-only matches always rank below them
+SUBSTRING_SCORE = 1000
+
+
+def extract_keywords(path):
+    """Return the searchable metadata of a script as lowercase text."""
+    with open(path, 'r', encoding='utf-8', errors='replace') as file:
+        text = file.read()
+    keywords = []
+    match = MYINFO_PATTERN.search(text)
+    if match:
+        keywords.append("myinfo")
+        keywords.extend(STRING_PATTERN.findall(match.group(1)))
+    keywords.extend(PUBLIC_PATTERN.findall(text))
+    keywords.extend(REGISTER_PATTERN.findall(text))
+    return "\n".join(keywords).lower()
+
+
+def trigrams(text):
+    """Return the set of three character substrings of a text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def fuzzy_score(query, text):
+    """Score how well a lowercase query matches a lowercase text, or return None.
+
+    Substring matches score above SUBSTRING_SCORE, earlier and word-aligned
+    matches higher. Otherwise every query character must appear in order;
+    consecutive and word-boundary hits score higher.
+    """
+    position = text.find(query)
+    if position >= 0:
+        score = SUBSTRING_SCORE + 100 - min(position, 99)
+        if position == 0 or not text[position - 1].isalnum():
+            score += 50
+        return score - len(text) * 0.01
+
+    score = 0
+    index = previous = -1
+    for char in query:
+        index = text.find(char, index + 1)
+        if index < 0:
+            return None
+        if index == previous + 1:
+            score += 5
+        if index == 0 or not text[index - 1].isalnum():
+            score += 3
+        previous = index
+    return score - len(text) * 0.01
+
+
+class SearchIndex:
+    """Precomputed search index over file names and optional content keywords.
+
+    Names are lowercased once. A query that extends the previous query only
+    re-checks the previous matches, since anything matching the longer query
+    also matched its prefix. Content keywords are indexed by trigram so a
+    content search only verifies the files sharing every query trigram.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.lower = {}
+        self.keywords = {}
+        self.keyword_stats = {}
+        self.postings = {}
+        self.last = None
+
+    def set_names(self, names):
+        """Replace the indexed file names, keeping the content keywords of known files."""
+        with self.lock:
+            self.lower = {name: name.lower() for name in names}
+            for name in [name for name in self.keywords if name not in self.lower]:
+                self._drop_keywords(name)
+            self.last = None
+
+    def add(self, name):
+        """Add a file name to the index."""
+        with self.lock:
+            self.lower[name] = name.lower()
+            self.last = None
+
+    def remove(self, name):
+        """Remove a file and its content keywords from the index."""
+        with self.lock:
+            self.lower.pop(name, None)
+            self._drop_keywords(name)
+            self.last = None
+
+    def _drop_keywords(self, name):
+        """Remove a file's content keywords from the trigram postings."""
+        keywords = self.keywords.pop(name, None)
+        self.keyword_stats.pop(name, None)
+        if keywords is None:
+            return
+        for trigram in trigrams(keywords):
+            names = self.postings.get(trigram)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self.postings[trigram]
+
+    def index_contents(self, directory, names=None):
+        """Index the content keywords of files changed since they were last indexed.
+        
+        Returns the number of files that were read.
+        """
+        with self.lock:
+            names = list(self.lower) if names is None else list(names)
+        read = 0
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+                with self.lock:
+                    if self.keyword_stats.get(name) == (stat.st_mtime_ns, stat.st_size):
+                        continue
+                keywords = extract_keywords(path)
+            except OSError:
+                continue
+            read += 1
+            with self.lock:
+                if name not in self.lower:
+                    continue
+                self._drop_keywords(name)
+                self.keywords[name] = keywords
+                self.keyword_stats[name] = (stat.st_mtime_ns, stat.st_size)
+                for trigram in trigrams(keywords):
+                    self.postings.setdefault(trigram, set()).add(name)
+                self.last = None
+        return read
+
+    def _content_matches(self, query):
+        """Return the files whose content keywords contain the query."""
+        query_trigrams = trigrams(query)
+        if not query_trigrams:
+            return set()
+        postings = sorted((self.postings.get(trigram, set()) for trigram in query_trigrams), key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        return {name for name in candidates if query in self.keywords[name]}
+
+    def search(self, query, contents=False):
+        """Return the names matching a query, best match first.
+        
+        With contents set, files whose keywords contain the query (three
+        characters or more) also match, ranked below every name match.
+        """
+        query = query.lower().strip()
+        with self.lock:
+            if not query:
+                self.last = None
+                return list(self.lower)
+            
+            # Narrow the previous result set when the query was only extended
+            if self.last and self.last[0] == contents and query.startswith(self.last[1]):
+                pool = self.last[2]
+            else:
+                pool = self.lower
+            
+            content_hits = self._content_matches(query) if contents else set()
+            scores = {}
+            for name in pool:
+                score = fuzzy_score(query, self.lower[name])
+                if score is not None:
+                    scores[name] = score
+            
+            # Content-only matches rank below every name match
+            for name in content_hits:
+                scores.setdefault(name, 0)
+            
+            self.last = (contents, query, scores)
+            return sorted(scores, key=lambda name: (-scores[name], self.lower[name]))
@@ -0,0 +1,96 @@
+"""
+Pre-resolved compiler invocations shared by every compile of a directory.
+
+Starting the compiler is the fixed cost of every build. The service resolves
+the compiler path, working directory, environment and the Popen options that
+hide the compiler window once, and can pass several sources to a single
+invocation so a batch of small plugins shares one process start, for
+compilers that write one output per source.
+"""
+
+import math
+import os
+import subprocess
+import threading
+
+
+def _popen_options():
+    """Return the platform specific Popen arguments that hide the compiler window."""
+    if os.name != 'nt':
+        return {}
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    startupinfo.wShowWindow = subprocess.SW_HIDE
+    return {"startupinfo": startupinfo, "creationflags": subprocess.CREATE_NO_WINDOW}
+
+
+class CompileService:
+    """Resolved compiler invocation of one scripting directory.
+
+    The compiler is looked up on disk until it is found and then trusted
+    until a spawn fails. sources_per_invocation is the most plugins passed
+    to one compiler process. It defaults to 1: spcomp compiles several
+    sources as one program, so grouping only pays off with a compiler that
+    builds each source on its own.
+    """
+
+    def __init__(self, compiler_path, directory, sources_per_invocation=1):
+        self.compiler_path = compiler_path
+        self.directory = directory
+        self.sources_per_invocation = max(1, sources_per_invocation)
+        self.environment = dict(os.environ)
+        self.options = _popen_options()
+        self.lock = threading.Lock()
+        self.resolved = None
+
+    def resolve(self):
+        """Return the absolute compiler path, or None if the compiler does not exist."""
+        with self.lock:
+            if self.resolved is None and os.path.exists(self.compiler_path):
+                self.resolved = os.path.abspath(self.compiler_path)
+            return self.resolved
+
+    def available(self):
+        """Return True if the compiler exists."""
+        return self.resolve() is not None
+
+    def invalidate(self):
+        """Forget the resolved compiler so the next spawn looks it up again."""
+        with self.lock:
+            self.resolved = None
+
+    def spawn(self, sources, cwd=None):
+        """Start the compiler on one or more source paths and return the Popen.
+        
+        Output is merged into stdout and decoded as text; stdin is a pipe the
+        caller should close so the compiler never waits for a key press. The
+        compiler runs in cwd, by default the scripting directory.
+        """
+        compiler = self.resolve()
+        if compiler is None:
+            raise FileNotFoundError(f"Compiler not found at: {self.compiler_path}")
+        try:
+            return subprocess.Popen(
+                [compiler, *sources],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,  # Redirect stderr to stdout
+                stdin=subprocess.PIPE,
+                text=True,
+                errors='replace',
+                cwd=cwd or self.directory,
+                env=self.environment,
+                **self.options
+            )
+        except OSError:
+            self.invalidate()
+            raise
+
+    def groups(self, plugins, jobs=1):
+        """Split plugins into the source lists of successive invocations.
+        
+        Groups shrink when there are too few plugins to give every job one,
+        so grouping never costs parallelism.
+        """
+        plugins = list(plugins)
+        size = min(self.sources_per_invocation, max(1, math.ceil(len(plugins) / max(1, jobs))))
+        return [plugins[i:i + size] for i in range(0, len(plugins), size)]
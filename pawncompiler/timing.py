@@ -0,0 +1,161 @@
+"""
+Per-compile timing instrumentation and its on-disk history.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import namedtuple
+
+# Timing of one compile, in seconds: hash is the build cache check, precheck
+# the preprocessor syntax check, spawn the Popen call, run the compiler from spawn to exit including output streaming,
+# cpu the compiler's own user + system time (None where unavailable) and
+# log the time spent inside the log callback
+CompileTiming = namedtuple('CompileTiming', [
+    'plugin', 'state', 'started', 'wall', 'hash', 'spawn', 'run', 'cpu', 'output_bytes', 'output_lines', 'log',
+    'precheck'
+], defaults=(0.0,))
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of a list of numbers, or None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def wait_with_cpu_time(process):
+    """Wait for a process and return (returncode, cpu seconds or None).
+
+    POSIX reaps the child with os.wait4 to read its resource usage; Windows
+    asks GetProcessTimes before the handle is released.
+    """
+    if hasattr(os, 'wait4'):
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        except ChildProcessError:
+            return process.wait(), None
+        process.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+        return process.returncode, usage.ru_utime + usage.ru_stime
+
+    returncode = process.wait()
+    try:
+        import ctypes
+        from ctypes import wintypes
+        
+        creation, exit_time, kernel, user = (wintypes.FILETIME() for _ in range(4))
+        if ctypes.windll.kernel32.GetProcessTimes(
+                wintypes.HANDLE(int(process._handle)), ctypes.byref(creation), ctypes.byref(exit_time),
+                ctypes.byref(kernel), ctypes.byref(user)):
+            ticks = sum((t.dwHighDateTime << 32) | t.dwLowDateTime for t in (kernel, user))
+            return returncode, ticks / 10_000_000
+    except Exception:
+        pass
+    return returncode, None
+
+
+def format_timing(timing):
+    """Return a one-line summary of a CompileTiming."""
+    cpu = "n/a" if timing.cpu is None else f"{timing.cpu:.2f}s"
+    return (f"⏱ {timing.wall:.2f}s total: hash {timing.hash * 1000:.0f} ms, "
+            f"pre-check {timing.precheck * 1000:.0f} ms, spawn {timing.spawn * 1000:.0f} ms, "
+            f"compiler {timing.run:.2f}s (cpu {cpu}), {timing.output_bytes} bytes of output, "
+            f"logging {timing.log * 1000:.0f} ms")
+
+
+class CompileTimer:
+    """Collects the timing of one compile while it runs."""
+
+    def __init__(self, plugin):
+        self.plugin = plugin
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.hash = 0.0
+        self.spawn = 0.0
+        self.run = 0.0
+        self.cpu = None
+        self.output_bytes = 0
+        self.output_lines = 0
+        self.log = 0.0
+        self.precheck = 0.0
+        self.lines = []
+
+    def wrap_log(self, log):
+        """Return a log callback that adds its own duration to the log time and keeps the messages in lines."""
+        def timed_log(message, tag=None):
+            self.lines.append(message)
+            start = time.perf_counter()
+            try:
+                log(message, tag)
+            finally:
+                self.log += time.perf_counter() - start
+        return timed_log
+
+    def output(self, line):
+        """Count one line of compiler output."""
+        self.output_bytes += len(line.encode('utf-8', 'replace'))
+        self.output_lines += 1
+
+    def share(self, group, count):
+        """Charge this compile an even share of a compiler invocation shared by count plugins."""
+        self.spawn = group.spawn / count
+        self.run = group.run / count
+        self.cpu = None if group.cpu is None else group.cpu / count
+        self.output_bytes = group.output_bytes // count
+        self.output_lines = group.output_lines // count
+        self.log += group.log / count
+
+    def finish(self, state):
+        """Return the CompileTiming of the finished compile."""
+        return CompileTiming(
+            self.plugin, state, self.started, time.perf_counter() - self.start, self.hash, self.spawn,
+            self.run, self.cpu, self.output_bytes, self.output_lines, self.log, self.precheck
+        )
+
+
+class TimingHistory:
+    """Append-only JSON-lines history of compile timings.
+
+    The file is rotated to a single ".1" backup once it grows past max_bytes.
+    """
+
+    HISTORY_NAME = ".build_timings.jsonl"
+
+    def __init__(self, compiled_directory, max_bytes=4 * 1024 * 1024):
+        self.history_file = os.path.join(compiled_directory, self.HISTORY_NAME)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+    def record(self, timing):
+        """Append one CompileTiming to the history."""
+        line = json.dumps({key: round(value, 6) if isinstance(value, float) else value
+                           for key, value in timing._asdict().items()})
+        with self.lock:
+            os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
+            try:
+                if os.path.getsize(self.history_file) > self.max_bytes:
+                    os.replace(self.history_file, self.history_file + ".1")
+            except OSError:
+                pass
+            with open(self.history_file, 'a', encoding='utf-8') as file:
+                file.write(line + "\n")
+
+    def load(self, plugin=None, limit=None):
+        """Return recorded CompileTimings, oldest first, optionally for one plugin."""
+        timings = []
+        for path in (self.history_file + ".1", self.history_file):
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    for line in file:
+                        try:
+                            timing = CompileTiming(**json.loads(line))
+                        except (ValueError, TypeError):
+                            continue
+                        if plugin is None or timing.plugin == plugin:
+                            timings.append(timing)
+            except OSError:
+                continue
+        return timings[-limit:] if limit else timings
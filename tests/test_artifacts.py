@@ -0,0 +1,67 @@
+"""
+Behaviour tests of the content-addressed build history.
+"""
+
+import os
+
+from pawncompiler.artifacts import ArtifactStore
+
+
+def _store_builds(store, compiled_file, count, plugin="plugin.sp"):
+    for number in range(count):
+        with open(compiled_file, 'wb') as file:
+            file.write(f"build {number}".encode())
+        store.store(plugin, compiled_file)
+    store.save()
+
+
+def _blobs(store):
+    return [name for _, _, names in os.walk(store.store_directory) for name in names
+            if name != store.MANIFEST_NAME]
+
+
+def test_identical_outputs_share_one_blob(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    compiled_file = str(tmp_path / "plugin.smx")
+    with open(compiled_file, 'wb') as file:
+        file.write(b"same")
+    store.store("a.sp", compiled_file)
+    store.store("b.sp", compiled_file)
+    assert len(_blobs(store)) == 1
+
+
+def test_keep_limits_history(tmp_path):
+    store = ArtifactStore(str(tmp_path), keep=3)
+    _store_builds(store, str(tmp_path / "plugin.smx"), 5)
+    assert len(store.history("plugin.sp")) == 3
+    assert len(_blobs(store)) == 3
+
+
+def test_loading_never_deletes_history(tmp_path):
+    compiled_file = str(tmp_path / "plugin.smx")
+    _store_builds(ArtifactStore(str(tmp_path), keep=20), compiled_file, 13)
+
+    # Opening the store with the default retention, as listing does
+    store = ArtifactStore(str(tmp_path))
+    assert len(store.history("plugin.sp")) == 13
+    assert len(_blobs(store)) == 13
+    ArtifactStore(str(tmp_path), keep=1, max_bytes=1)
+    assert len(_blobs(store)) == 13
+
+
+def test_storing_applies_the_current_retention(tmp_path):
+    compiled_file = str(tmp_path / "plugin.smx")
+    _store_builds(ArtifactStore(str(tmp_path), keep=20), compiled_file, 13)
+    store = ArtifactStore(str(tmp_path), keep=10)
+    _store_builds(store, compiled_file, 1, "plugin.sp")
+    assert len(store.history("plugin.sp")) == 10
+
+
+def test_restore_returns_an_old_build(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    compiled_file = str(tmp_path / "plugin.smx")
+    _store_builds(store, compiled_file, 3)
+    oldest = store.history("plugin.sp")[-1]
+    store.restore(oldest, compiled_file)
+    with open(compiled_file, 'rb') as file:
+        assert file.read() == b"build 0"
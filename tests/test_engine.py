@@ -0,0 +1,74 @@
+"""
+Behaviour tests of the compile pipeline, run against the benchmark's stub compiler.
+"""
+
+import hashlib
+import os
+
+from pawncompiler import BuildEngine
+from pawncompiler.bench import create_project
+
+PLUGINS = ["plugin_00000.sp", "plugin_00001.sp"]
+
+
+def _engine(directory, **options):
+    """Return an engine over a fresh two-plugin project."""
+    compiler_path = create_project(str(directory), files=2, includes=2, lines=0)
+    return BuildEngine(str(directory), compiler_path=compiler_path, **options)
+
+
+def _sha1(path):
+    with open(path, 'rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+def test_compile_writes_output(tmp_path):
+    engine = _engine(tmp_path)
+    result = engine.compile(PLUGINS[0])
+    assert result.state == "ok"
+    assert os.path.exists(result.compiled_file)
+    assert result.timing is not None
+
+
+def test_unchanged_plugin_is_skipped(tmp_path):
+    engine = _engine(tmp_path)
+    assert engine.compile(PLUGINS[0]).state == "ok"
+    assert engine.compile(PLUGINS[0]).state == "skipped"
+    assert engine.compile(PLUGINS[0], incremental=False).state == "ok"
+
+
+def test_failed_group_falls_back_to_single_compiles(tmp_path):
+    # The stub, like spcomp, builds a group as one program into the first output
+    engine = _engine(tmp_path, sources_per_invocation=2)
+    results = engine.compile_group(PLUGINS, incremental=False)
+    assert [result.state for result in results] == ["ok", "ok"]
+
+    standalone = {plugin: _sha1(engine.output_path(plugin)) for plugin in PLUGINS}
+    assert standalone[PLUGINS[0]] != standalone[PLUGINS[1]]
+
+
+def test_failed_group_archives_only_real_builds(tmp_path):
+    engine = _engine(tmp_path, sources_per_invocation=2)
+    engine.compile_group(PLUGINS, incremental=False)
+    standalone = {plugin: _sha1(engine.output_path(plugin)) for plugin in PLUGINS}
+
+    engine.compile_group(PLUGINS, incremental=False)
+    for plugin in PLUGINS:
+        assert [artifact.hash for artifact in engine.artifacts.history(plugin)] == [standalone[plugin]]
+        assert _sha1(engine.output_path(plugin)) == standalone[plugin]
+
+
+def test_build_reports_every_plugin(tmp_path):
+    engine = _engine(tmp_path, sources_per_invocation=2)
+    results = engine.build(PLUGINS, jobs=1, incremental=False)
+    assert sorted(result.plugin for result in results) == PLUGINS
+    assert all(result.state == "ok" for result in results)
+
+
+def test_missing_compiler_fails_with_timing(tmp_path):
+    create_project(str(tmp_path), files=2, includes=2, lines=0)
+    engine = BuildEngine(str(tmp_path), compiler_path=str(tmp_path / "missing"))
+    results = engine.build([PLUGINS[0]], jobs=1)
+    assert results[0].state == "failed"
+    assert results[0].timing is not None
+    assert engine.build_log.last(PLUGINS[0], "failed") is not None
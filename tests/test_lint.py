@@ -0,0 +1,51 @@
+"""
+Behaviour tests of the file-local lint rules.
+"""
+
+from pawncompiler.lint import analyze_source
+
+
+def _codes(report, code):
+    return [finding for finding in report["findings"] if finding[1] == code]
+
+
+def test_large_local_array_is_reported():
+    report = analyze_source("public void OnPluginStart()\n{\n    char buffer[65536];\n}\n")
+    assert [finding[0] for finding in _codes(report, "lint 004")] == [3]
+
+
+def test_static_and_small_local_arrays_are_not_reported():
+    report = analyze_source("void Test()\n{\n    static char big[65536];\n    char small[64];\n}\n")
+    assert not _codes(report, "lint 004")
+
+
+def test_arrays_in_nested_blocks_are_reported():
+    report = analyze_source("void Test(int x)\n{\n    if (x)\n    {\n        int cells[9000];\n    }\n}\n")
+    assert [finding[0] for finding in _codes(report, "lint 004")] == [5]
+
+
+def test_enum_struct_and_methodmap_fields_are_not_locals():
+    source = (
+        "enum struct Player\n{\n    char name[65536];\n    int scores[9000];\n"
+        "    void Reset()\n    {\n        char temp[65536];\n    }\n}\n"
+        "methodmap Store < Handle\n{\n    property int Count\n    {\n        public get() { return 0; }\n    }\n"
+        "    public void Fill()\n    {\n        int values[9000];\n    }\n}\n"
+    )
+    report = analyze_source(source)
+    assert [finding[0] for finding in _codes(report, "lint 004")] == [7, 18]
+
+
+def test_global_array_is_not_a_local():
+    report = analyze_source("char g_Buffer[65536];\nint g_Table[3] = {1, 2, 3};\n")
+    assert not _codes(report, "lint 004")
+    assert {"g_Buffer", "g_Table"} <= set(report["declared"])
+
+
+def test_pragma_dynamic_raises_the_limit():
+    report = analyze_source("#pragma dynamic 131072\nvoid Test()\n{\n    char buffer[65536];\n}\n")
+    assert not _codes(report, "lint 004")
+
+
+def test_old_syntax_is_reported():
+    report = analyze_source("new String:g_Name[32];\nnew g_Count;\n")
+    assert _codes(report, "lint 003")
@@ -0,0 +1,66 @@
+"""
+Behaviour tests of the preprocessor syntax pre-check.
+"""
+
+import os
+
+import pytest
+
+from pawncompiler.includes import IncludeIndex
+from pawncompiler.preprocess import Preprocessor, lex_source
+
+
+@pytest.fixture
+def project(tmp_path):
+    """Return a function that writes a plugin and returns its pre-check diagnostics as (line, code)."""
+    os.makedirs(tmp_path / "include")
+    (tmp_path / "include" / "shared.inc").write_text("#define SHARED 1\nnative int Shared();\n")
+    preprocessor = Preprocessor(IncludeIndex(str(tmp_path), str(tmp_path / "compiled")))
+
+    def check(source, name="plugin.sp"):
+        (tmp_path / name).write_text(source)
+        return [(diagnostic.line, diagnostic.code) for diagnostic in preprocessor.check(name)]
+    return check
+
+
+def test_valid_plugin_has_no_errors(project):
+    source = ('#include <shared>\n#if SHARED\nint g_Value = 1;\n#endif\n'
+              'public void OnPluginStart()\n{\n    char text[] = "{ not a brace";\n    // }\n    /* ( */\n}\n')
+    assert project(source) == []
+
+
+def test_missing_include(project):
+    assert project("#include <missing>\n") == [(1, "fatal error 417")]
+
+
+def test_tryinclude_may_be_missing(project):
+    assert project("#tryinclude <missing>\n") == []
+
+
+def test_unterminated_string(project):
+    assert project('void Test()\n{\n    char text[] = "open;\n}\n') == [(3, "error 037")]
+
+
+def test_unterminated_comment(project):
+    assert project("/* never closed\nvoid Test() {}\n") == [(1, "error 001")]
+
+
+def test_unmatched_conditionals(project):
+    assert project("#endif\n") == [(1, "error 026")]
+    assert [code for _, code in project("#if defined FOO\nint x;\n")] == ["error 001"]
+
+
+def test_unbalanced_brackets(project):
+    assert [code for _, code in project("void Test()\n{\n    Call(1;\n}\n")] == ["error 001"]
+    assert [code for _, code in project("void Test()\n{\n}\n}\n")] == ["error 054"]
+
+
+def test_inactive_branch_is_not_checked(project):
+    assert project('#if 0\nchar text[] = "open;\n#include <missing>\n#endif\n') == []
+
+
+def test_lexing_keeps_line_numbers_across_continued_directives():
+    items, exact = lex_source('#define LONG \\\n    1\nchar text[] = "open;\n')
+    directives = [(line, value[0], value[1].split()) for kind, line, value in items if kind == "directive"]
+    assert directives == [(1, "define", ["LONG", "1"])]
+    assert ("error", 3, ("error 037", "invalid string (possibly non-terminated string)")) in items
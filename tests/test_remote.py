@@ -0,0 +1,84 @@
+"""
+Behaviour tests of remote builds against a build worker on a Unix socket.
+"""
+
+import hashlib
+import os
+import socket
+
+import pytest
+
+from pawncompiler import BuildEngine, BuildWorker, RemoteBuildPool
+from pawncompiler.bench import create_project
+from pawncompiler.remote import PROTOCOL_VERSION, receive_message, send_message
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="needs Unix sockets")
+
+PLUGINS = ["plugin_00000.sp", "plugin_00001.sp"]
+
+
+@pytest.fixture
+def worker(tmp_path):
+    compiler_path = create_project(str(tmp_path / "worker"), files=0, includes=0, lines=1)
+    worker = BuildWorker(f"unix:{tmp_path / 'worker.sock'}", compiler_path, root=str(tmp_path / "root"), slots=2)
+    worker.start()
+    yield worker
+    worker.stop()
+
+
+def test_remote_build_matches_local_build(tmp_path, worker):
+    local_directory = tmp_path / "local"
+    compiler_path = create_project(str(local_directory), files=2, includes=2, lines=1)
+    local = BuildEngine(str(local_directory), compiler_path=compiler_path)
+    local_results = local.build(PLUGINS, jobs=1)
+
+    remote_directory = tmp_path / "remote"
+    create_project(str(remote_directory), files=2, includes=2, lines=1)
+    pool = RemoteBuildPool([f"unix:{worker.address}"])
+    try:
+        remote = BuildEngine(str(remote_directory), compiler_path=str(remote_directory / "missing"), remote=pool)
+        remote_results = remote.build(PLUGINS, jobs=2)
+    finally:
+        pool.close()
+
+    assert [result.state for result in remote_results] == ["ok", "ok"]
+    for plugin in PLUGINS:
+        with open(local.output_path(plugin), 'rb') as local_file, open(remote.output_path(plugin), 'rb') as file:
+            assert file.read() == local_file.read()
+    assert (sorted(len(result.diagnostics) for result in remote_results)
+            == sorted(len(result.diagnostics) for result in local_results))
+
+
+def test_worker_rejects_files_in_the_compiled_folder(worker):
+    data = b"not a plugin"
+    sha1 = hashlib.sha1(data).hexdigest()
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.connect(worker.address)
+        file = sock.makefile('rb')
+        send_message(sock, {"op": "hello", "version": PROTOCOL_VERSION})
+        assert receive_message(file)[0]["op"] == "hello"
+        send_message(sock, {"op": "blob", "hash": sha1}, data)
+        send_message(sock, {"op": "compile", "sources": ["a.sp"], "files": {"a.sp": sha1, "compiled/a.smx": sha1}})
+        header, _ = receive_message(file)
+    assert header["op"] == "error"
+    with open(worker.blobs.path(sha1), 'rb') as blob:
+        assert blob.read() == data
+
+
+def test_include_outside_the_directory_compiles_locally(tmp_path, worker):
+    directory = tmp_path / "scripting"
+    compiler_path = create_project(str(directory), files=2, includes=2, lines=1)
+    shared = tmp_path / "shared.inc"
+    shared.write_text("native int Shared();\n")
+    source = directory / PLUGINS[0]
+    source.write_text('#include "../shared.inc"\n' + source.read_text())
+
+    pool = RemoteBuildPool([f"unix:{worker.address}"])
+    try:
+        engine = BuildEngine(str(directory), compiler_path=compiler_path, remote=pool)
+        messages = []
+        result = engine.compile(PLUGINS[0], lambda message, tag=None: messages.append(message))
+    finally:
+        pool.close()
+    assert result.state == "ok"
+    assert any("compiling locally" in message for message in messages)
@@ -0,0 +1,79 @@
+"""
+Behaviour tests of the priority build queue, run against the benchmark's stub compiler.
+"""
+
+import time
+
+import pytest
+
+from pawncompiler import BuildEngine, BuildScheduler
+from pawncompiler.bench import create_project
+from pawncompiler.scheduler import BACKGROUND, BATCH, INTERACTIVE
+
+PLUGINS = [f"plugin_{number:05d}.sp" for number in range(4)]
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    """Return a one-worker scheduler whose stub compiler takes 300 ms per compile, and its finished plugins."""
+    compiler_path = create_project(str(tmp_path), files=len(PLUGINS), includes=2, lines=0, compile_ms=300)
+    engine = BuildEngine(str(tmp_path), compiler_path=compiler_path)
+    finished = []
+    scheduler = BuildScheduler(engine, workers=1, on_result=lambda result: finished.append(result.plugin))
+    scheduler.start()
+    yield scheduler, finished
+    scheduler.stop()
+
+
+def _wait_running(scheduler, count=1):
+    deadline = time.monotonic() + 5
+    while scheduler.depth()[1] < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_more_urgent_jobs_run_first(scheduler):
+    scheduler, finished = scheduler
+    first = scheduler.submit([PLUGINS[0]], BACKGROUND)
+    _wait_running(scheduler)
+    background = scheduler.submit([PLUGINS[1]], BACKGROUND)
+    batch = scheduler.submit([PLUGINS[2]], BATCH)
+    for done in (first, background, batch):
+        assert done.done.wait(10)
+    assert finished == PLUGINS[:1] + [PLUGINS[2], PLUGINS[1]]
+
+
+def test_interactive_job_does_not_wait_for_a_batch(scheduler):
+    scheduler, finished = scheduler
+    batch = scheduler.submit(PLUGINS[:3], BATCH, incremental=False)
+    _wait_running(scheduler)
+    interactive = scheduler.submit([PLUGINS[3]], INTERACTIVE, incremental=False)
+    assert interactive.done.wait(10)
+    assert interactive.results[0].state == "ok"
+    assert len(finished) <= 2
+    assert batch.done.wait(10)
+
+
+def test_queued_plugin_is_not_queued_twice(scheduler):
+    scheduler, _ = scheduler
+    scheduler.submit([PLUGINS[0]], BATCH)
+    _wait_running(scheduler)
+    scheduler.submit([PLUGINS[1]], BACKGROUND)
+    scheduler.submit([PLUGINS[1]], BATCH, incremental=False)
+    queued = [job for job in scheduler.snapshot() if job.state == "queued"]
+    assert [(job.plugin, job.priority) for job in queued] == [(PLUGINS[1], "batch")]
+    assert scheduler.queued[PLUGINS[1]].incremental is False
+
+
+def test_cancel_stops_running_and_queued_jobs(scheduler):
+    scheduler, _ = scheduler
+    batch = scheduler.submit(PLUGINS, BATCH, incremental=False)
+    _wait_running(scheduler)
+    started = time.monotonic()
+    scheduler.cancel()
+    assert batch.done.wait(5)
+    assert time.monotonic() - started < 2
+    states = {result.plugin: result.state for result in batch.results}
+    assert sorted(states) == PLUGINS
+    assert list(states.values()).count("cancelled") >= len(PLUGINS) - 1
+    assert all(result.timing is not None for result in batch.results)